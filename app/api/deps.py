@@ -0,0 +1,18 @@
+from fastapi import Request
+from app.core.llm import BaseLLMProvider
+from app.services.editor_worker import EditorWorker
+
+
+def get_llm_client(request: Request) -> BaseLLMProvider:
+    """Shared LLM provider created in the app lifespan."""
+    return request.app.state.llm_client
+
+
+def get_editor_llm_client(request: Request) -> BaseLLMProvider:
+    """LLM provider on the lower-priority editor lane."""
+    return request.app.state.editor_llm_client
+
+
+def get_editor_worker(request: Request) -> EditorWorker:
+    """Background prompt editor worker created in the app lifespan."""
+    return request.app.state.editor_worker
@@ -1,12 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+import json
+import logging
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core import database
+from app.core.database import get_async_db, engine_pools
+from app.core.llm import BaseLLMProvider
+from app.core.timing import stage
+from app.core.metrics import get_metrics_registry
+from app.db.routing import pool_stats
+from app.api.deps import get_llm_client, get_editor_llm_client, get_editor_worker
+from app.services.editor_worker import EditorWorker
+from app.services.prompt_cache import generate_prompt_preview, get_active_prompt_cache
+from app.services.response_cache import get_response_cache
+from app.services.llm_lanes import get_llm_lanes
+from app.services.llm_router import LLMRouter
 from app.services.generator_service import GeneratorService
-from app.services.prompt_editor import PromptEditorService
-from app.repositories.prompt_repo import PromptRepository
-from app.repositories.message_repo import MessageRepository
+from app.services.conversation_io import ExportFilter, stream_ndjson
+from app.repositories.prompt_repo import AsyncPromptRepository
+from app.repositories.message_repo import AsyncMessageRepository
+from app.repositories.session_stats_repo import AsyncSessionStatsRepository
+from app.core.config import settings
+from app.schemas.session import MessageOut, SessionMessagesResponse, SessionStatsOut
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -27,65 +48,73 @@ class EditResponse(BaseModel):
     version: int
     content: str
 
-def generate_prompt_preview(content: str, max_length: int = 160) -> str:
+async def run_autonomous_trigger(db: AsyncSession, editor_worker: EditorWorker, session_id: str) -> Optional[str]:
+    # Enqueue only; the new prompt_version is reported on a later turn
     try:
-        if not content:
-            return ""
-        cleaned = " ".join(str(content).split())
-        if len(cleaned) <= max_length:
-            return cleaned
-        return cleaned[:max_length].rstrip() + "..."
+        # O(1): conditional update on the session's counters row
+        stats_repo = AsyncSessionStatsRepository(db)
+        if await stats_repo.claim_editor_trigger(session_id, every=settings.EDITOR_TRIGGER_EVERY):
+            job = editor_worker.enqueue(session_id=session_id, triggered_by="autonomous")
+            return job.id if job else None
+    except Exception as e:
+        # Silence internal trigger errors to protect user experience
+        logger.warning(f"Autonomous editor trigger failed: {e}")
+    return None
+
+async def active_prompt_metadata(db: AsyncSession) -> dict:
+    # Metadata Fetching with guaranteed fallbacks (preview is precomputed in the cache)
+    try:
+        active_prompt = await get_active_prompt_cache().get(db)
+        
+        if active_prompt:
+            active_preview = active_prompt.preview or ""
+            active_version = active_prompt.version or 1
+        else:
+            active_preview = ""
+            active_version = 1
     except Exception:
-        return ""
+        active_preview = ""
+        active_version = 1
 
-import traceback
+    return {
+        "prompt_version": int(active_version or 1),
+        "prompt_preview": str(active_preview or "")
+    }
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 @router.post("/chat")
-async def chat(request: ChatRequest, db: Session = Depends(get_db)):
+async def chat(
+    request: ChatRequest,
+    db: AsyncSession = Depends(get_async_db),
+    llm_client: BaseLLMProvider = Depends(get_llm_client),
+    editor_worker: EditorWorker = Depends(get_editor_worker),
+):
     try:
         # 1. Generate Response
-        service = GeneratorService(db)
+        service = GeneratorService(db, llm_client)
         reply = await service.generate(request.session_id, request.message)
 
         # 2. Autonomous Editor Trigger
-        try:
-            msg_repo = MessageRepository(db)
-            user_msg_count = msg_repo.count_user_messages(request.session_id)
-            if user_msg_count > 0 and user_msg_count % 5 == 0:
-                editor_service = PromptEditorService(db)
-                await editor_service.run_editor(
-                    session_id=request.session_id, 
-                    triggered_by="autonomous"
-                )
-        except Exception as e:
-            # Silence internal trigger errors to protect user experience
-            print(f"Autonomous editor trigger failed: {e}")
+        with stage("trigger"):
+            editor_job_id = await run_autonomous_trigger(db, editor_worker, request.session_id)
 
         # 3. Metadata Fetching with guaranteed fallbacks
-        try:
-            prompt_repo = PromptRepository(db)
-            active_prompt = prompt_repo.get_active_prompt()
-            
-            if active_prompt:
-                active_content = active_prompt.content or ""
-                active_version = active_prompt.version or 1
-            else:
-                active_content = ""
-                active_version = 1
-        except Exception:
-            active_content = ""
-            active_version = 1
+        with stage("metadata"):
+            metadata = await active_prompt_metadata(db)
 
         # 4. Success Return with Explicit Casting
-        return {
+        response = {
             "reply": str(reply or ""),
-            "prompt_version": int(active_version or 1),
-            "prompt_preview": str(generate_prompt_preview(active_content or ""))
+            **metadata
         }
+        if editor_job_id:
+            response["editor_job_id"] = editor_job_id
+        return response
 
-    except Exception as e:
-        print("CHAT ENDPOINT CRITICAL ERROR")
-        print(traceback.format_exc())
+    except Exception:
+        logger.exception("Chat endpoint failed")
 
         # Absolute fallback to prevent 500s
         return {
@@ -94,11 +123,54 @@ async def chat(request: ChatRequest, db: Session = Depends(get_db)):
             "prompt_preview": ""
         }
 
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    llm_client: BaseLLMProvider = Depends(get_llm_client),
+    editor_worker: EditorWorker = Depends(get_editor_worker),
+):
+    async def event_stream():
+        # The stream outlives the request scope, so it owns its session
+        db = database.AsyncSessionLocal()
+        stream = None
+        try:
+            # 1. Forward tokens as they arrive
+            service = GeneratorService(db, llm_client)
+            stream = service.generate_stream(request.session_id, request.message)
+            async for delta in stream:
+                yield sse_event("token", {"delta": delta})
+
+            # 2. Autonomous Editor Trigger
+            editor_job_id = await run_autonomous_trigger(db, editor_worker, request.session_id)
+
+            # 3. Trailing metadata event
+            metadata = await active_prompt_metadata(db)
+            if editor_job_id:
+                metadata["editor_job_id"] = editor_job_id
+            yield sse_event("meta", metadata)
+            yield sse_event("done", {})
+
+        except Exception:
+            logger.exception("Chat stream failed")
+            yield sse_event("error", {"reply": "The system encountered an error. Please try again."})
+        finally:
+            # A client disconnect lands here mid-stream: stop generation before releasing the session
+            if stream is not None:
+                await stream.aclose()
+            await db.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.post("/edit", response_model=EditResponse)
-async def edit(db: Session = Depends(get_db)):
+async def edit(editor_worker: EditorWorker = Depends(get_editor_worker)):
     try:
-        service = PromptEditorService(db)
-        new_prompt = await service.run_editor(triggered_by="manual")
+        # Joins an autonomous run already in flight instead of starting a second one
+        with stage("editor"):
+            new_prompt = await editor_worker.run_single_flight(triggered_by="manual")
         return {
             "id": str(new_prompt.id),
             "version": new_prompt.version,
@@ -110,16 +182,113 @@ async def edit(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.post("/activate/{prompt_id}")
-async def activate(prompt_id: str, db: Session = Depends(get_db)):
-    repo = PromptRepository(db)
-    prompt = repo.get_by_id(prompt_id)
+async def activate(prompt_id: str, db: AsyncSession = Depends(get_async_db)):
+    try:
+        prompt_uuid = uuid.UUID(prompt_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid prompt id")
+
+    repo = AsyncPromptRepository(db)
+    prompt = await repo.get_by_id(prompt_uuid)
     if not prompt:
         raise HTTPException(status_code=404, detail="Prompt not found")
-    repo.activate_prompt(prompt_id)
+    with stage("activate"):
+        await repo.activate_prompt(prompt_uuid)
+    get_active_prompt_cache().invalidate()
     return {"message": f"Prompt V{prompt.version} activated"}
 
 @router.post("/reset")
-async def reset(db: Session = Depends(get_db)):
-    repo = MessageRepository(db)
-    repo.clear_all_messages()
+async def reset(db: AsyncSession = Depends(get_async_db)):
+    repo = AsyncMessageRepository(db)
+    await repo.clear_all_messages()
     return {"message": "Conversation history cleared"}
+
+@router.get("/sessions", response_model=List[SessionStatsOut])
+async def list_sessions(limit: int = Query(50, ge=1, le=500), db: AsyncSession = Depends(get_async_db)):
+    repo = AsyncSessionStatsRepository(db)
+    return await repo.list_sessions(limit)
+
+@router.get("/sessions/{session_id}/messages", response_model=SessionMessagesResponse)
+async def session_messages(
+    session_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        before_id = uuid.UUID(before) if before else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid 'before' message id")
+
+    repo = AsyncMessageRepository(db)
+    page = await repo.get_session_history(session_id, limit, before_id=before_id)
+
+    # Page is fetched newest-first; return it in chronological order
+    page.reverse()
+    return {
+        "session_id": session_id,
+        "messages": [MessageOut.model_validate(msg) for msg in page],
+        "next_before": page[0].id if len(page) == limit else None
+    }
+
+@router.get("/conversations/export")
+async def export_conversations(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    session_id: List[str] = Query(default=[]),
+    prompt_version_id: Optional[uuid.UUID] = None,
+):
+    """Stream sessions as NDJSON in the conversations.json shape, one session per line."""
+    filters = ExportFilter(since=since, until=until, session_ids=session_id, prompt_version_id=prompt_version_id)
+    return StreamingResponse(stream_ndjson(database.async_read_engine, filters), media_type="application/x-ndjson")
+
+@router.get("/editor/jobs")
+async def list_editor_jobs(editor_worker: EditorWorker = Depends(get_editor_worker)):
+    return {
+        "queue_depth": editor_worker.queue.qsize(),
+        "run_in_flight": editor_worker.run_in_flight,
+        "joined_runs": editor_worker.joined_runs,
+        "jobs": [job.to_dict() for job in editor_worker.list_jobs()]
+    }
+
+@router.get("/editor/jobs/{job_id}")
+async def get_editor_job(job_id: str, editor_worker: EditorWorker = Depends(get_editor_worker)):
+    job = editor_worker.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Editor job not found")
+    return job.to_dict()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(get_metrics_registry().render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/db/pool")
+async def db_pool_stats():
+    return {name: pool_stats(pool_engine) for name, pool_engine in engine_pools().items()}
+
+@router.get("/llm/pool")
+async def llm_pool_stats():
+    return get_llm_lanes().pool_stats()
+
+@router.get("/llm/governor")
+async def llm_governor_stats():
+    return get_llm_lanes().governor_stats()
+
+@router.get("/llm/router")
+async def llm_router_stats(
+    llm_client: BaseLLMProvider = Depends(get_llm_client),
+    editor_llm_client: BaseLLMProvider = Depends(get_editor_llm_client),
+):
+    # Only present when a fallback backend is configured
+    return {
+        lane: client.stats()
+        for lane, client in (("chat", llm_client), ("editor", editor_llm_client))
+        if isinstance(client, LLMRouter)
+    }
+
+@router.get("/llm/response-cache")
+async def response_cache_stats():
+    cache = get_response_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
@@ -3,9 +3,127 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Optional read replica for plain SELECTs; sessions stick to the primary after writing
+    DATABASE_READ_URL: str = ""
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    # Recycling below the server's idle timeout lets pre-ping (a round trip per checkout) be turned off
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
     GROQ_API_KEY: str
     EDITOR_GROQ_API_KEY: str
     GROQ_MODEL: str = "llama-3.1-8b-instant"
+    GROQ_BASE_URL: str = "https://api.groq.com/openai/v1/chat/completions"
+
+    # Shared LLM HTTP pool
+    LLM_HTTP2: bool = True
+    LLM_TIMEOUT: float = 30.0
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LLM_KEEPALIVE_EXPIRY: float = 120.0
+
+    # Client-side rate governor (0 = learn limits from provider headers)
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_REQUESTS_PER_MINUTE: int = 0
+    LLM_TOKENS_PER_MINUTE: int = 0
+    LLM_QUEUE_TIMEOUT: float = 30.0
+
+    # Traffic lanes: chat > editor > eval. Lanes that share a key share one
+    # governor; background lanes may only drain LLM_BACKGROUND_SHARE of it.
+    EVAL_GROQ_API_KEY: str = ""
+    EDITOR_LLM_MAX_CONCURRENCY: int = 2
+    EDITOR_LLM_MAX_CONNECTIONS: int = 4
+    EVAL_LLM_MAX_CONCURRENCY: int = 8
+    EVAL_LLM_MAX_CONNECTIONS: int = 10
+    LLM_BACKGROUND_SHARE: float = 0.5
+
+    # Offline eval scoring: local TF-IDF similarity, LLM judge only inside the borderline band
+    EVAL_SCORER: str = "local"  # local | llm
+    EVAL_SCORER_NGRAM_MAX: int = 2
+    EVAL_JUDGE_BORDERLINE: bool = True
+    EVAL_JUDGE_BAND_LOW: float = 0.3
+    EVAL_JUDGE_BAND_HIGH: float = 0.6
+    # Judge scores below this mark a weak reply; unjudged similarity uses EVAL_JUDGE_BAND_HIGH
+    EVAL_WEAK_SCORE: float = 0.7
+
+    # Optional second OpenAI-compatible backend; enables the latency router
+    LLM_FALLBACK_BASE_URL: str = ""
+    LLM_FALLBACK_API_KEY: str = ""
+    LLM_FALLBACK_MODEL: str = ""
+    LLM_ROUTER_WINDOW: int = 100
+    LLM_ROUTER_FAILURE_THRESHOLD: int = 3
+    LLM_ROUTER_COOLDOWN: float = 30.0
+    # Hedge a slow call on the next backend after the primary's p-th percentile latency
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_MIN_DELAY: float = 1.0
+
+    # groq | fake (offline FakeLLMProvider for benchmarks and local runs)
+    LLM_PROVIDER: str = "groq"
+    FAKE_LLM_LATENCY_MS: float = 300.0
+    FAKE_LLM_LATENCY_DISTRIBUTION: str = "lognormal"
+    FAKE_LLM_LATENCY_JITTER: float = 0.25
+    FAKE_LLM_TOKENS_PER_SECOND: float = 250.0
+    FAKE_LLM_ERROR_RATE: float = 0.0
+    FAKE_LLM_ERROR_KIND: str = "provider"
+    FAKE_LLM_SEED: int = 0
+
+    # Per-stage Server-Timing response header
+    SERVER_TIMING_ENABLED: bool = False
+
+    # Startup: schema changes run in `python -m app.scripts.migrate` (Procfile release step)
+    SCHEMA_AUTO_MIGRATE: bool = False
+    DB_POOL_WARM_CONNECTIONS: int = 4
+    LLM_WARM_CONNECTIONS: int = 1
+    STARTUP_WARMUP_TIMEOUT: float = 10.0
+
+    # Background prompt editor
+    EDITOR_TRIGGER_EVERY: int = 5
+    EDITOR_QUEUE_MAXSIZE: int = 8
+    EDITOR_JOB_HISTORY: int = 50
+    # Where Stage 1 reads assistant turns from: corpus | live | both
+    EDITOR_BEHAVIOR_SOURCE: str = "corpus"
+    EDITOR_BEHAVIOR_SAMPLE: int = 5
+    BEHAVIOR_REPORT_CACHE_ENABLED: bool = True
+    BEHAVIOR_REPORT_CACHE_MAX_ENTRIES: int = 256
+
+    # Chat turn persistence
+    CHAT_UNIT_OF_WORK: bool = True
+    MESSAGE_WRITE_BUFFER: bool = False
+    MESSAGE_WRITE_BUFFER_MAX_DELAY_MS: float = 5.0
+    MESSAGE_WRITE_BUFFER_MAX_BATCH: int = 200
+
+    # Message retention: monthly partitions on Postgres, keyset-chunked deletes everywhere
+    MESSAGE_DELETE_BATCH_SIZE: int = 2000
+    MESSAGE_PARTITION_MONTHS_AHEAD: int = 2
+    MESSAGE_RETENTION_DAYS: int = 180
+    MESSAGE_ARCHIVE_DIR: str = "app/data/message_archive"
+
+    # Conversation corpus: JSON array or NDJSON exported from messages
+    CONVERSATION_CORPUS_PATH: str = "app/data/conversations.json"
+    CONVERSATION_IO_BATCH_SIZE: int = 1000
+
+    # Token-budgeted context assembly
+    CONTEXT_MAX_HISTORY_MESSAGES: int = 50
+    CONTEXT_INPUT_TOKEN_BUDGET: int = 6000
+    CONTEXT_RESERVED_OUTPUT_TOKENS: int = 1024
+    # Slice of the current user turn kept even when the system prompt is oversized
+    CONTEXT_MIN_CURRENT_TURN_TOKENS: int = 256
+    EDITOR_MAX_INPUT_TOKENS: int = 2000
+
+    # Stage-2 output rules; streamed generations are cut off at the first violation
+    EDITOR_VALIDATION_RULES_PATH: str = "app/data/validation_rules.json"
+    EDITOR_STREAM_VALIDATION: bool = True
+
+    # Reply cache for first-turn questions
+    RESPONSE_CACHE_ENABLED: bool = False
+    RESPONSE_CACHE_TTL: float = 3600.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+    RESPONSE_CACHE_MAX_HISTORY: int = 0
+
+    # Active prompt cache revalidation interval (seconds)
+    PROMPT_CACHE_CHECK_INTERVAL: float = 2.0
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1 +1,7 @@
-from app.db.session import engine, SessionLocal, Base, get_db
+from app.db import session
+from app.db.session import Base, get_db, get_async_db, get_engines, warm_async_pool, engine_pools
+
+
+def __getattr__(name: str):
+    # engine, AsyncSessionLocal, ... are built on first access (see app.db.session)
+    return getattr(session, name)
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import ssl
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def shared_ssl_context() -> ssl.SSLContext:
+    # Loading the CA bundle costs tens of ms; every pool can share one context
+    return httpx.create_ssl_context()
+
+
+class PooledHTTPClient:
+    """Process-wide keep-alive HTTP client shared by every LLM call.
+
+    Connection reuse is tracked through httpcore's trace extension so we can
+    confirm that TCP/TLS handshakes are amortized across requests.
+    """
+
+    def __init__(
+        self,
+        http2: bool = None,
+        timeout: float = None,
+        max_connections: int = None,
+        max_keepalive_connections: int = None,
+        keepalive_expiry: float = None,
+    ):
+        self.http2 = settings.LLM_HTTP2 if http2 is None else http2
+        self.timeout = timeout or settings.LLM_TIMEOUT
+        self.limits = httpx.Limits(
+            max_connections=max_connections or settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive_connections or settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=keepalive_expiry or settings.LLM_KEEPALIVE_EXPIRY,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # Reuse stats
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self.http_versions: Dict[str, int] = {}
+
+    def _build_client(self) -> httpx.AsyncClient:
+        try:
+            return httpx.AsyncClient(
+                timeout=self.timeout, limits=self.limits, http2=self.http2, verify=shared_ssl_context()
+            )
+        except ImportError:
+            # http2=True needs the optional `h2` package
+            logger.warning("HTTP/2 requested but 'h2' is not installed. Falling back to HTTP/1.1.")
+            self.http2 = False
+            return httpx.AsyncClient(timeout=self.timeout, limits=self.limits, verify=shared_ssl_context())
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Lazily created so scripts without a lifespan still share one pool
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    async def start(self):
+        # Transport setup imports httpcore and loads certificates: keep it off the event loop
+        if self._client is None or self._client.is_closed:
+            self._client = await asyncio.to_thread(self._build_client)
+
+    async def close(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    async def warm(self, url: str, connections: int = 1):
+        """Open keep-alive connections to `url`'s host ahead of the first real request.
+
+        A HEAD needs no credentials and spends no tokens; any HTTP status means
+        the TCP/TLS (and HTTP/2) handshake is done and the connection is pooled.
+        """
+        async def probe():
+            try:
+                await self.client.head(url, extensions={"trace": self._trace})
+                self.requests += 1
+            except httpx.HTTPError as e:
+                logger.warning(f"LLM pool warm-up to {url} failed: {e}")
+
+        # HTTP/2 multiplexes onto one connection; HTTP/1.1 needs one probe per connection
+        await asyncio.gather(*(probe() for _ in range(1 if self.http2 else connections)))
+
+    async def _trace(self, event_name: str, info: Dict[str, Any]):
+        if event_name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+    def _record_response(self, response: httpx.Response):
+        version = response.http_version
+        self.http_versions[version] = self.http_versions.get(version, 0) + 1
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        self.requests += 1
+        response = await self.client.post(url, extensions={"trace": self._trace}, **kwargs)
+        self._record_response(response)
+        return response
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        self.requests += 1
+        async with self.client.stream(method, url, extensions={"trace": self._trace}, **kwargs) as response:
+            self._record_response(response)
+            yield response
+
+    def stats(self) -> Dict[str, Any]:
+        reused = max(self.requests - self.connections_opened, 0)
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "tls_handshakes": self.tls_handshakes,
+            "reused_requests": reused,
+            "reuse_ratio": round(reused / self.requests, 4) if self.requests else 0.0,
+            "http_versions": dict(self.http_versions),
+        }
+
+
+_llm_http_pool: Optional[PooledHTTPClient] = None
+
+
+def get_llm_http_pool() -> PooledHTTPClient:
+    global _llm_http_pool
+    if _llm_http_pool is None:
+        _llm_http_pool = PooledHTTPClient()
+    return _llm_http_pool
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
 
 class LLMError(Exception):
     """Base exception for LLM related errors."""
@@ -13,6 +13,10 @@ class LLMQuotaError(LLMError):
     """Exception raised when quota is exceeded (429)."""
     pass
 
+class LLMRateLimitTimeout(LLMError):
+    """Exception raised when a call could not get a rate-limit slot before its deadline."""
+    pass
+
 class BaseLLMProvider(ABC):
     """Abstract base class for LLM providers."""
 
@@ -29,3 +33,22 @@ class BaseLLMProvider(ABC):
         OpenAI-style chat interface.
         """
         pass
+
+    async def chat_once(self, messages: List[Dict], **kwargs) -> str:
+        """
+        Single attempt without provider-side retries.
+        Routers call this so they can fail over instead of backing off.
+        """
+        return await self.chat(messages, **kwargs)
+
+    async def warm(self):
+        """
+        Pre-open connections before the first request. No-op by default.
+        """
+
+    async def stream_chat(self, messages: List[Dict], **kwargs) -> AsyncIterator[str]:
+        """
+        Streaming chat interface yielding content deltas.
+        Providers without native streaming yield the full reply once.
+        """
+        yield await self.chat(messages, **kwargs)
@@ -0,0 +1,111 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from app.core.config import settings
+from app.core.metrics import STAGE_DURATION
+
+# Per-request stage durations in ms; mutated in place so child tasks share it
+_request_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_stages", default=None)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as a named stage: always into the stage histogram, and into the
+    current request's Server-Timing breakdown when there is one."""
+    stages = _request_stages.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_DURATION.observe(elapsed, stage=name)
+        if stages is not None:
+            stages[name] = stages.get(name, 0.0) + elapsed * 1000
+
+
+def current_stages() -> Optional[Dict[str, float]]:
+    return _request_stages.get()
+
+
+def format_server_timing(stages: Dict[str, float]) -> str:
+    return ", ".join(f"{name};dur={duration:.2f}" for name, duration in stages.items())
+
+
+def parse_server_timing(value: str) -> Dict[str, float]:
+    stages = {}
+    for entry in (value or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        for param in params.split(";"):
+            key, _, duration = param.strip().partition("=")
+            if name and key == "dur":
+                stages[name] = float(duration)
+    return stages
+
+
+class StartupTimings:
+    """Wall-clock breakdown of process startup; phases may overlap when run in parallel."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(seconds * 1000, 2) for name, seconds in self.phases.items()}
+
+    def summary(self) -> str:
+        return ", ".join(f"{name}={ms:.1f}ms" for name, ms in self.as_dict().items())
+
+
+_startup_timings: Optional[StartupTimings] = None
+
+
+def get_startup_timings() -> StartupTimings:
+    global _startup_timings
+    if _startup_timings is None:
+        _startup_timings = StartupTimings()
+    return _startup_timings
+
+
+class ServerTimingMiddleware:
+    """Adds a Server-Timing header with per-stage durations to HTTP responses.
+
+    Only the stages finished before the response starts are reported, so a
+    streamed reply shows its setup cost but not the stream itself.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.SERVER_TIMING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stages: Dict[str, float] = {}
+        token = _request_stages.set(stages)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                stages["total"] = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", format_server_timing(stages).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stages.reset(token)
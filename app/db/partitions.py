@@ -0,0 +1,146 @@
+"""Monthly range partitions for `messages` on Postgres.
+
+Partitioning is opt-in: `python -m app.scripts.message_retention partition`
+converts the table once; afterwards ensure_schema keeps partitions for the
+coming months in place. On other backends (and unconverted tables) every
+helper here is a no-op and retention falls back to chunked deletes.
+"""
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.models.message import Message
+
+PARTITION_PREFIX = "messages_p"
+DEFAULT_PARTITION = "messages_default"
+
+
+def month_start(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(conn.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = 'messages'
+        )
+    """)).scalar())
+
+
+def list_month_partitions(conn: Connection) -> List[Tuple[str, datetime, datetime]]:
+    """(name, lower, upper) for each monthly partition, oldest first."""
+    if not is_partitioned(conn):
+        return []
+    names = conn.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'messages' AND c.relname LIKE :prefix
+        ORDER BY c.relname
+    """), {"prefix": f"{PARTITION_PREFIX}%"}).scalars().all()
+
+    partitions = []
+    for name in names:
+        lower = datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m").replace(tzinfo=timezone.utc)
+        partitions.append((name, lower, add_months(lower, 1)))
+    return partitions
+
+
+def create_month_partition(conn: Connection, month: datetime):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF messages "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    ))
+
+
+def ensure_month_partitions(conn: Connection, months_ahead: int, now: datetime = None):
+    """Partitions for the current month and `months_ahead` more, so inserts never hit the default."""
+    if not is_partitioned(conn):
+        return
+    current = month_start(now or datetime.now(timezone.utc))
+    for offset in range(months_ahead + 1):
+        create_month_partition(conn, add_months(current, offset))
+
+
+def truncate_closed_partitions(conn: Connection, now: datetime = None) -> int:
+    """TRUNCATE every month partition that ended before the current month; returns how many."""
+    current = month_start(now or datetime.now(timezone.utc))
+    closed = [name for name, _, upper in list_month_partitions(conn) if upper <= current]
+    for name in closed:
+        # Locks only this partition; live inserts go to the current month
+        conn.execute(text(f"TRUNCATE TABLE {name}"))
+    return len(closed)
+
+
+def drop_month_partition(conn: Connection, name: str):
+    conn.execute(text(f"ALTER TABLE messages DETACH PARTITION {name}"))
+    conn.execute(text(f"DROP TABLE {name}"))
+
+
+def convert_messages_to_partitioned(engine: Engine, months_ahead: int) -> int:
+    """One-off: rebuild `messages` as a range-partitioned table and copy rows across.
+
+    Runs in one transaction and holds an exclusive lock on messages while it
+    copies, so run it in a maintenance window. Returns the number of rows moved.
+    """
+    with engine.begin() as conn:
+        if conn.dialect.name != "postgresql":
+            raise RuntimeError("Message partitioning requires Postgres.")
+        if is_partitioned(conn):
+            return 0
+
+        conn.execute(text("LOCK TABLE messages IN ACCESS EXCLUSIVE MODE"))
+        conn.execute(text("ALTER TABLE messages RENAME TO messages_unpartitioned"))
+        # Index names are schema-wide; the new parent reuses them
+        for index in Message.__table__.indexes:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+
+        # The partition key has to be part of the primary key
+        conn.execute(text("""
+            CREATE TABLE messages (
+                id UUID NOT NULL,
+                session_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                prompt_version_id UUID REFERENCES prompts(id),
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+        """))
+        conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF messages DEFAULT"))
+
+        oldest = conn.execute(text("SELECT MIN(created_at) FROM messages_unpartitioned")).scalar()
+        now = datetime.now(timezone.utc)
+        month = month_start(oldest or now)
+        last = add_months(month_start(now), months_ahead)
+        while month <= last:
+            create_month_partition(conn, month)
+            month = add_months(month, 1)
+
+        for index in Message.__table__.indexes:
+            index.create(bind=conn)
+
+        moved = conn.execute(text("""
+            INSERT INTO messages (id, session_id, role, content, prompt_version_id, created_at)
+            SELECT id, session_id, role, content, prompt_version_id, COALESCE(created_at, now())
+            FROM messages_unpartitioned
+        """)).rowcount
+        conn.execute(text("DROP TABLE messages_unpartitioned"))
+        return moved
@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+from typing import Dict, Iterator, Union
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.selectable import CompoundSelect
+
+# Session.info keys
+STICKY_KEY = "routing_sticky"
+PRIMARY_KEY = "routing_primary"
+
+
+class RoutingSession(Session):
+    """Sends plain SELECTs to the read replica and everything else to the primary.
+
+    Once a session has written (flush, DML, raw SQL, locking reads), all its
+    later reads stay on the primary so a chat turn reads its own writes.
+    """
+
+    primary: Engine = None
+    replica: Engine = None
+
+    def _is_replica_read(self, clause) -> bool:
+        if self._flushing or self.info.get(STICKY_KEY) or self.info.get(PRIMARY_KEY):
+            return False
+        if not isinstance(clause, (Select, CompoundSelect)):
+            return False
+        return getattr(clause, "_for_update_arg", None) is None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._is_replica_read(clause):
+            return self.replica
+        # No clause means a caller wants the connection itself (DDL, dialect checks)
+        if clause is not None or self._flushing:
+            self.info[STICKY_KEY] = True
+        return self.primary
+
+
+def routing_session_class(primary: Engine, replica: Engine) -> type:
+    return type("BoundRoutingSession", (RoutingSession,), {"primary": primary, "replica": replica})
+
+
+@contextmanager
+def use_primary(db: Union[Session, AsyncSession]) -> Iterator[None]:
+    """Route this session's reads to the primary for the duration of the block."""
+    info = db.info
+    previous = info.get(PRIMARY_KEY)
+    info[PRIMARY_KEY] = True
+    try:
+        yield
+    finally:
+        info[PRIMARY_KEY] = previous
+
+
+def pool_stats(engine: Engine) -> Dict[str, int]:
+    pool = engine.pool
+    stats = {}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if method is not None:
+            stats[name] = method()
+    return stats
@@ -0,0 +1,76 @@
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.db.session import Base
+from app.db.partitions import ensure_month_partitions
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_schema(engine: Engine):
+    """Create missing tables, plus indexes added to tables that already exist."""
+    from app import models  # noqa: F401  # Ensure models are registered
+
+    inspector = inspect(engine)
+    had_session_stats = inspector.has_table("session_stats")
+    if inspector.has_table("prompts"):
+        prompt_indexes = {index["name"] for index in inspector.get_indexes("prompts")}
+        if "uq_prompts_version" not in prompt_indexes:
+            renumber_duplicate_prompt_versions(engine)
+
+    Base.metadata.create_all(bind=engine)
+
+    # create_all only emits indexes together with a new table
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+    if not had_session_stats:
+        backfill_session_stats(engine, settings.EDITOR_TRIGGER_EVERY)
+
+    # No-op unless messages was converted to monthly partitions (Postgres)
+    with engine.begin() as conn:
+        ensure_month_partitions(conn, settings.MESSAGE_PARTITION_MONTHS_AHEAD)
+
+
+def renumber_duplicate_prompt_versions(engine: Engine):
+    """Give racing editor runs' duplicate versions fresh numbers so the unique index can be built."""
+    with engine.begin() as conn:
+        rows = conn.execute(text(
+            "SELECT id, version FROM prompts ORDER BY version, created_at, id"
+        )).all()
+        next_version = max((row.version for row in rows), default=0) + 1
+        seen = set()
+        for row in rows:
+            if row.version not in seen:
+                seen.add(row.version)
+                continue
+            logger.info(f"Renumbering duplicate prompt version {row.version} -> {next_version}")
+            conn.execute(
+                text("UPDATE prompts SET version = :version WHERE id = :id"),
+                {"version": next_version, "id": row.id},
+            )
+            next_version += 1
+
+
+def backfill_session_stats(engine: Engine, every: int = None):
+    """Seed per-session counters from existing messages (one-off, on table creation)."""
+    every = every or settings.EDITOR_TRIGGER_EVERY
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO session_stats (
+                session_id, user_message_count, assistant_message_count,
+                last_editor_trigger_count, last_activity_at
+            )
+            SELECT
+                session_id,
+                SUM(CASE WHEN role = 'user' THEN 1 ELSE 0 END),
+                SUM(CASE WHEN role = 'assistant' THEN 1 ELSE 0 END),
+                SUM(CASE WHEN role = 'user' THEN 1 ELSE 0 END)
+                    - SUM(CASE WHEN role = 'user' THEN 1 ELSE 0 END) % :every,
+                MAX(created_at)
+            FROM messages
+            GROUP BY session_id
+        """), {"every": every})
@@ -7,14 +7,16 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 from app.core.database import SessionLocal
+from app.db.routing import use_primary
 from app.models.prompt import Prompt
 
 
 def seed():
     db = SessionLocal()
     try:
-        # Check if any prompt exists
-        existing_prompt = db.query(Prompt).first()
+        # Check if any prompt exists; a lagging replica could miss one and seed twice
+        with use_primary(db):
+            existing_prompt = db.query(Prompt).first()
         if not existing_prompt:
             print("No prompts found. Seeding initial prompt...")
             initial_prompt = Prompt(
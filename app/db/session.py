@@ -1,33 +1,182 @@
-import os
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
+import asyncio
+import threading
+from typing import Dict, Optional
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from app.core.config import settings
+from app.core.metrics import get_metrics_registry
+from app.db.routing import pool_stats, routing_session_class
 
-# Load .env file
-load_dotenv()
 
-DATABASE_URL = os.environ["DATABASE_URL"]
+def normalize_database_url(database_url: str) -> str:
+    # Fix for SQLAlchemy 1.4+ requiring 'postgresql://' instead of 'postgres://'
+    if database_url.startswith("postgres://"):
+        database_url = database_url.replace("postgres://", "postgresql://", 1)
 
-# Fix for SQLAlchemy 1.4+ requiring 'postgresql://' instead of 'postgres://'
-if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+    # Enforce SSL for Neon/Postgres
+    if "sslmode" not in database_url and not database_url.startswith("sqlite"):
+        database_url += ("&" if "?" in database_url else "?") + "sslmode=require"
+    return database_url
 
-# Enforce SSL for Neon/Postgres
-if "sslmode" not in DATABASE_URL and not DATABASE_URL.startswith("sqlite"):
-    DATABASE_URL += ("&" if "?" in DATABASE_URL else "?") + "sslmode=require"
 
-print(f"DEBUG: Using DATABASE_URL starting with {DATABASE_URL.split(':')[0]}")
+def to_async_url(database_url: str):
+    """Map a sync DATABASE_URL onto its asyncio driver (asyncpg / aiosqlite)."""
+    url = make_url(database_url)
+    connect_args = {}
+    backend = url.get_backend_name()
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+    if backend == "postgresql":
+        # asyncpg takes SSL as a connect argument, not libpq query params
+        query = dict(url.query)
+        sslmode = query.pop("sslmode", None)
+        query.pop("channel_binding", None)
+        if sslmode and sslmode != "disable":
+            connect_args["ssl"] = sslmode
+        url = url.set(drivername="postgresql+asyncpg", query=query)
+    elif backend == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return url, connect_args
+
+
+def pool_options(database_url) -> dict:
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING, "pool_recycle": settings.DB_POOL_RECYCLE}
+    # In-memory SQLite uses a single-connection pool without sizing knobs
+    if make_url(str(database_url)).database not in (None, "", ":memory:"):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    return options
+
+
+# Names served by the module __getattr__; nothing connects until one is first used
+LAZY_NAMES = frozenset({
+    "DATABASE_URL", "DATABASE_READ_URL", "ASYNC_DATABASE_URL", "ASYNC_DATABASE_READ_URL",
+    "engine", "read_engine", "async_engine", "async_read_engine", "SessionLocal", "AsyncSessionLocal",
+})
+
+_engines: Optional[Dict[str, object]] = None
+_engines_lock = threading.Lock()
+
+
+def _build_engines() -> Dict[str, object]:
+    database_url = normalize_database_url(settings.DATABASE_URL)
+    # Optional read replica; unset means every query goes to the primary
+    database_read_url = normalize_database_url(settings.DATABASE_READ_URL) if settings.DATABASE_READ_URL else None
+
+    # Sync engine: seed script, offline scripts and schema creation
+    engine = create_engine(database_url, **pool_options(database_url))
+    read_engine = create_engine(database_read_url, **pool_options(database_read_url)) if database_read_url else engine
+
+    # Async engine: request handlers and background workers
+    async_database_url, async_connect_args = to_async_url(database_url)
+    async_engine = create_async_engine(async_database_url, connect_args=async_connect_args, **pool_options(async_database_url))
+
+    if database_read_url:
+        async_database_read_url, async_read_connect_args = to_async_url(database_read_url)
+        async_read_engine = create_async_engine(
+            async_database_read_url, connect_args=async_read_connect_args, **pool_options(async_database_read_url)
+        )
+        # Plain SELECTs go to the replica until the session writes
+        session_local = sessionmaker(
+            autocommit=False, autoflush=False, class_=routing_session_class(engine, read_engine)
+        )
+        async_session_local = async_sessionmaker(
+            class_=AsyncSession,
+            sync_session_class=routing_session_class(async_engine.sync_engine, async_read_engine.sync_engine),
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    else:
+        async_database_read_url = None
+        async_read_engine = async_engine
+        session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        async_session_local = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+    return {
+        "DATABASE_URL": database_url,
+        "DATABASE_READ_URL": database_read_url,
+        "ASYNC_DATABASE_URL": async_database_url,
+        "ASYNC_DATABASE_READ_URL": async_database_read_url,
+        "engine": engine,
+        "read_engine": read_engine,
+        "async_engine": async_engine,
+        "async_read_engine": async_read_engine,
+        "SessionLocal": session_local,
+        "AsyncSessionLocal": async_session_local,
+    }
+
+
+def get_engines() -> Dict[str, object]:
+    """Engines and session factories, built on first use rather than at import."""
+    global _engines
+    if _engines is None:
+        with _engines_lock:
+            if _engines is None:
+                _engines = _build_engines()
+    return _engines
+
+
+def __getattr__(name: str):
+    if name in LAZY_NAMES:
+        return get_engines()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def engine_pools() -> dict:
+    """Request-path pools by role; the replica appears only when configured."""
+    engines = get_engines()
+    pools = {"primary": engines["async_engine"].sync_engine}
+    if engines["async_read_engine"] is not engines["async_engine"]:
+        pools["replica"] = engines["async_read_engine"].sync_engine
+    return pools
+
+
+# A scrape before the first DB use reports nothing rather than opening engines
+get_metrics_registry().gauge(
+    "db_pool_connections", "Async DB pool connections by state.", ["engine", "state"],
+    lambda: {
+        (name, state): value
+        for name, pool_engine in (engine_pools().items() if _engines is not None else ())
+        for state, value in pool_stats(pool_engine).items()
+    },
+)
 
 Base = declarative_base()
 
 
 def get_db():
-    db = SessionLocal()
+    db = get_engines()["SessionLocal"]()
     try:
         yield db
     finally:
         db.close()
+
+
+async def warm_async_pool(connections: int, target=None) -> int:
+    """Open up to `connections` pooled connections at once and return them to the pool.
+
+    Doubles as the startup connectivity check: any failure is raised.
+    """
+    target = target or get_engines()["async_engine"]
+    size = getattr(target.pool, "size", lambda: connections)()
+    opened = await asyncio.gather(
+        *(target.connect() for _ in range(max(1, min(connections, size)))), return_exceptions=True
+    )
+    try:
+        for conn in opened:
+            if isinstance(conn, BaseException):
+                raise conn
+        await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in opened))
+    finally:
+        await asyncio.gather(*(conn.close() for conn in opened if not isinstance(conn, BaseException)))
+    return len(opened)
+
+
+async def get_async_db():
+    async with get_engines()["AsyncSessionLocal"]() as db:
+        yield db
@@ -1,24 +1,108 @@
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from sqlalchemy import text
-from app.core.database import engine, Base
+from app.core.config import settings
+from app.core import database
+from app.core.timing import ServerTimingMiddleware, get_startup_timings
+from app.core.metrics import MetricsMiddleware, get_metrics_registry
+from app.db.schema import ensure_schema
 from app import models  # Ensure models are registered
 from app.api.routes import router
+from app.services.llm_router import build_llm_provider
+from app.services.llm_lanes import CHAT_LANE, EDITOR_LANE, get_llm_lanes
+from app.services.editor_worker import EditorWorker
+from app.repositories.message_buffer import get_message_write_buffer
+from app.services.corpus import get_conversation_corpus
 import os
 
+logger = logging.getLogger(__name__)
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Step 4: Verify Database Connection on Startup
+
+async def _timed(name: str, coro):
+    with get_startup_timings().phase(name):
+        return await coro
+
+
+async def _warm_db():
+    # Step 4: Verify Database Connection on Startup, leaving the pool pre-filled
     try:
-        with engine.connect() as connection:
-            connection.execute(text("SELECT 1"))
-            print("Database connection successful.")
+        opened = await database.warm_async_pool(settings.DB_POOL_WARM_CONNECTIONS)
+        if database.async_read_engine is not database.async_engine:
+            opened += await database.warm_async_pool(settings.DB_POOL_WARM_CONNECTIONS, database.async_read_engine)
+        logger.info(f"Database connection successful ({opened} pooled connections warmed).")
     except Exception as e:
-        print(f"Startup failed: Database connection error: {e}")
+        logger.exception(f"Startup failed: Database connection error: {e}")
         # Raising exception here will stop the startup
         raise RuntimeError("Database connection failed") from e
-    yield
+
+
+async def _warm_llm(llm_lanes, providers):
+    await llm_lanes.start()
+    # Best effort: a slow or unreachable provider must not hold up startup
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*(provider.warm() for provider in providers)), settings.STARTUP_WARMUP_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        logger.warning(f"LLM connection warm-up exceeded {settings.STARTUP_WARMUP_TIMEOUT}s; continuing cold.")
+
+
+async def _load_corpus():
+    # Reference conversations are parsed once and reloaded on mtime change
+    try:
+        await get_conversation_corpus().ensure_fresh()
+    except FileNotFoundError as e:
+        logger.warning(f"Conversation corpus not loaded: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    timings = get_startup_timings()
+    started = time.perf_counter()
+
+    # Schema changes normally run once per deploy in the release step
+    if settings.SCHEMA_AUTO_MIGRATE:
+        with timings.phase("schema"):
+            await asyncio.to_thread(ensure_schema, database.engine)
+
+    # Keep-alive pools per traffic lane; chat is served ahead of the editor
+    llm_lanes = get_llm_lanes()
+    app.state.llm_client = build_llm_provider(CHAT_LANE)
+    app.state.editor_llm_client = build_llm_provider(EDITOR_LANE)
+
+    # Independent round trips: DB pool, LLM connections and corpus load overlap
+    await asyncio.gather(
+        _timed("db_pool", _warm_db()),
+        _timed("llm_pools", _warm_llm(llm_lanes, [app.state.llm_client, app.state.editor_llm_client])),
+        _timed("corpus", _load_corpus()),
+    )
+
+    # Autonomous prompt editor runs off the request path
+    editor_worker = EditorWorker(app.state.editor_llm_client)
+    await editor_worker.start()
+    app.state.editor_worker = editor_worker
+    get_metrics_registry().gauge(
+        "editor_queue_depth", "Prompt editor jobs waiting to run.", [],
+        lambda: {(): editor_worker.queue.qsize()},
+    )
+    timings.record("lifespan", time.perf_counter() - started)
+    logger.info(f"Startup: {timings.summary()}")
+    try:
+        yield
+    finally:
+        await editor_worker.stop()
+        write_buffer = get_message_write_buffer()
+        if write_buffer is not None:
+            await write_buffer.close()
+        await llm_lanes.close()
+        await database.async_engine.dispose()
+        if database.async_read_engine is not database.async_engine:
+            await database.async_read_engine.dispose()
 
 if __name__ == "__main__":
     import uvicorn
@@ -28,9 +112,6 @@ if __name__ == "__main__":
         port=int(os.environ.get("PORT", 8000)),
     )
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI(title="Zayar Hackathon ISSA", lifespan=lifespan)
@@ -46,9 +127,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(router)
 
+get_startup_timings().record("import", time.perf_counter() - _IMPORT_STARTED)
+get_metrics_registry().gauge(
+    "app_startup_phase_seconds", "Duration of each startup phase.", ["phase"],
+    lambda: {(name,): seconds for name, seconds in get_startup_timings().phases.items()},
+)
+
 
 @app.get("/")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/startup")
+async def startup_timings():
+    """Startup breakdown in ms; phases that ran in parallel overlap."""
+    return get_startup_timings().as_dict()
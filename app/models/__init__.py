@@ -1,2 +1,4 @@
 from .prompt import Prompt
 from .message import Message
+from .session_stats import SessionStats
+from .behavior_report import BehaviorReport
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Text, Integer, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class BehaviorReport(Base):
+    """Stage-1 editor output memoized by a hash of its exact LLM input."""
+    __tablename__ = "behavior_reports"
+
+    digest = Column(Text, primary_key=True)
+    report = Column(Text, nullable=False)
+    hits = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -1,16 +1,28 @@
 import uuid
-from sqlalchemy import Column, Text, DateTime, ForeignKey
+from datetime import datetime, timezone
+from sqlalchemy import Column, Text, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Session-scoped history and keyset pagination
+        Index("ix_messages_session_id_created_at", "session_id", "created_at"),
+        # Recent assistant turns for the prompt editor
+        Index("ix_messages_role_created_at", "role", "created_at"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     session_id = Column(Text, nullable=False, index=True)
     role = Column(Text, nullable=False)  # 'user' or 'assistant'
     content = Column(Text, nullable=False)
     prompt_version_id = Column(UUID(as_uuid=True), ForeignKey("prompts.id"), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Client-side microsecond timestamp keeps (created_at, id) ordering stable for keyset paging
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, Text, Boolean, Integer, DateTime
+from sqlalchemy import Column, Text, Boolean, Integer, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -7,6 +7,10 @@ from app.core.database import Base
 
 class Prompt(Base):
     __tablename__ = "prompts"
+    __table_args__ = (
+        # Version numbers are allocated under a lock; this is the backstop
+        Index("uq_prompts_version", "version", unique=True),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     version = Column(Integer, nullable=False)
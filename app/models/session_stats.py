@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Text, Integer, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class SessionStats(Base):
+    __tablename__ = "session_stats"
+
+    session_id = Column(Text, primary_key=True)
+    user_message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    assistant_message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # user_message_count at the last autonomous editor trigger
+    last_editor_trigger_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_activity_at = Column(DateTime(timezone=True), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,2 +1,4 @@
-from .prompt_repo import PromptRepository
-from .message_repo import MessageRepository
+from .prompt_repo import PromptRepository, AsyncPromptRepository
+from .message_repo import MessageRepository, AsyncMessageRepository
+from .session_stats_repo import AsyncSessionStatsRepository
+from .behavior_report_repo import AsyncBehaviorReportRepository
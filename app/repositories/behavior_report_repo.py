@@ -0,0 +1,30 @@
+from typing import Optional
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.behavior_report import BehaviorReport
+from app.models.message import utcnow
+
+
+class AsyncBehaviorReportRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_report(self, digest: str) -> Optional[str]:
+        result = await self.db.execute(
+            update(BehaviorReport)
+            .where(BehaviorReport.digest == digest)
+            .values(hits=BehaviorReport.hits + 1, last_used_at=utcnow())
+            .returning(BehaviorReport.report)
+        )
+        report = result.scalar()
+        await self.db.commit()
+        return report
+
+    async def save_report(self, digest: str, report: str, max_entries: int):
+        await self.db.merge(BehaviorReport(digest=digest, report=report, last_used_at=utcnow()))
+        await self.db.flush()
+
+        # LRU eviction beyond max_entries
+        keep = select(BehaviorReport.digest).order_by(BehaviorReport.last_used_at.desc()).limit(max_entries)
+        await self.db.execute(delete(BehaviorReport).where(BehaviorReport.digest.not_in(keep)))
+        await self.db.commit()
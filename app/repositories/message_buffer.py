@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core import database
+from app.models.message import Message
+from app.repositories.session_stats_repo import AsyncSessionStatsRepository
+
+logger = logging.getLogger(__name__)
+
+
+class MessageWriteBuffer:
+    """Group commit for message inserts across concurrent chat turns.
+
+    Rows written within `max_delay_ms` of each other share one INSERT and one
+    commit. `write()` only returns once its rows are committed, so callers keep
+    read-your-writes semantics.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+        max_delay_ms: float = None,
+        max_batch: int = None,
+    ):
+        self.session_factory = session_factory or database.AsyncSessionLocal
+        self.max_delay = (settings.MESSAGE_WRITE_BUFFER_MAX_DELAY_MS if max_delay_ms is None else max_delay_ms) / 1000
+        self.max_batch = max_batch or settings.MESSAGE_WRITE_BUFFER_MAX_BATCH
+        self._pending: List[Tuple[List[Dict], asyncio.Future]] = []
+        self._pending_rows = 0
+        self._timer: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+
+        self.batches = 0
+        self.rows_written = 0
+
+    async def write(self, rows: List[Dict]):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((rows, future))
+        self._pending_rows += len(rows)
+
+        if self._pending_rows >= self.max_batch:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after_delay())
+
+        await future
+
+    async def close(self):
+        self._flush_now()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    def _flush_now(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending, self._pending_rows = self._pending, [], 0
+        task = asyncio.create_task(self._flush(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _flush_after_delay(self):
+        await asyncio.sleep(self.max_delay)
+        self._timer = None
+        self._flush_now()
+
+    async def _flush(self, batch: List[Tuple[List[Dict], asyncio.Future]]):
+        rows = [row for turn_rows, _ in batch for row in turn_rows]
+        try:
+            async with self.session_factory() as db:
+                await db.execute(insert(Message), rows)
+                await AsyncSessionStatsRepository(db).record_messages(rows)
+                await db.commit()
+            self.batches += 1
+            self.rows_written += len(rows)
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+        except Exception as e:
+            logger.error(f"Message write buffer flush failed ({len(rows)} rows): {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def stats(self) -> Dict:
+        return {
+            "batches": self.batches,
+            "rows_written": self.rows_written,
+            "avg_batch_rows": round(self.rows_written / self.batches, 2) if self.batches else 0.0,
+            "pending_rows": self._pending_rows,
+        }
+
+
+_message_write_buffer: Optional[MessageWriteBuffer] = None
+
+
+def get_message_write_buffer() -> Optional[MessageWriteBuffer]:
+    """Shared buffer when MESSAGE_WRITE_BUFFER is enabled, otherwise None."""
+    global _message_write_buffer
+    if not settings.MESSAGE_WRITE_BUFFER:
+        return None
+    if _message_write_buffer is None:
+        _message_write_buffer = MessageWriteBuffer()
+    return _message_write_buffer
@@ -1,6 +1,37 @@
-from typing import List
+import asyncio
+import uuid
+from typing import Dict, List, Optional
+from sqlalchemy import select, insert, delete, func, and_, or_
+from sqlalchemy.sql import Select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.models.message import Message
+from app.core.config import settings
+from app.models.message import Message, utcnow
+from app.repositories.session_stats_repo import AsyncSessionStatsRepository
+from app.db.partitions import truncate_closed_partitions
+
+
+def session_history_query(session_id: str, limit: int, anchor: Optional[Message] = None) -> Select:
+    # Newest first; served by ix_messages_session_id_created_at
+    stmt = select(Message).where(Message.session_id == session_id)
+    if anchor is not None:
+        # Keyset: strictly older than the anchor, id breaks created_at ties
+        stmt = stmt.where(or_(
+            Message.created_at < anchor.created_at,
+            and_(Message.created_at == anchor.created_at, Message.id < anchor.id)
+        ))
+    return stmt.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit)
+
+
+def delete_batch_query(batch_size: int, criteria: tuple = (), after: Optional[tuple] = None) -> Select:
+    # Next (created_at, id) keyset page of rows to delete; never rescans rows already removed
+    stmt = select(Message.id, Message.created_at).where(*criteria)
+    if after is not None:
+        stmt = stmt.where(or_(
+            Message.created_at > after[0],
+            and_(Message.created_at == after[0], Message.id > after[1])
+        ))
+    return stmt.order_by(Message.created_at, Message.id).limit(batch_size)
 
 
 class MessageRepository:
@@ -28,6 +59,111 @@ class MessageRepository:
     def get_last_n_messages(self, n: int) -> List[Message]:
         return self.db.query(Message).order_by(Message.created_at.desc()).limit(n).all()
 
+    def get_session_history(self, session_id: str, limit: int, before_id: Optional[uuid.UUID] = None) -> List[Message]:
+        anchor = None
+        if before_id is not None:
+            anchor = self.db.get(Message, before_id)
+            if anchor is None or anchor.session_id != session_id:
+                return []
+        return list(self.db.execute(session_history_query(session_id, limit, anchor)).scalars().all())
+
+    def delete_in_batches(self, *criteria, batch_size: Optional[int] = None) -> int:
+        """Delete matching rows in short keyset-ordered transactions instead of one long DELETE."""
+        batch_size = batch_size or settings.MESSAGE_DELETE_BATCH_SIZE
+        deleted, after = 0, None
+        while True:
+            rows = self.db.execute(delete_batch_query(batch_size, criteria, after)).all()
+            if not rows:
+                return deleted
+            self.db.execute(delete(Message).where(Message.id.in_([row.id for row in rows])))
+            self.db.commit()
+            deleted += len(rows)
+            after = (rows[-1].created_at, rows[-1].id)
+
     def clear_all_messages(self):
-        self.db.query(Message).delete()
-        self.db.commit()
+        self.delete_in_batches()
+
+
+class AsyncMessageRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.stats_repo = AsyncSessionStatsRepository(db)
+
+    async def create_message(self, session_id: str, role: str, content: str, prompt_version_id: str = None) -> Message:
+        db_msg = Message(
+            session_id=session_id,
+            role=role,
+            content=content,
+            prompt_version_id=prompt_version_id,
+            created_at=utcnow()
+        )
+        self.db.add(db_msg)
+        await self.stats_repo.record_messages([{"session_id": session_id, "role": role, "created_at": db_msg.created_at}])
+        await self.db.commit()
+        await self.db.refresh(db_msg)
+        return db_msg
+
+    async def create_messages(self, rows: List[Dict]) -> List[Message]:
+        """Insert several messages with one statement and one commit.
+
+        Server-side values come back through RETURNING, so no refresh round-trip.
+        """
+        result = await self.db.scalars(insert(Message).returning(Message), rows)
+        messages = list(result.all())
+        await self.stats_repo.record_messages(rows)
+        await self.db.commit()
+        return messages
+
+    async def count_user_messages(self, session_id: str) -> int:
+        result = await self.db.execute(
+            select(func.count()).select_from(Message).where(
+                Message.session_id == session_id,
+                Message.role == 'user'
+            )
+        )
+        return result.scalar_one()
+
+    async def get_last_n_messages(self, n: int) -> List[Message]:
+        result = await self.db.execute(select(Message).order_by(Message.created_at.desc()).limit(n))
+        return list(result.scalars().all())
+
+    async def get_recent_by_role(self, role: str, n: int) -> List[Message]:
+        result = await self.db.execute(
+            select(Message).where(Message.role == role).order_by(Message.created_at.desc()).limit(n)
+        )
+        return list(result.scalars().all())
+
+    async def get_session_history(self, session_id: str, limit: int, before_id: Optional[uuid.UUID] = None) -> List[Message]:
+        """Newest-first page of one session's messages, older than `before_id` if given."""
+        anchor = None
+        if before_id is not None:
+            anchor = await self.db.get(Message, before_id)
+            if anchor is None or anchor.session_id != session_id:
+                return []
+        result = await self.db.execute(session_history_query(session_id, limit, anchor))
+        return list(result.scalars().all())
+
+    async def delete_in_batches(self, *criteria, batch_size: Optional[int] = None) -> int:
+        """Delete matching rows in short keyset-ordered transactions instead of one long DELETE."""
+        batch_size = batch_size or settings.MESSAGE_DELETE_BATCH_SIZE
+        deleted, after = 0, None
+        while True:
+            result = await self.db.execute(delete_batch_query(batch_size, criteria, after))
+            rows = result.all()
+            if not rows:
+                return deleted
+            await self.db.execute(delete(Message).where(Message.id.in_([row.id for row in rows])))
+            # Commit per batch so row locks are held only briefly
+            await self.db.commit()
+            deleted += len(rows)
+            after = (rows[-1].created_at, rows[-1].id)
+            # Let concurrent chat turns run between batches
+            await asyncio.sleep(0)
+
+    async def clear_all_messages(self):
+        # Partitions that no longer receive inserts are truncated outright
+        await self.db.run_sync(lambda session: truncate_closed_partitions(session.connection()))
+        await self.db.commit()
+        await self.delete_in_batches()
+        await self.stats_repo.clear_all()
+        await self.db.commit()
@@ -1,8 +1,24 @@
+import uuid
 from typing import Optional, List
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, or_, select, text, update
 from app.models.prompt import Prompt
 
+# pg_advisory_xact_lock key serializing version allocation across processes
+PROMPT_VERSION_LOCK_KEY = 7_301_019
+
+
+def activation_update(prompt_id):
+    # One statement: only rows whose flag actually changes are touched
+    return (
+        update(Prompt)
+        .where(or_(Prompt.is_active == True, Prompt.id == prompt_id))
+        .values(is_active=(Prompt.id == prompt_id))
+        .execution_options(synchronize_session=False)
+    )
+
 
 class PromptRepository:
     def __init__(self, db: Session):
@@ -24,8 +40,7 @@ class PromptRepository:
         return db_prompt
 
     def activate_prompt(self, prompt_id: str):
-        self.db.query(Prompt).update({Prompt.is_active: False})
-        self.db.query(Prompt).filter(Prompt.id == prompt_id).update({Prompt.is_active: True})
+        self.db.execute(activation_update(prompt_id))
         self.db.commit()
 
     def get_latest_version(self) -> int:
@@ -34,3 +49,75 @@ class PromptRepository:
 
     def get_by_id(self, prompt_id: str) -> Optional[Prompt]:
         return self.db.query(Prompt).filter(Prompt.id == prompt_id).first()
+
+
+class AsyncPromptRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_active_prompt(self) -> Optional[Prompt]:
+        result = await self.db.execute(
+            select(Prompt).where(Prompt.is_active == True).order_by(Prompt.version.desc()).limit(1)
+        )
+        return result.scalars().first()
+
+    async def get_current_prompt_id(self) -> Optional[uuid.UUID]:
+        # Id of the prompt get_active_prompt (or its latest-version fallback) would return
+        result = await self.db.execute(
+            select(Prompt.id).order_by(Prompt.is_active.desc(), Prompt.version.desc()).limit(1)
+        )
+        return result.scalar()
+
+    async def get_latest_prompt(self) -> Optional[Prompt]:
+        result = await self.db.execute(select(Prompt).order_by(Prompt.version.desc()).limit(1))
+        return result.scalars().first()
+
+    async def create_prompt(self, version: int, content: str, is_active: bool, triggered_by: str = "manual") -> Prompt:
+        db_prompt = Prompt(
+            version=version,
+            content=content,
+            is_active=is_active,
+            triggered_by=triggered_by
+        )
+        self.db.add(db_prompt)
+        await self.db.commit()
+        await self.db.refresh(db_prompt)
+        return db_prompt
+
+    async def create_next_version(
+        self, content: str, triggered_by: str = "manual", activate: bool = True, attempts: int = 3
+    ) -> Prompt:
+        """Insert a prompt as MAX(version) + 1 (and optionally activate it) in one transaction."""
+        for attempt in range(attempts):
+            try:
+                # Postgres: serialize allocators; the lock is released on commit/rollback
+                if self.db.get_bind().dialect.name == "postgresql":
+                    await self.db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PROMPT_VERSION_LOCK_KEY})
+
+                version = await self.get_latest_version() + 1
+                db_prompt = Prompt(version=version, content=content, is_active=False, triggered_by=triggered_by)
+                self.db.add(db_prompt)
+                await self.db.flush()
+                if activate:
+                    await self.db.execute(activation_update(db_prompt.id))
+                await self.db.commit()
+                await self.db.refresh(db_prompt)
+                return db_prompt
+            except IntegrityError:
+                # Lost a race on uq_prompts_version (no advisory lock on this backend)
+                await self.db.rollback()
+                if attempt == attempts - 1:
+                    raise
+
+    async def activate_prompt(self, prompt_id: str):
+        await self.db.execute(activation_update(prompt_id))
+        await self.db.commit()
+
+    async def get_latest_version(self) -> int:
+        result = await self.db.execute(select(func.max(Prompt.version)))
+        latest = result.scalar()
+        return latest if latest is not None else 0
+
+    async def get_by_id(self, prompt_id: str) -> Optional[Prompt]:
+        result = await self.db.execute(select(Prompt).where(Prompt.id == prompt_id))
+        return result.scalars().first()
@@ -0,0 +1,114 @@
+from collections import defaultdict
+from typing import Dict, List, Optional
+from sqlalchemy import delete, insert, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.message import utcnow
+from app.models.session_stats import SessionStats
+
+
+_UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _settled_trigger(user_count, every: int):
+    # Highest multiple of `every` reached: that many turns count as already seen by the editor
+    return user_count - user_count % every
+
+
+def _seed_then_bump(session_id: str, delta: Dict, trigger_every: Optional[int] = None) -> List:
+    """Portable fallback for dialects without ON CONFLICT: add a zero row if missing, then increment it."""
+    seed = insert(SessionStats).from_select(
+        ["session_id", "user_message_count", "assistant_message_count", "last_editor_trigger_count", "last_activity_at"],
+        select(
+            literal(session_id, SessionStats.session_id.type),
+            literal(0), literal(0), literal(0),
+            literal(delta["at"], SessionStats.last_activity_at.type),
+        ).where(~select(SessionStats.session_id).where(SessionStats.session_id == session_id).exists()),
+    )
+    values = {
+        "user_message_count": SessionStats.user_message_count + delta["user"],
+        "assistant_message_count": SessionStats.assistant_message_count + delta["assistant"],
+        "last_activity_at": delta["at"],
+    }
+    if trigger_every:
+        values["last_editor_trigger_count"] = _settled_trigger(values["user_message_count"], trigger_every)
+    bump = update(SessionStats).where(SessionStats.session_id == session_id).values(values)
+    return [seed, bump]
+
+
+def record_messages_statements(dialect_name: str, rows: List[Dict], trigger_every: Optional[int] = None) -> List:
+    """One counter upsert per session touched by `rows` (freshly inserted message rows).
+
+    With `trigger_every` (bulk imports), the editor trigger is settled at the
+    user-message count so imported history does not fire the editor.
+    """
+    deltas = defaultdict(lambda: {"user": 0, "assistant": 0, "at": None})
+    for row in rows:
+        delta = deltas[row["session_id"]]
+        if row.get("role") in ("user", "assistant"):
+            delta[row["role"]] += 1
+        at = row.get("created_at") or utcnow()
+        delta["at"] = at if delta["at"] is None else max(delta["at"], at)
+
+    upsert = _UPSERTS.get(dialect_name)
+    statements = []
+    for session_id, delta in deltas.items():
+        if upsert is None:
+            statements.extend(_seed_then_bump(session_id, delta, trigger_every))
+            continue
+        stmt = upsert(SessionStats).values(
+            session_id=session_id,
+            user_message_count=delta["user"],
+            assistant_message_count=delta["assistant"],
+            last_editor_trigger_count=_settled_trigger(delta["user"], trigger_every) if trigger_every else 0,
+            last_activity_at=delta["at"],
+        )
+        set_ = {
+            "user_message_count": SessionStats.user_message_count + delta["user"],
+            "assistant_message_count": SessionStats.assistant_message_count + delta["assistant"],
+            "last_activity_at": delta["at"],
+        }
+        if trigger_every:
+            set_["last_editor_trigger_count"] = _settled_trigger(set_["user_message_count"], trigger_every)
+        statements.append(stmt.on_conflict_do_update(index_elements=[SessionStats.session_id], set_=set_))
+    return statements
+
+
+class AsyncSessionStatsRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def record_messages(self, rows: List[Dict]):
+        """Bump per-session counters for freshly inserted message rows.
+
+        Runs inside the caller's transaction so counters commit with the messages.
+        """
+        for stmt in record_messages_statements(self.db.get_bind().dialect.name, rows):
+            await self.db.execute(stmt)
+
+    async def claim_editor_trigger(self, session_id: str, every: int) -> bool:
+        """Atomically claim the editor trigger when a new multiple of `every` was reached."""
+        reached = SessionStats.user_message_count - (SessionStats.user_message_count % every)
+        result = await self.db.execute(
+            update(SessionStats)
+            .where(
+                SessionStats.session_id == session_id,
+                SessionStats.user_message_count > 0,
+                reached > SessionStats.last_editor_trigger_count,
+            )
+            .values(last_editor_trigger_count=reached)
+        )
+        await self.db.commit()
+        return result.rowcount == 1
+
+    async def get(self, session_id: str) -> Optional[SessionStats]:
+        return await self.db.get(SessionStats, session_id)
+
+    async def list_sessions(self, limit: int) -> List[SessionStats]:
+        result = await self.db.execute(
+            select(SessionStats).order_by(SessionStats.last_activity_at.desc()).limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def clear_all(self):
+        await self.db.execute(delete(SessionStats))
@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+from pydantic import BaseModel, ConfigDict
+
+
+class MessageOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    role: str
+    content: str
+    prompt_version_id: Optional[UUID] = None
+    created_at: Optional[datetime] = None
+
+
+class SessionMessagesResponse(BaseModel):
+    session_id: str
+    messages: List[MessageOut]
+    next_before: Optional[UUID] = None
+
+
+class SessionStatsOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    session_id: str
+    user_message_count: int
+    assistant_message_count: int
+    last_editor_trigger_count: int
+    last_activity_at: Optional[datetime] = None
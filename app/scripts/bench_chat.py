@@ -0,0 +1,274 @@
+"""End-to-end benchmark for the non-LLM overhead of /chat, /edit and /activate.
+
+Runs the real app in-process (ASGI transport, full lifespan) against SQLite
+or a local Postgres, with the LLM replaced by the seeded FakeLLMProvider, so
+it needs no network. Per-stage timings come from the Server-Timing header.
+
+    python -m app.scripts.bench_chat --requests 500 --concurrency 16
+    python -m app.scripts.bench_chat --save-baseline app/data/bench/baseline.json
+    python -m app.scripts.bench_chat --compare app/data/bench/baseline.json --fail-on-regression
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+# Add project root to sys.path to resolve app.* imports
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+ERROR_REPLY = "The system encountered an error. Please try again."
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        op, _, weight = part.partition("=")
+        if op not in ("chat", "edit", "activate"):
+            raise ValueError(f"Unknown operation '{op}' in --mix.")
+        weights[op] = float(weight or 1)
+    return weights
+
+
+def configure_environment(args):
+    # Settings are read at import time, so this must run before importing app.*
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        db_path = Path(tempfile.mkdtemp(prefix="bench_chat_")) / "bench.db"
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("GROQ_API_KEY", "offline")
+    os.environ.setdefault("EDITOR_GROQ_API_KEY", "offline")
+    os.environ.update({
+        "LLM_PROVIDER": "fake",
+        "SERVER_TIMING_ENABLED": "true",
+        "FAKE_LLM_LATENCY_MS": str(args.latency_ms),
+        "FAKE_LLM_LATENCY_DISTRIBUTION": args.distribution,
+        "FAKE_LLM_LATENCY_JITTER": str(args.jitter),
+        "FAKE_LLM_TOKENS_PER_SECOND": str(args.tokens_per_second),
+        "FAKE_LLM_ERROR_RATE": str(args.error_rate),
+        "FAKE_LLM_SEED": str(args.seed),
+    })
+
+
+class OpStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.stages: Dict[str, List[float]] = {}
+
+    def record(self, latency_ms: float, ok: bool, stages: Dict[str, float]):
+        self.latencies.append(latency_ms)
+        if not ok:
+            self.errors += 1
+        for name, duration in stages.items():
+            self.stages.setdefault(name, []).append(duration)
+
+    def summary(self, elapsed: float) -> Dict:
+        return {
+            "count": len(self.latencies),
+            "errors": self.errors,
+            "throughput_rps": round(len(self.latencies) / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(self.latencies) / len(self.latencies), 2) if self.latencies else 0.0,
+            "p50_ms": round(percentile(self.latencies, 50), 2),
+            "p95_ms": round(percentile(self.latencies, 95), 2),
+            "p99_ms": round(percentile(self.latencies, 99), 2),
+            "stages": {
+                name: {
+                    "mean_ms": round(sum(values) / len(values), 2),
+                    "p95_ms": round(percentile(values, 95), 2),
+                }
+                for name, values in sorted(self.stages.items())
+            },
+        }
+
+
+async def list_prompt_ids() -> List[str]:
+    from sqlalchemy import select
+    from app.core.database import AsyncSessionLocal
+    from app.models.prompt import Prompt
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Prompt.id).order_by(Prompt.version))
+        return [str(prompt_id) for prompt_id in result.scalars().all()]
+
+
+async def run_benchmark(args) -> Dict:
+    import httpx
+    from app.core.timing import parse_server_timing
+    from app.core.database import engine
+    from app.db.schema import ensure_schema
+    from app.db.seed import seed
+    from app.main import app
+
+    ensure_schema(engine)
+    seed()
+    rng = random.Random(args.seed)
+    weights = parse_mix(args.mix)
+    ops = rng.choices(list(weights), weights=list(weights.values()), k=args.requests)
+    sessions = [f"bench-{i}" for i in range(args.sessions)]
+    plan = [(op, rng.choice(sessions), i) for i, op in enumerate(ops)]
+
+    stats: Dict[str, OpStats] = {op: OpStats() for op in weights}
+    stats["all"] = OpStats()
+
+    async with app.router.lifespan_context(app):
+        prompt_ids = await list_prompt_ids()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+            async def send(op: str, session_id: str, i: int) -> httpx.Response:
+                if op == "chat":
+                    return await client.post("/chat", json={"session_id": session_id, "message": f"Question {i}"})
+                if op == "edit":
+                    return await client.post("/edit")
+                return await client.post(f"/activate/{prompt_ids[i % len(prompt_ids)]}")
+
+            async def worker(queue: asyncio.Queue):
+                while True:
+                    try:
+                        op, session_id, i = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    started = time.perf_counter()
+                    try:
+                        response = await send(op, session_id, i)
+                        latency_ms = (time.perf_counter() - started) * 1000
+                        ok = response.status_code < 400 and not (
+                            op == "chat" and response.json().get("reply") == ERROR_REPLY
+                        )
+                        stages = parse_server_timing(response.headers.get("server-timing", ""))
+                    except Exception:
+                        latency_ms, ok, stages = (time.perf_counter() - started) * 1000, False, {}
+                    stats[op].record(latency_ms, ok, stages)
+                    stats["all"].record(latency_ms, ok, {})
+
+            # Warm up connections, caches and the corpus before measuring
+            for i in range(min(args.warmup, len(sessions))):
+                await send("chat", sessions[i], -1)
+
+            queue: asyncio.Queue = asyncio.Queue()
+            for item in plan:
+                queue.put_nowait(item)
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(queue) for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+
+    return {
+        "label": args.label,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "sessions": args.sessions,
+            "mix": args.mix,
+            "latency_ms": args.latency_ms,
+            "distribution": args.distribution,
+            "jitter": args.jitter,
+            "tokens_per_second": args.tokens_per_second,
+            "error_rate": args.error_rate,
+            "seed": args.seed,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "results": {op: op_stats.summary(elapsed) for op, op_stats in stats.items() if op_stats.latencies},
+    }
+
+
+def print_report(report: Dict):
+    print(f"\n--- Benchmark '{report['label']}' ({report['config']['database']}, "
+          f"{report['config']['requests']} requests @ {report['config']['concurrency']}) ---")
+    print(f"{'op':<10}{'count':>7}{'err':>5}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for op, result in report["results"].items():
+        print(f"{op:<10}{result['count']:>7}{result['errors']:>5}{result['throughput_rps']:>9.1f}"
+              f"{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}")
+        for name, timing in result["stages"].items():
+            print(f"  {name:<16}mean {timing['mean_ms']:>8.2f} ms   p95 {timing['p95_ms']:>8.2f} ms")
+
+
+def compare_reports(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Print per-op/per-stage deltas; return the metrics that regressed beyond `threshold` percent."""
+    regressions = []
+
+    def delta(name: str, old: float, new: float, higher_is_worse: bool = True):
+        change = ((new - old) / old * 100.0) if old else 0.0
+        worse = change > threshold if higher_is_worse else change < -threshold
+        flag = "  REGRESSION" if worse else ""
+        print(f"  {name:<28}{old:>10.2f} -> {new:>10.2f}  ({change:+.1f}%){flag}")
+        if worse:
+            regressions.append(name)
+
+    print(f"\n--- Compared with '{baseline['label']}' ({baseline['created_at']}) ---")
+    for op, result in current["results"].items():
+        old = baseline["results"].get(op)
+        if not old:
+            continue
+        print(op)
+        delta(f"{op}.throughput_rps", old["throughput_rps"], result["throughput_rps"], higher_is_worse=False)
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            delta(f"{op}.{metric}", old[metric], result[metric])
+        for name, timing in result["stages"].items():
+            if name in old["stages"]:
+                delta(f"{op}.{name}.mean_ms", old["stages"][name]["mean_ms"], timing["mean_ms"])
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline /chat, /edit and /activate benchmark.")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--mix", default="chat=90,edit=2,activate=8", help="Weighted operation mix.")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--database-url", help="Defaults to a fresh SQLite file; pass a local Postgres URL to bench it.")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Fake LLM median latency.")
+    parser.add_argument("--distribution", default="lognormal", choices=["fixed", "uniform", "lognormal"])
+    parser.add_argument("--jitter", type=float, default=0.25)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="0 = reply arrives at once.")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="current")
+    parser.add_argument("--save-baseline", help="Write the report as JSON to this path.")
+    parser.add_argument("--compare", help="Baseline JSON to diff against.")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent.")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+
+    if args.save_baseline:
+        Path(args.save_baseline).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, args.threshold)
+        if regressions and args.fail_on_regression:
+            print(f"\n{len(regressions)} metric(s) regressed beyond {args.threshold}%.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Cold-start benchmark: import, lifespan phases and the first /chat, each in a fresh process.
+
+Every run starts a new interpreter, so nothing is cached between runs. The
+LLM is the offline FakeLLMProvider unless --real-llm is passed.
+
+    python -m app.scripts.bench_startup --runs 5
+    python -m app.scripts.bench_startup --database-url postgresql://... --real-llm
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+# Add project root to sys.path to resolve app.* imports
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from app.scripts.bench_chat import percentile
+
+# Runs inside the child interpreter; prints one JSON line of timings in ms
+CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+from app.main import app
+from app.core.timing import get_startup_timings
+import httpx
+
+async def main():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            request_started = time.perf_counter()
+            await client.post("/chat", json={"session_id": "startup-bench", "message": "Hello"})
+            first_request = time.perf_counter() - request_started
+    timings = get_startup_timings().as_dict()
+    timings["ready"] = round((ready - started) * 1000, 2)
+    timings["first_chat"] = round(first_request * 1000, 2)
+    print("BENCH " + json.dumps(timings))
+
+asyncio.run(main())
+"""
+
+
+def run_once(env: Dict[str, str]) -> Dict[str, float]:
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD], env=env, cwd=str(project_root), capture_output=True, text=True
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("BENCH "):
+            return json.loads(line[len("BENCH "):])
+    raise RuntimeError(f"Startup run failed:\n{result.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database-url", help="Defaults to a fresh SQLite file.")
+    parser.add_argument("--real-llm", action="store_true", help="Warm and call the configured provider.")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(project_root)
+    if args.database_url:
+        env["DATABASE_URL"] = args.database_url
+    else:
+        env["DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp(prefix='bench_startup_')) / 'bench.db'}"
+    if not args.real_llm:
+        env.update({"LLM_PROVIDER": "fake", "GROQ_API_KEY": env.get("GROQ_API_KEY", "offline")})
+        env.setdefault("EDITOR_GROQ_API_KEY", "offline")
+
+    # Schema and seed belong to the release step, not to the measured start
+    subprocess.run([sys.executable, "-m", "app.scripts.migrate"], env=env, cwd=str(project_root), check=True,
+                   capture_output=True)
+    subprocess.run([sys.executable, "-m", "app.db.seed"], env=env, cwd=str(project_root), check=True,
+                   capture_output=True)
+
+    runs: List[Dict[str, float]] = [run_once(env) for _ in range(args.runs)]
+    phases = list(dict.fromkeys(name for run in runs for name in run))
+    print(f"\n--- Cold start ({args.runs} runs, {env['DATABASE_URL'].split(':', 1)[0]}) ---")
+    print(f"{'phase':<14}{'p50':>10}{'max':>10}")
+    for name in phases:
+        values = [run[name] for run in runs if name in run]
+        print(f"{name:<14}{percentile(values, 50):>10.1f}{max(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
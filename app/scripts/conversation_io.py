@@ -0,0 +1,78 @@
+"""Move conversations between the messages table and the eval corpus as NDJSON.
+
+    python -m app.scripts.conversation_io export --since 2026-01-01 --out live.ndjson
+    python -m app.scripts.conversation_io export --prompt-version-id <uuid> > v7.ndjson
+    python -m app.scripts.conversation_io import live.ndjson
+
+Exports stream through a server-side cursor and imports load in fixed-size
+batches, so memory stays flat regardless of volume. The output can be used
+directly as CONVERSATION_CORPUS_PATH or `run_offline_eval --conversations`.
+"""
+import argparse
+import json
+import logging
+import sys
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to sys.path to resolve app.* imports
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from app.core.config import settings
+from app.core.database import engine
+from app.services.conversation_io import ConversationImporter, ExportFilter, export_ndjson, read_conversations
+
+logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NDJSON export/import of conversations.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Stream sessions from messages as NDJSON.")
+    export.add_argument("--out", help="Output file (default: stdout).")
+    export.add_argument("--since", type=datetime.fromisoformat, help="ISO date/time, inclusive.")
+    export.add_argument("--until", type=datetime.fromisoformat, help="ISO date/time, exclusive.")
+    export.add_argument("--session-id", action="append", default=[], help="Repeatable.")
+    export.add_argument("--prompt-version-id", type=uuid.UUID)
+    export.add_argument("--batch-size", type=int, default=settings.CONVERSATION_IO_BATCH_SIZE)
+
+    load = sub.add_parser("import", help="Bulk-load NDJSON conversations into messages.")
+    load.add_argument("path", help="NDJSON file, or - for stdin.")
+    load.add_argument("--batch-size", type=int, default=settings.CONVERSATION_IO_BATCH_SIZE)
+    load.add_argument("--include-existing", action="store_true",
+                      help="Also append to sessions that already have messages (re-importing duplicates them).")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        filters = ExportFilter(
+            since=args.since,
+            until=args.until,
+            session_ids=args.session_id,
+            prompt_version_id=args.prompt_version_id,
+        )
+        out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+        try:
+            sessions = export_ndjson(engine, out, filters, batch_size=args.batch_size)
+        finally:
+            if args.out:
+                out.close()
+        logger.info(f"Exported {sessions} sessions.")
+    elif args.command == "import":
+        source = sys.stdin if args.path == "-" else open(args.path, "r", encoding="utf-8")
+        try:
+            summary = ConversationImporter(
+                engine, batch_size=args.batch_size, include_existing=args.include_existing
+            ).run(read_conversations(source))
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        print(json.dumps(summary), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add project root to sys.path to resolve app.* imports
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from app.core.config import settings
+from app.core.database import engine
+from app.db.partitions import convert_messages_to_partitioned, ensure_month_partitions, list_month_partitions
+from app.services.message_archive import MessageArchiver
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Message partitioning and retention.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("partition", help="One-off: convert messages to monthly partitions (Postgres, maintenance window).")
+    sub.add_parser("ensure-partitions", help="Create partitions for the coming months.")
+    sub.add_parser("list-partitions", help="Show monthly partitions.")
+
+    archive = sub.add_parser("archive", help="Archive expired messages to gzipped NDJSON and remove them.")
+    archive.add_argument("--older-than-days", type=int, default=settings.MESSAGE_RETENTION_DAYS)
+    archive.add_argument("--archive-dir", default=settings.MESSAGE_ARCHIVE_DIR)
+    archive.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "partition":
+        moved = convert_messages_to_partitioned(engine, settings.MESSAGE_PARTITION_MONTHS_AHEAD)
+        logger.info(f"messages is partitioned by month ({moved} rows moved).")
+    elif args.command == "ensure-partitions":
+        with engine.begin() as conn:
+            ensure_month_partitions(conn, settings.MESSAGE_PARTITION_MONTHS_AHEAD)
+    elif args.command == "list-partitions":
+        with engine.connect() as conn:
+            for name, lower, upper in list_month_partitions(conn):
+                print(f"{name}\t{lower:%Y-%m-%d}\t{upper:%Y-%m-%d}")
+    elif args.command == "archive":
+        summary = MessageArchiver(engine, archive_dir=args.archive_dir).archive(
+            older_than_days=args.older_than_days, dry_run=args.dry_run
+        )
+        print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""Apply schema changes: missing tables and indexes, version renumbering, partitions.
+
+Runs once per deploy (Procfile `release`) instead of on every app import:
+
+    python -m app.scripts.migrate
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add project root to sys.path to resolve app.* imports
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from app.core.database import engine
+from app.db.schema import ensure_schema
+
+
+def main():
+    started = time.perf_counter()
+    ensure_schema(engine)
+    print(f"Schema up to date ({(time.perf_counter() - started) * 1000:.0f} ms).")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,160 @@
-import json
+import argparse
 import logging
 import asyncio
+import os
 import sys
+import time
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
+from app.core.database import AsyncSessionLocal, SessionLocal
 from app.services.evaluator import EvaluatorService
 from app.services.prompt_editor import PromptEditorService
-from app.services.groq_provider import LLMClient
-from app.repositories.prompt_repo import PromptRepository
+from app.services.llm_router import build_llm_provider
+from app.services.llm_lanes import EDITOR_LANE, EVAL_LANE
+from app.repositories.prompt_repo import AsyncPromptRepository, PromptRepository
+from app.services.eval_runner import EvalItem, EvalRunner, build_eval_items
+from app.services.reply_scorer import ReplyScorer, borderline_mask
+from app.services.conversation_io import load_conversation_file
+from app.core.config import settings
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
 
-def load_conversations(file_path: str = "app/data/conversations.json"):
+def load_conversations(file_path: str = None):
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return load_conversation_file(file_path or settings.CONVERSATION_CORPUS_PATH)
     except Exception as e:
         logger.error(f"Failed to load conversations: {e}")
         return []
 
-async def run_evaluation(db: Session, conversations: list, prompt_override=None):
-    provider = LLMClient()
+CHECKPOINT_DIR = "app/data/eval_checkpoints"
+
+def judge_checkpoint_path(checkpoint_path: str = None):
+    if not checkpoint_path:
+        return None
+    root, ext = os.path.splitext(checkpoint_path)
+    return f"{root}.judge{ext}"
+
+async def score_results(evaluator: EvaluatorService, results: list, concurrency: int, max_concurrency: int,
+                        checkpoint_path: str = None, judge_borderline: bool = True):
+    """Local similarity for every turn in one batch; the LLM judge re-scores only the borderline band."""
+    started = time.perf_counter()
+    scores = ReplyScorer().score_pairs(
+        [r["predicted_reply"] for r in results], [r["real_reply"] for r in results]
+    )
+    for result, score in zip(results, scores):
+        result["similarity"] = round(float(score), 4)
+        result["score"] = result["similarity"]
+        result["score_source"] = "local"
+    logger.info(f"Scored {len(results)} turns locally in {(time.perf_counter() - started) * 1000:.0f} ms.")
+
+    borderline = [r for r, flag in zip(results, borderline_mask(scores)) if flag]
+    if judge_borderline and borderline:
+        logger.info(f"Judging {len(borderline)} borderline turns with the LLM...")
+        await judge_results(evaluator, borderline, concurrency, max_concurrency, checkpoint_path)
+
+async def judge_results(evaluator: EvaluatorService, results: list, concurrency: int, max_concurrency: int,
+                        checkpoint_path: str = None):
+    """LLM judge pass over already generated replies; updates `results` in place."""
+    by_key = {r["key"]: r for r in results}
+
+    async def judge(item):
+        predicted = by_key[item.key]["predicted_reply"]
+        return {"reply": predicted, "score": await evaluator.judge(item.user_message, predicted, item.real_reply)}
+
+    runner = EvalRunner(
+        judge,
+        concurrency=concurrency,
+        max_concurrency=max_concurrency,
+        checkpoint_path=judge_checkpoint_path(checkpoint_path)
+    )
+    judged = await runner.run([
+        EvalItem(key=r["key"], contact_id=r["contact_id"], user_message=r["user_message"],
+                 real_reply=r["real_reply"], context="")
+        for r in results
+    ])
+    for verdict in judged:
+        by_key[verdict["key"]]["score"] = verdict["score"]
+        by_key[verdict["key"]]["score_source"] = "llm"
+
+async def run_evaluation(db: Session, conversations: list, prompt_override=None, concurrency: int = 4,
+                         max_concurrency: int = 16, checkpoint_path: str = None, scorer: str = None,
+                         judge_borderline: bool = None):
+    provider = build_llm_provider(EVAL_LANE)
     evaluator = EvaluatorService(db, provider)
-    
-    all_results = []
-    logger.info("Starting manual evaluation...")
-
-    for conv in conversations:
-        contact_id = conv.get("contact_id")
-        messages = conv.get("conversation", [])
-        messages.sort(key=lambda x: x.get("message_id", 0))
-        
-        history = []
-        for i, msg in enumerate(messages):
-            direction = msg.get("direction")
-            text = msg.get("text")
-            
-            if direction == "in":
-                real_reply = None
-                for j in range(i + 1, len(messages)):
-                    if messages[j].get("direction") == "out":
-                        real_reply = messages[j].get("text")
-                        break
-                
-                if real_reply:
-                    res = await evaluator.evaluate_message(
-                        user_message=text,
-                        real_reply=real_reply,
-                        context="\n".join(history),
-                        prompt_override=prompt_override
-                    )
-                    all_results.append({
-                        "user_message": text,
-                        "predicted_reply": res["reply"],
-                        "real_reply": real_reply,
-                        "score": res["score"]
-                    })
-                history.append(f"User: {text}")
-            else:
-                history.append(f"AI: {text}")
+    scorer = scorer or settings.EVAL_SCORER
+    judge_borderline = settings.EVAL_JUDGE_BORDERLINE if judge_borderline is None else judge_borderline
+
+    items = build_eval_items(conversations)
+    logger.info(f"Starting evaluation of {len(items)} turns (concurrency {concurrency}, {scorer} scoring)...")
+
+    async def evaluate(item):
+        if scorer == "llm":
+            return await evaluator.evaluate_message(
+                user_message=item.user_message,
+                real_reply=item.real_reply,
+                context=item.context,
+                prompt_override=prompt_override
+            )
+        # Generation only; scoring happens in one local batch afterwards
+        reply = await evaluator.generate_reply(item.user_message, context=item.context, prompt_override=prompt_override)
+        return {"reply": reply, "score": None}
+
+    runner = EvalRunner(
+        evaluate,
+        concurrency=concurrency,
+        max_concurrency=max_concurrency,
+        checkpoint_path=checkpoint_path
+    )
+    all_results = await runner.run(items)
 
     if not all_results:
         return 0.0, []
 
+    if scorer != "llm":
+        await score_results(evaluator, all_results, concurrency, max_concurrency,
+                            checkpoint_path=checkpoint_path, judge_borderline=judge_borderline)
+    else:
+        # Turns checkpointed by a local-scoring run have replies but no judge score yet
+        unscored = [r for r in all_results if r["score"] is None]
+        if unscored:
+            await judge_results(evaluator, unscored, concurrency, max_concurrency, checkpoint_path)
+        # Failed judge calls are dropped, as failed evaluations are
+        all_results = [r for r in all_results if r["score"] is not None]
+        if not all_results:
+            return 0.0, []
+
     avg_score = sum(r["score"] for r in all_results) / len(all_results)
     return avg_score, all_results
 
+def is_weak(result: dict) -> bool:
+    # Judge and similarity scores sit on different scales: compare each against its own cut-off
+    if result.get("score_source", "llm") == "llm":
+        return result["score"] < settings.EVAL_WEAK_SCORE
+    return result["score"] < settings.EVAL_JUDGE_BAND_HIGH
+
+def checkpoint_path_for(prompt, fresh: bool = False) -> str:
+    path = os.path.join(CHECKPOINT_DIR, f"{prompt.id}.jsonl")
+    if fresh:
+        for stale in (path, judge_checkpoint_path(path)):
+            if os.path.exists(stale):
+                os.remove(stale)
+    return path
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay conversations.json against the active prompt.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Initial number of concurrent evaluations.")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="Upper bound for adaptive concurrency.")
+    parser.add_argument("--fresh", action="store_true", help="Discard existing checkpoints and start over.")
+    parser.add_argument("--conversations", help="Corpus file (JSON array or NDJSON export).")
+    parser.add_argument("--scorer", choices=["local", "llm"], default=settings.EVAL_SCORER,
+                        help="local: TF-IDF similarity (+ LLM judge for borderline turns); llm: judge every turn.")
+    parser.add_argument("--no-judge", action="store_true", help="Local scores only, no LLM second pass.")
+    return parser.parse_args()
+
 async def main():
-    conversations = load_conversations()
+    args = parse_args()
+    conversations = load_conversations(args.conversations)
     if not conversations:
         return
 
@@ -83,7 +168,14 @@ async def main():
 
         # 1. Evaluate Current Prompt
         logger.info(f"Evaluating Active Prompt V{active_prompt.version}...")
-        avg_score, results = await run_evaluation(db, conversations)
+        avg_score, results = await run_evaluation(
+            db, conversations,
+            concurrency=args.concurrency,
+            max_concurrency=args.max_concurrency,
+            checkpoint_path=checkpoint_path_for(active_prompt, fresh=args.fresh),
+            scorer=args.scorer,
+            judge_borderline=not args.no_judge
+        )
         logger.info(f"Average Score: {avg_score:.2f}")
 
         # 2. Ask for manual evolution
@@ -92,45 +184,47 @@ async def main():
         
         evolve = input("Would you like to trigger prompt evolution based on weak examples? (y/n): ")
         if evolve.lower() == 'y':
-            weak_examples = [r for r in results if r["score"] < 0.7]
+            weak_examples = [r for r in results if is_weak(r)]
             if not weak_examples:
-                print("No weak examples found (all scores >= 0.7). Skipping evolution.")
+                print("No weak examples found. Skipping evolution.")
                 return
 
             logger.info("Triggering prompt rewrite...")
-            provider = LLMClient()
-            editor = PromptEditorService(db, provider)
-            
-            # Send sample of weak examples
-            new_prompt_data = await editor.rewrite_prompt(active_prompt.content, weak_examples[:3])
-            new_content = new_prompt_data["updated_prompt"]
-            logger.info(f"Proposed Changes Reasoning: {new_prompt_data['reasoning']}")
-            
-            # 3. Create Draft
-            latest_v = prompt_repo.get_latest_version()
-            new_v = latest_v + 1
-            draft = prompt_repo.create_prompt(
-                version=new_v, 
-                content=new_content, 
-                is_active=False,
-                parent_version_id=active_prompt.id
-            )
-            logger.info(f"Created Draft V{new_v}.")
-
-            # 4. Sandbox Evaluation
-            logger.info(f"Running sandbox evaluation for V{new_v}...")
-            new_score, _ = await run_evaluation(db, conversations, prompt_override=draft)
-            logger.info(f"New Score: {new_score:.2f} (Old: {avg_score:.2f})")
-
-            if new_score > avg_score:
-                activate = input(f"New score is better. Activate V{new_v} now? (y/n): ")
-                if activate.lower() == 'y':
-                    prompt_repo.activate_prompt(draft.id)
-                    logger.info("Activated new version.")
+            async with AsyncSessionLocal() as async_db:
+                editor = PromptEditorService(async_db, build_llm_provider(EDITOR_LANE))
+                async_repo = AsyncPromptRepository(async_db)
+
+                # Send sample of weak examples
+                new_content = await editor.rewrite_from_examples(active_prompt.content, weak_examples[:3])
+
+                # 3. Create Draft
+                draft = await async_repo.create_next_version(
+                    content=new_content, triggered_by="offline_eval", activate=False
+                )
+                logger.info(f"Created Draft V{draft.version}.")
+
+                # 4. Sandbox Evaluation
+                logger.info(f"Running sandbox evaluation for V{draft.version}...")
+                new_score, _ = await run_evaluation(
+                    db, conversations,
+                    prompt_override=draft,
+                    concurrency=args.concurrency,
+                    max_concurrency=args.max_concurrency,
+                    checkpoint_path=checkpoint_path_for(draft, fresh=args.fresh),
+                    scorer=args.scorer,
+                    judge_borderline=not args.no_judge
+                )
+                logger.info(f"New Score: {new_score:.2f} (Old: {avg_score:.2f})")
+
+                if new_score > avg_score:
+                    activate = input(f"New score is better. Activate V{draft.version} now? (y/n): ")
+                    if activate.lower() == 'y':
+                        await async_repo.activate_prompt(draft.id)
+                        logger.info("Activated new version.")
+                    else:
+                        logger.info("Activation skipped.")
                 else:
-                    logger.info("Activation skipped.")
-            else:
-                logger.info("New version did not improve performance. Kept as draft.")
+                    logger.info("New version did not improve performance. Kept as draft.")
 
     finally:
         db.close()
@@ -0,0 +1,153 @@
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Total context window (input + output) per Groq model
+MODEL_CONTEXT_WINDOWS = {
+    "llama-3.1-8b-instant": 131072,
+    "llama-3.3-70b-versatile": 131072,
+    "llama3-8b-8192": 8192,
+    "llama3-70b-8192": 8192,
+    "gemma2-9b-it": 8192,
+    "mixtral-8x7b-32768": 32768,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Chat-format framing tokens added per message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast offline token estimate for BPE tokenizers (no vocab needed).
+
+    Takes the larger of ~4 chars/token and one token per word/punctuation run,
+    which tracks Llama tokenizers closely for English and errs high elsewhere.
+    """
+    if not text:
+        return 0
+    return max(math.ceil(len(text) / 4), len(_PIECE_RE.findall(text)))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, keep: str = "tail") -> str:
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    # Shrink proportionally until the estimate fits
+    length = len(text)
+    while length > 0:
+        candidate = text[-length:] if keep == "tail" else text[:length]
+        tokens = estimate_tokens(candidate)
+        if tokens <= max_tokens:
+            return candidate
+        length = min(length - 1, int(length * max_tokens / tokens * 0.95))
+    return ""
+
+
+@dataclass
+class BuiltContext:
+    messages: List[Dict]
+    tokens_used: int
+    budget: int
+    dropped_messages: int = 0
+    truncated: bool = False
+    token_counts: List[int] = field(default_factory=list)
+
+
+class ContextBuilder:
+    """Packs a system prompt plus the newest turns into a per-model token budget.
+
+    Older turns are dropped whole; only the newest turn is ever truncated. An
+    oversized system prompt is cut from its tail so the current turn keeps at
+    least CONTEXT_MIN_CURRENT_TURN_TOKENS.
+    """
+
+    def __init__(self, model: str = None, max_output_tokens: int = None, max_input_tokens: int = None,
+                 min_current_turn_tokens: int = None):
+        self.model = model or settings.GROQ_MODEL
+        window = MODEL_CONTEXT_WINDOWS.get(self.model, DEFAULT_CONTEXT_WINDOW)
+        max_output_tokens = settings.CONTEXT_RESERVED_OUTPUT_TOKENS if max_output_tokens is None else max_output_tokens
+        cap = settings.CONTEXT_INPUT_TOKEN_BUDGET if max_input_tokens is None else max_input_tokens
+        self.budget = max(window - max_output_tokens, 0)
+        if cap:
+            self.budget = min(self.budget, cap)
+        self.min_current_turn_tokens = (
+            settings.CONTEXT_MIN_CURRENT_TURN_TOKENS if min_current_turn_tokens is None else min_current_turn_tokens
+        )
+
+    def build(self, system_prompt: str, turns: List[Dict]) -> BuiltContext:
+        truncated = False
+
+        # Bound the system prompt so a slice of the current turn always fits
+        reserve = 0
+        if turns:
+            current_cost = estimate_tokens(turns[-1]["content"]) + MESSAGE_OVERHEAD_TOKENS
+            reserve = min(current_cost, self.min_current_turn_tokens + MESSAGE_OVERHEAD_TOKENS)
+        system_limit = max(self.budget - reserve - MESSAGE_OVERHEAD_TOKENS, 0)
+        if estimate_tokens(system_prompt) > system_limit:
+            system_prompt = truncate_to_tokens(system_prompt, system_limit, keep="head")
+            truncated = True
+
+        system_tokens = estimate_tokens(system_prompt) + MESSAGE_OVERHEAD_TOKENS
+        remaining = max(self.budget - system_tokens, 0)
+
+        kept: List[Dict] = []
+        counts: List[int] = []
+        for i, turn in enumerate(reversed(turns)):
+            cost = estimate_tokens(turn["content"]) + MESSAGE_OVERHEAD_TOKENS
+            if cost <= remaining:
+                kept.append(turn)
+                counts.append(cost)
+                remaining -= cost
+                continue
+
+            if i == 0:
+                # Never drop the current turn; keep its newest text instead
+                content = truncate_to_tokens(turn["content"], remaining - MESSAGE_OVERHEAD_TOKENS)
+                kept.append({**turn, "content": content})
+                cost = estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+                counts.append(cost)
+                remaining = max(remaining - cost, 0)
+                truncated = True
+            break
+
+        kept.reverse()
+        counts.reverse()
+        built = BuiltContext(
+            messages=[{"role": "system", "content": system_prompt}] + kept,
+            tokens_used=system_tokens + sum(counts),
+            budget=self.budget,
+            dropped_messages=len(turns) - len(kept),
+            truncated=truncated,
+            token_counts=[system_tokens] + counts,
+        )
+        if built.dropped_messages or truncated:
+            logger.info(
+                f"Context budget {self.budget} tokens: used {built.tokens_used}, "
+                f"dropped {built.dropped_messages} message(s), truncated={truncated}."
+            )
+        return built
+
+    def fit_texts(self, texts: List[str], max_tokens: int, separator: str = "\n---\n") -> str:
+        """Join the newest texts that fit in max_tokens, dropping whole older ones."""
+        kept = []
+        remaining = max_tokens
+        sep_tokens = estimate_tokens(separator)
+        for text in reversed(texts):
+            cost = estimate_tokens(text) + (sep_tokens if kept else 0)
+            if cost > remaining:
+                if not kept:
+                    kept.append(truncate_to_tokens(text, remaining))
+                break
+            kept.append(text)
+            remaining -= cost
+        return separator.join(reversed(kept))
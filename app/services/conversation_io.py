@@ -0,0 +1,255 @@
+import io
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import Select
+
+from app.core.config import settings
+from app.models.message import Message, utcnow
+from app.models.prompt import Prompt
+from app.repositories.session_stats_repo import record_messages_statements
+
+logger = logging.getLogger(__name__)
+
+# Corpus direction <-> messages.role
+DIRECTION_TO_ROLE = {"in": "user", "out": "assistant"}
+ROLE_TO_DIRECTION = {role: direction for direction, role in DIRECTION_TO_ROLE.items()}
+
+MESSAGE_COLUMNS = ("id", "session_id", "role", "content", "prompt_version_id", "created_at")
+
+
+@dataclass
+class ExportFilter:
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    session_ids: List[str] = field(default_factory=list)
+    prompt_version_id: Optional[uuid.UUID] = None
+
+
+def export_query(filters: ExportFilter) -> Select:
+    # Session-major order (ix_messages_session_id_created_at) so each conversation is contiguous
+    stmt = select(
+        Message.session_id, Message.role, Message.content, Message.prompt_version_id, Message.created_at
+    )
+    if filters.since is not None:
+        stmt = stmt.where(Message.created_at >= filters.since)
+    if filters.until is not None:
+        stmt = stmt.where(Message.created_at < filters.until)
+    if filters.session_ids:
+        stmt = stmt.where(Message.session_id.in_(filters.session_ids))
+    if filters.prompt_version_id is not None:
+        # Only assistant turns carry a version: keep every session that has one from it
+        versioned = select(Message.session_id).where(Message.prompt_version_id == filters.prompt_version_id)
+        stmt = stmt.where(Message.session_id.in_(versioned))
+    return stmt.order_by(Message.session_id, Message.created_at, Message.id)
+
+
+def to_epoch_ms(value: Optional[datetime]) -> Optional[int]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+def from_epoch_ms(value) -> datetime:
+    if value is None:
+        return utcnow()
+    return datetime.fromtimestamp(value / 1000.0, tz=timezone.utc)
+
+
+class ConversationGrouper:
+    """Folds session-ordered message rows into corpus conversations, one session in memory at a time."""
+
+    def __init__(self):
+        self.current: Optional[Dict] = None
+
+    def add(self, row) -> Optional[Dict]:
+        """Returns the previous conversation once `row` starts a new session."""
+        finished = None
+        if self.current is None or self.current["contact_id"] != row.session_id:
+            finished, self.current = self.current, {"contact_id": row.session_id, "scenario": None, "conversation": []}
+        turns = self.current["conversation"]
+        turns.append({
+            "message_id": len(turns) + 1,
+            "direction": ROLE_TO_DIRECTION.get(row.role, row.role),
+            "text": row.content,
+            "timestamp": to_epoch_ms(row.created_at),
+            "prompt_version_id": str(row.prompt_version_id) if row.prompt_version_id else None,
+        })
+        return finished
+
+    def flush(self) -> Optional[Dict]:
+        finished, self.current = self.current, None
+        return finished
+
+
+def ndjson_line(conversation: Dict) -> str:
+    return json.dumps(conversation, ensure_ascii=False) + "\n"
+
+
+def iter_conversations(engine: Engine, filters: ExportFilter, batch_size: int = None) -> Iterator[Dict]:
+    batch_size = batch_size or settings.CONVERSATION_IO_BATCH_SIZE
+    grouper = ConversationGrouper()
+    with engine.connect() as conn:
+        # Server-side cursor: rows arrive batch_size at a time however large the table is
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(export_query(filters))
+        for row in result:
+            finished = grouper.add(row)
+            if finished:
+                yield finished
+    last = grouper.flush()
+    if last:
+        yield last
+
+
+def export_ndjson(engine: Engine, out: IO[str], filters: ExportFilter, batch_size: int = None) -> int:
+    sessions = 0
+    for conversation in iter_conversations(engine, filters, batch_size):
+        out.write(ndjson_line(conversation))
+        sessions += 1
+    return sessions
+
+
+async def stream_ndjson(async_engine: AsyncEngine, filters: ExportFilter, batch_size: int = None) -> AsyncIterator[str]:
+    """Async counterpart of `export_ndjson` for the HTTP endpoint."""
+    batch_size = batch_size or settings.CONVERSATION_IO_BATCH_SIZE
+    grouper = ConversationGrouper()
+    async with async_engine.connect() as conn:
+        result = await conn.stream(export_query(filters).execution_options(yield_per=batch_size))
+        async for row in result:
+            finished = grouper.add(row)
+            if finished:
+                yield ndjson_line(finished)
+    last = grouper.flush()
+    if last:
+        yield ndjson_line(last)
+
+
+def copy_value(value) -> str:
+    """COPY text-format field: \\N for NULL, backslash escapes for the separators."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def conversation_rows(conversation: Dict, known_prompt_ids: set) -> Iterator[Dict]:
+    session_id = conversation.get("contact_id")
+    if not session_id:
+        raise ValueError("Conversation has no contact_id.")
+    turns = sorted(conversation.get("conversation", []), key=lambda turn: turn.get("message_id", 0))
+    for turn in turns:
+        role = DIRECTION_TO_ROLE.get(turn.get("direction"))
+        if role is None or turn.get("text") is None:
+            continue
+        version = turn.get("prompt_version_id")
+        yield {
+            "id": uuid.uuid4(),
+            "session_id": str(session_id),
+            "role": role,
+            "content": turn["text"],
+            # Versions from another database would break the foreign key
+            "prompt_version_id": uuid.UUID(version) if version and version in known_prompt_ids else None,
+            "created_at": from_epoch_ms(turn.get("timestamp")),
+        }
+
+
+def read_conversations(lines: Iterable[str]) -> Iterator[Dict]:
+    """NDJSON conversations; blank lines are skipped."""
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {number}: {e}") from e
+
+
+def load_conversation_file(path: str) -> List[Dict]:
+    """Corpus loader for both the curated JSON array and exported NDJSON."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".ndjson", ".jsonl")):
+            return list(read_conversations(f))
+        return json.load(f)
+
+
+class ConversationImporter:
+    """Bulk-loads corpus conversations into messages in fixed-size batches.
+
+    Postgres batches go through COPY; other databases use one executemany
+    INSERT per batch. Session counters are bumped in the same transaction.
+    Sessions that already have messages are skipped unless `include_existing`
+    is set, so importing the same file twice is a no-op.
+    """
+
+    def __init__(self, engine: Engine, batch_size: int = None, include_existing: bool = False):
+        self.engine = engine
+        self.batch_size = batch_size or settings.CONVERSATION_IO_BATCH_SIZE
+        self.include_existing = include_existing
+
+    def _copy(self, conn, rows: List[Dict]):
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(copy_value(row[column]) for column in MESSAGE_COLUMNS) + "\n")
+        buffer.seek(0)
+        with conn.connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY messages ({', '.join(MESSAGE_COLUMNS)}) FROM STDIN", buffer)
+
+    def _flush(self, rows: List[Dict]) -> Tuple[int, int]:
+        """Insert `rows`; returns (messages inserted, sessions skipped as already present)."""
+        with self.engine.begin() as conn:
+            skipped = set()
+            if not self.include_existing:
+                session_ids = {row["session_id"] for row in rows}
+                skipped = set(conn.execute(
+                    select(Message.session_id).where(Message.session_id.in_(session_ids)).distinct()
+                ).scalars())
+                rows = [row for row in rows if row["session_id"] not in skipped]
+            if not rows:
+                return 0, len(skipped)
+
+            dialect = conn.dialect.name
+            if dialect == "postgresql" and conn.dialect.driver == "psycopg2":
+                self._copy(conn, rows)
+            else:
+                conn.execute(insert(Message), rows)
+            for stmt in record_messages_statements(dialect, rows, trigger_every=settings.EDITOR_TRIGGER_EVERY):
+                conn.execute(stmt)
+            return len(rows), len(skipped)
+
+    def run(self, conversations: Iterable[Dict]) -> Dict[str, int]:
+        with self.engine.connect() as conn:
+            known_prompt_ids = {str(prompt_id) for prompt_id in conn.execute(select(Prompt.id)).scalars()}
+
+        summary = {"sessions": 0, "messages": 0, "skipped_sessions": 0}
+
+        def flush(rows: List[Dict]):
+            inserted, skipped = self._flush(rows)
+            summary["messages"] += inserted
+            summary["sessions"] -= skipped
+            summary["skipped_sessions"] += skipped
+
+        batch: List[Dict] = []
+        for conversation in conversations:
+            batch.extend(conversation_rows(conversation, known_prompt_ids))
+            summary["sessions"] += 1
+            if len(batch) >= self.batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+        logger.info(
+            f"Imported {summary['messages']} messages across {summary['sessions']} sessions "
+            f"({summary['skipped_sessions']} already present, skipped)."
+        )
+        return summary
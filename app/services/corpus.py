@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.repositories.message_repo import AsyncMessageRepository
+from app.services.conversation_io import load_conversation_file
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationCorpus:
+    """Reference conversations loaded once and indexed for O(1) slicing.
+
+    The file is re-parsed (off the event loop) only when its mtime changes.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or settings.CONVERSATION_CORPUS_PATH
+        self.conversations: List[Dict] = []
+        self.by_direction: Dict[str, List[str]] = {"in": [], "out": []}
+        self.by_scenario: Dict[str, Dict[str, List[str]]] = {}
+        self._mtime: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._mtime is not None
+
+    def _current_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def load(self):
+        mtime = self._current_mtime()
+        if mtime is None:
+            raise FileNotFoundError(f"Behavioral reference missing: {self.path}")
+
+        conversations = load_conversation_file(self.path)
+
+        by_direction = {"in": [], "out": []}
+        by_scenario = defaultdict(lambda: {"in": [], "out": []})
+        for conv in conversations:
+            scenario = conv.get("scenario") or "unknown"
+            for msg in conv.get("conversation", []):
+                direction = msg.get("direction")
+                if direction not in by_direction:
+                    continue
+                text = msg.get("text", "")
+                by_direction[direction].append(text)
+                by_scenario[scenario][direction].append(text)
+
+        # Swap in fully built indexes so readers never see a partial load
+        self.conversations = conversations
+        self.by_direction = by_direction
+        self.by_scenario = dict(by_scenario)
+        self._mtime = mtime
+        logger.info(f"Loaded {len(conversations)} reference conversations from {self.path}.")
+
+    async def ensure_fresh(self):
+        if self.loaded and self._current_mtime() == self._mtime:
+            return
+        async with self._lock:
+            if self.loaded and self._current_mtime() == self._mtime:
+                return
+            await asyncio.to_thread(self.load)
+
+    def recent(self, direction: str, n: int) -> List[str]:
+        return self.by_direction.get(direction, [])[-n:] if n > 0 else []
+
+    def scenario_messages(self, scenario: str, direction: str) -> List[str]:
+        return self.by_scenario.get(scenario, {}).get(direction, [])
+
+    async def recent_live_assistant_turns(self, db: AsyncSession, n: int) -> List[str]:
+        """Most recent assistant replies from the live messages table, oldest first."""
+        messages = await AsyncMessageRepository(db).get_recent_by_role("assistant", n)
+        return [msg.content for msg in reversed(messages)]
+
+
+_conversation_corpus: Optional[ConversationCorpus] = None
+
+
+def get_conversation_corpus() -> ConversationCorpus:
+    global _conversation_corpus
+    if _conversation_corpus is None:
+        _conversation_corpus = ConversationCorpus()
+    return _conversation_corpus
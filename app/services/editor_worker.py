@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core import database
+from app.core.llm import BaseLLMProvider
+from app.models.prompt import Prompt
+from app.services.prompt_editor import PromptEditorService
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class EditorJob:
+    id: str
+    triggered_by: str
+    session_id: Optional[str] = None
+    status: str = "queued"  # queued | running | succeeded | failed
+    coalesced: int = 0
+    prompt_version: Optional[int] = None
+    error: Optional[str] = None
+    enqueued_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class EditorWorker:
+    """In-process background worker that runs the prompt editor off the request path.
+
+    Triggers arriving while a job is still queued are folded into that job,
+    so a burst of 5th messages results in a single editor run. Queued jobs and
+    manual /edit calls share one in-flight run (single flight).
+    """
+
+    def __init__(
+        self,
+        llm_client: BaseLLMProvider,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+        max_queue: int = None,
+        max_history: int = None,
+    ):
+        self.llm_client = llm_client
+        self.session_factory = session_factory or database.AsyncSessionLocal
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue or settings.EDITOR_QUEUE_MAXSIZE)
+        self.max_history = max_history or settings.EDITOR_JOB_HISTORY
+        self.jobs: "OrderedDict[str, EditorJob]" = OrderedDict()
+        self._pending: Optional[EditorJob] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self.joined_runs = 0
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="editor-worker")
+
+    async def stop(self):
+        if self._inflight is not None and not self._inflight.done():
+            self._inflight.cancel()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def enqueue(self, session_id: Optional[str] = None, triggered_by: str = "autonomous") -> Optional[EditorJob]:
+        # Coalesce with the job that has not started yet
+        if self._pending is not None:
+            self._pending.coalesced += 1
+            return self._pending
+
+        job = EditorJob(
+            id=str(uuid.uuid4()),
+            triggered_by=triggered_by,
+            session_id=session_id,
+            enqueued_at=_now(),
+        )
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            logger.warning("Editor queue full. Dropping trigger.")
+            return None
+
+        self._pending = job
+        self._remember(job)
+        return job
+
+    @property
+    def run_in_flight(self) -> bool:
+        return self._inflight is not None and not self._inflight.done()
+
+    async def run_single_flight(self, session_id: Optional[str] = None, triggered_by: str = "manual") -> Prompt:
+        """Run the editor now, or join the run that is already in flight."""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._run_editor(session_id, triggered_by), name="editor-run")
+        else:
+            self.joined_runs += 1
+        # Shielded: one caller going away must not cancel the run for the others
+        return await asyncio.shield(self._inflight)
+
+    async def _run_editor(self, session_id: Optional[str], triggered_by: str) -> Prompt:
+        async with self.session_factory() as db:
+            editor = PromptEditorService(db, self.llm_client)
+            return await editor.run_editor(session_id=session_id, triggered_by=triggered_by)
+
+    def get_job(self, job_id: str) -> Optional[EditorJob]:
+        return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[EditorJob]:
+        return list(reversed(self.jobs.values()))
+
+    def _remember(self, job: EditorJob):
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.max_history:
+            self.jobs.popitem(last=False)
+
+    async def _run(self):
+        while True:
+            job = await self.queue.get()
+            if self._pending is job:
+                self._pending = None
+            try:
+                await self._execute(job)
+            finally:
+                self.queue.task_done()
+
+    async def _execute(self, job: EditorJob):
+        job.status = "running"
+        job.started_at = _now()
+        try:
+            new_prompt = await self.run_single_flight(session_id=job.session_id, triggered_by=job.triggered_by)
+            job.prompt_version = new_prompt.version
+            job.status = "succeeded"
+        except Exception as e:
+            logger.error(f"Editor job {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = _now()
@@ -0,0 +1,181 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.core.llm import LLMQuotaError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EvalItem:
+    key: str
+    contact_id: str
+    user_message: str
+    real_reply: str
+    context: str
+
+
+def build_eval_items(conversations: list) -> List[EvalItem]:
+    """One item per inbound turn that has a real outbound reply after it."""
+    items = []
+    for conv in conversations:
+        contact_id = conv.get("contact_id")
+        messages = sorted(conv.get("conversation", []), key=lambda x: x.get("message_id", 0))
+
+        history = []
+        for i, msg in enumerate(messages):
+            direction = msg.get("direction")
+            text = msg.get("text")
+
+            if direction == "in":
+                real_reply = None
+                for j in range(i + 1, len(messages)):
+                    if messages[j].get("direction") == "out":
+                        real_reply = messages[j].get("text")
+                        break
+
+                if real_reply:
+                    items.append(EvalItem(
+                        key=f"{contact_id}:{msg.get('message_id', i)}",
+                        contact_id=contact_id,
+                        user_message=text,
+                        real_reply=real_reply,
+                        context="\n".join(history),
+                    ))
+                history.append(f"User: {text}")
+            else:
+                history.append(f"AI: {text}")
+    return items
+
+
+class AdaptiveLimiter:
+    """Concurrency cap that halves on provider 429s and grows back additively."""
+
+    def __init__(self, initial: int, maximum: int):
+        self.limit = max(1, initial)
+        self.maximum = max(self.limit, maximum)
+        self.in_flight = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self, throttled: bool = False):
+        async with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(1, self.limit // 2)
+            elif self.limit < self.maximum:
+                self.limit += 1
+            self._cond.notify_all()
+
+
+class EvalCheckpoint:
+    """Append-only JSONL of finished items so a crashed run resumes where it stopped."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.results: Dict[str, Dict] = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Last line of a crashed run may be partial
+                        continue
+                    self.results[record["key"]] = record
+
+    def append(self, record: Dict):
+        self.results[record["key"]] = record
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+class EvalRunner:
+    """Fans evaluations out under an adaptive concurrency limit with checkpoints."""
+
+    def __init__(
+        self,
+        evaluate: Callable[[EvalItem], Awaitable[Dict]],
+        concurrency: int = 4,
+        max_concurrency: int = 16,
+        checkpoint_path: Optional[str] = None,
+        throttle_backoff: float = 2.0,
+        max_throttle_retries: int = 5,
+    ):
+        self.evaluate = evaluate
+        self.limiter = AdaptiveLimiter(concurrency, max_concurrency)
+        self.checkpoint = EvalCheckpoint(checkpoint_path)
+        self.throttle_backoff = throttle_backoff
+        self.max_throttle_retries = max_throttle_retries
+
+        self._done = 0
+        self._total = 0
+        self._started_at = 0.0
+
+    async def run(self, items: List[EvalItem]) -> List[Dict]:
+        pending = [item for item in items if item.key not in self.checkpoint.results]
+        if len(pending) < len(items):
+            logger.info(f"Resuming from checkpoint: {len(items) - len(pending)}/{len(items)} already evaluated.")
+
+        self._done = 0
+        self._total = len(pending)
+        self._started_at = time.monotonic()
+        await asyncio.gather(*(self._run_item(item) for item in pending))
+
+        # Original corpus order, failures omitted
+        return [self.checkpoint.results[item.key] for item in items if item.key in self.checkpoint.results]
+
+    async def _run_item(self, item: EvalItem):
+        for attempt in range(self.max_throttle_retries + 1):
+            await self.limiter.acquire()
+            throttled = False
+            try:
+                result = await self.evaluate(item)
+                self.checkpoint.append({
+                    "key": item.key,
+                    "contact_id": item.contact_id,
+                    "user_message": item.user_message,
+                    "predicted_reply": result["reply"],
+                    "real_reply": item.real_reply,
+                    "score": result["score"],
+                })
+                break
+            except LLMQuotaError:
+                throttled = True
+            except Exception as e:
+                logger.error(f"Evaluation failed for {item.key}: {e}")
+                break
+            finally:
+                await self.limiter.release(throttled=throttled)
+
+            logger.warning(f"Throttled on {item.key}; concurrency now {self.limiter.limit}.")
+            await asyncio.sleep(self.throttle_backoff * (2 ** attempt))
+        else:
+            logger.error(f"Giving up on {item.key} after {self.max_throttle_retries} throttled retries.")
+
+        self._report_progress()
+
+    def _report_progress(self):
+        self._done += 1
+        elapsed = time.monotonic() - self._started_at
+        rate = self._done / elapsed if elapsed > 0 else 0.0
+        eta = (self._total - self._done) / rate if rate > 0 else 0.0
+        logger.info(
+            f"[{self._done}/{self._total}] {rate:.2f} items/s, "
+            f"concurrency {self.limiter.limit}, ETA {eta:.0f}s"
+        )
@@ -0,0 +1,61 @@
+import logging
+import re
+from typing import Dict
+from sqlalchemy.orm import Session
+from app.core.llm import BaseLLMProvider
+from app.repositories.prompt_repo import PromptRepository
+
+logger = logging.getLogger(__name__)
+
+JUDGE_PROMPT = """# ROLE: REPLY JUDGE
+Compare a PREDICTED support reply with the REAL reply a human agent sent.
+Score how well the predicted reply matches the real one in facts, intent and tone.
+
+Return ONLY a number between 0 and 1."""
+
+
+class EvaluatorService:
+    """Offline replay of real conversations against a system prompt."""
+
+    def __init__(self, db: Session, provider: BaseLLMProvider):
+        self.db = db
+        self.provider = provider
+        self.prompt_repo = PromptRepository(db)
+        self._active_prompt = None
+
+    def _system_prompt(self, prompt_override=None) -> str:
+        if prompt_override is not None:
+            return prompt_override.content
+        if self._active_prompt is None:
+            self._active_prompt = self.prompt_repo.get_active_prompt()
+            if not self._active_prompt:
+                raise ValueError("No active prompt found.")
+        return self._active_prompt.content
+
+    async def generate_reply(self, user_message: str, context: str = "", prompt_override=None) -> str:
+        system_prompt = self._system_prompt(prompt_override)
+        if context:
+            system_prompt = f"{system_prompt}\n\n# CONVERSATION SO FAR\n{context}"
+        return await self.provider.generate(system_prompt=system_prompt, user_message=user_message)
+
+    async def judge(self, user_message: str, predicted_reply: str, real_reply: str) -> float:
+        verdict = await self.provider.generate(
+            system_prompt=JUDGE_PROMPT,
+            user_message=f"USER MESSAGE:\n{user_message}\n\nPREDICTED:\n{predicted_reply}\n\nREAL:\n{real_reply}",
+            temperature=0.0,
+            max_tokens=8
+        )
+        return parse_score(verdict)
+
+    async def evaluate_message(self, user_message: str, real_reply: str, context: str = "", prompt_override=None) -> Dict:
+        reply = await self.generate_reply(user_message, context=context, prompt_override=prompt_override)
+        score = await self.judge(user_message, reply, real_reply)
+        return {"reply": reply, "score": score}
+
+
+def parse_score(text: str) -> float:
+    match = re.search(r"\d+(?:\.\d+)?", text or "")
+    if not match:
+        logger.warning(f"Judge returned no score: {text!r}")
+        return 0.0
+    return min(max(float(match.group()), 0.0), 1.0)
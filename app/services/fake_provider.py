@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import math
+import random
+from typing import AsyncIterator, Dict, List
+
+from app.core.config import settings
+from app.core.llm import BaseLLMProvider, LLMProviderError, LLMQuotaError
+
+logger = logging.getLogger(__name__)
+
+# Passes the editor's output validation, so /edit works against the fake too
+DEFAULT_FAKE_REPLY = (
+    "You are a precise assistant. Answer only within scope, state uncertainty plainly "
+    "and ask one clarifying question when key details are missing."
+)
+
+
+class FakeLLMProvider(BaseLLMProvider):
+    """Offline, seeded stand-in for benchmarks and local runs.
+
+    Latency is a base delay drawn from `distribution` (fixed | uniform |
+    lognormal) plus reply length / `tokens_per_second`. A seeded RNG makes
+    the latency and error sequence reproducible for a given call order.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = None,
+        distribution: str = None,
+        jitter: float = None,
+        tokens_per_second: float = None,
+        error_rate: float = None,
+        error_kind: str = None,
+        seed: int = None,
+        reply: str = DEFAULT_FAKE_REPLY,
+    ):
+        self.latency_ms = settings.FAKE_LLM_LATENCY_MS if latency_ms is None else latency_ms
+        self.distribution = distribution or settings.FAKE_LLM_LATENCY_DISTRIBUTION
+        self.jitter = settings.FAKE_LLM_LATENCY_JITTER if jitter is None else jitter
+        self.tokens_per_second = settings.FAKE_LLM_TOKENS_PER_SECOND if tokens_per_second is None else tokens_per_second
+        self.error_rate = settings.FAKE_LLM_ERROR_RATE if error_rate is None else error_rate
+        self.error_kind = error_kind or settings.FAKE_LLM_ERROR_KIND
+        self.rng = random.Random(settings.FAKE_LLM_SEED if seed is None else seed)
+        self.reply = reply
+        self.tokens = reply.split(" ")
+
+        if self.distribution not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown fake latency distribution '{self.distribution}'.")
+
+        self.calls = 0
+        self.errors = 0
+
+    def _base_delay(self) -> float:
+        base = self.latency_ms / 1000.0
+        if base <= 0 or self.distribution == "fixed":
+            return max(base, 0.0)
+        if self.distribution == "uniform":
+            return base * self.rng.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+        # lognormal with median `base`: a realistic long right tail
+        return self.rng.lognormvariate(math.log(base), self.jitter)
+
+    def _token_delay(self) -> float:
+        if self.tokens_per_second <= 0:
+            return 0.0
+        return 1.0 / self.tokens_per_second
+
+    def _maybe_fail(self):
+        if self.error_rate > 0 and self.rng.random() < self.error_rate:
+            self.errors += 1
+            if self.error_kind == "quota":
+                raise LLMQuotaError("Rate limit exceeded (429).")
+            raise LLMProviderError("Server error: 503")
+
+    async def chat(self, messages: List[Dict], **kwargs) -> str:
+        self.calls += 1
+        await asyncio.sleep(self._base_delay())
+        self._maybe_fail()
+        await asyncio.sleep(self._token_delay() * len(self.tokens))
+        return self.reply
+
+    async def stream_chat(self, messages: List[Dict], **kwargs) -> AsyncIterator[str]:
+        self.calls += 1
+        # Base delay doubles as time to first token
+        await asyncio.sleep(self._base_delay())
+        self._maybe_fail()
+        delay = self._token_delay()
+        for i, token in enumerate(self.tokens):
+            yield token if i == 0 else f" {token}"
+            if delay:
+                await asyncio.sleep(delay)
+
+    async def generate(self, system_prompt: str, user_message: str, **kwargs) -> str:
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
+        ]
+        return await self.chat(messages, **kwargs)
+
+    def stats(self) -> Dict:
+        return {"calls": self.calls, "errors": self.errors}
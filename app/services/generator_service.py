@@ -1,52 +1,174 @@
-from sqlalchemy.orm import Session
-from app.repositories.prompt_repo import PromptRepository
-from app.repositories.message_repo import MessageRepository
-from app.services.groq_provider import LLMClient
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.llm import BaseLLMProvider
+from app.core.timing import stage
+from app.models.message import utcnow
+from app.repositories.message_repo import AsyncMessageRepository
+from app.repositories.message_buffer import get_message_write_buffer
+from app.services.llm_router import build_llm_provider
+from app.services.prompt_cache import ActivePromptSnapshot, get_active_prompt_cache
+from app.services.response_cache import get_response_cache
+from app.services.context_builder import ContextBuilder
+
+
+@dataclass
+class ChatTurn:
+    session_id: str
+    user_content: str
+    received_at: datetime
+    active_prompt: ActivePromptSnapshot
+    llm_messages: List[Dict] = field(default_factory=list)
+    context_tokens: int = 0
+    cache_key: Optional[str] = None
 
 
 class GeneratorService:
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: AsyncSession,
+        llm_client: Optional[BaseLLMProvider] = None,
+        unit_of_work: Optional[bool] = None,
+    ):
         self.db = db
-        self.prompt_repo = PromptRepository(db)
-        self.message_repo = MessageRepository(db)
-        self.llm_client = LLMClient()
-
-    async def generate(self, session_id: str, user_content: str, history_limit: int = 10):
-        # 1. Save user message
-        self.message_repo.create_message(session_id=session_id, role="user", content=user_content)
-
-        # 2. Fetch active prompt with fail-safe fallback
-        active_prompt = self.prompt_repo.get_active_prompt()
-        
-        # Fallback to latest prompt if no active one found
-        if not active_prompt:
-            active_prompt = self.db.query(Prompt).order_by(Prompt.version.desc()).first()
-            
+        self.message_repo = AsyncMessageRepository(db)
+        self.llm_client = llm_client or build_llm_provider()
+        self.prompt_cache = get_active_prompt_cache()
+        self.response_cache = get_response_cache()
+        self.context_builder = ContextBuilder()
+        # Unit of work: user + assistant messages are written together after the reply
+        self.unit_of_work = settings.CHAT_UNIT_OF_WORK if unit_of_work is None else unit_of_work
+
+    async def _prepare(self, session_id: str, user_content: str, history_limit: Optional[int]) -> ChatTurn:
+        received_at = utcnow()
+
+        # 1. Save user message (deferred to the turn commit in unit-of-work mode)
+        if not self.unit_of_work:
+            with stage("message_insert"):
+                await self.message_repo.create_message(session_id=session_id, role="user", content=user_content)
+
+        # 2. Fetch active prompt (cached, falls back to latest version)
+        with stage("prompt_fetch"):
+            active_prompt = await self.prompt_cache.get(self.db)
+
         if not active_prompt:
             raise ValueError("Zero prompts found in database. Initialization required.")
 
-        # 3. Fetch history
-        history = self.message_repo.get_last_n_messages(history_limit)
+        # 3. Fetch this session's history (candidates; the token budget decides what is sent)
+        history_limit = history_limit or settings.CONTEXT_MAX_HISTORY_MESSAGES
+        prior_limit = history_limit - 1 if self.unit_of_work else history_limit
+        with stage("history_fetch"):
+            history = await self.message_repo.get_session_history(session_id, prior_limit)
         # Reverse to chronological
         history.reverse()
 
-        # 4. Build LLM messages
-        llm_messages = [{"role": "system", "content": active_prompt.content}]
-        # Note: History includes the message we just saved. 
-        # But we want to avoid double-adding if we use the last N.
-        # Let's just use the history as is, since it contains the user message.
-        for msg in history:
-            llm_messages.append({"role": msg.role, "content": msg.content})
+        # 4. Pack system prompt + newest turns into the model's token budget
+        turns = [{"role": msg.role, "content": msg.content} for msg in history]
+        # The current message is not in the DB yet in unit-of-work mode
+        if self.unit_of_work:
+            turns.append({"role": "user", "content": user_content})
+        context = self.context_builder.build(active_prompt.content, turns)
+        llm_messages = context.messages
 
-        # 5. Call LLM
-        reply = await self.llm_client.chat(messages=llm_messages)
+        # Hand the pooled connection back while we wait on the LLM
+        await self.db.commit()
 
-        # 6. Save assistant reply
-        self.message_repo.create_message(
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = self.response_cache.make_key(active_prompt.id, llm_messages)
+
+        return ChatTurn(
             session_id=session_id,
-            role="assistant", 
-            content=reply, 
-            prompt_version_id=active_prompt.id
+            user_content=user_content,
+            received_at=received_at,
+            active_prompt=active_prompt,
+            llm_messages=llm_messages,
+            context_tokens=context.tokens_used,
+            cache_key=cache_key,
         )
 
+    def _cached_reply(self, turn: ChatTurn) -> Optional[str]:
+        if self.response_cache is None:
+            return None
+        return self.response_cache.get(turn.cache_key)
+
+    def _cache_reply(self, turn: ChatTurn, reply: str):
+        if self.response_cache is not None:
+            self.response_cache.put(turn.cache_key, reply)
+
+    async def _persist_reply(self, turn: ChatTurn, reply: str):
+        if not self.unit_of_work:
+            await self.message_repo.create_message(
+                session_id=turn.session_id,
+                role="assistant",
+                content=reply,
+                prompt_version_id=turn.active_prompt.id
+            )
+            return
+
+        rows = [
+            {
+                "session_id": turn.session_id,
+                "role": "user",
+                "content": turn.user_content,
+                "created_at": turn.received_at,
+            },
+            {
+                "session_id": turn.session_id,
+                "role": "assistant",
+                "content": reply,
+                "prompt_version_id": turn.active_prompt.id,
+                "created_at": utcnow(),
+            },
+        ]
+
+        # One transaction per turn, or one per batch of concurrent turns
+        write_buffer = get_message_write_buffer()
+        if write_buffer is not None:
+            await write_buffer.write(rows)
+        else:
+            await self.message_repo.create_messages(rows)
+
+    async def generate(self, session_id: str, user_content: str, history_limit: Optional[int] = None):
+        with stage("prepare"):
+            turn = await self._prepare(session_id, user_content, history_limit)
+
+        # 5. Call LLM (unless a cached reply covers this opening turn)
+        reply = self._cached_reply(turn)
+        if reply is None:
+            with stage("llm"):
+                reply = await self.llm_client.chat(messages=turn.llm_messages)
+            self._cache_reply(turn, reply)
+
+        # 6. Save assistant reply
+        with stage("message_insert"):
+            await self._persist_reply(turn, reply)
+
         return reply
+
+    async def generate_stream(self, session_id: str, user_content: str, history_limit: Optional[int] = None) -> AsyncIterator[str]:
+        turn = await self._prepare(session_id, user_content, history_limit)
+
+        # 5. Stream LLM deltas to the caller as they arrive
+        reply = self._cached_reply(turn)
+        if reply is not None:
+            yield reply
+        else:
+            chunks = []
+            stream = self.llm_client.stream_chat(messages=turn.llm_messages)
+            try:
+                with stage("llm"):
+                    async for delta in stream:
+                        chunks.append(delta)
+                        yield delta
+            finally:
+                # A caller that stops early (client disconnect) must stop the upstream request too
+                await stream.aclose()
+            reply = "".join(chunks)
+            self._cache_reply(turn, reply)
+
+        # 6. Save assistant reply once the stream has completed
+        with stage("message_insert"):
+            await self._persist_reply(turn, reply)
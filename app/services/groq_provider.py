@@ -1,21 +1,44 @@
+import json
 import httpx
 from tenacity import retry,  stop_after_attempt, wait_exponential, retry_if_exception_type
 import logging
-from typing import List, Dict
+import time
+from typing import List, Dict, Optional, AsyncIterator
 
 from app.core.config import settings
+from app.core.http_client import PooledHTTPClient
 from app.core.llm import BaseLLMProvider, LLMProviderError, LLMQuotaError
+from app.core.metrics import observe_llm_call
+from app.services.context_builder import estimate_tokens, MESSAGE_OVERHEAD_TOKENS
+from app.services.rate_governor import RateGovernor
+from app.services.llm_lanes import CHAT_LANE, get_llm_lanes
 
 logger = logging.getLogger(__name__)
 
 class LLMClient(BaseLLMProvider):
-    def __init__(self):
-        self.base_url = "https://api.groq.com/openai/v1/chat/completions"
-        self.model = settings.GROQ_MODEL
-        self.api_key = settings.GROQ_API_KEY
+    def __init__(
+        self,
+        lane: str = CHAT_LANE,
+        http_pool: Optional[PooledHTTPClient] = None,
+        governor: Optional[RateGovernor] = None,
+        base_url: Optional[str] = None,
+        model: Optional[str] = None,
+        api_key: Optional[str] = None,
+    ):
+        llm_lane = get_llm_lanes().get(lane)
+        self.base_url = base_url or settings.GROQ_BASE_URL
+        self.model = model or settings.GROQ_MODEL
+        self.lane = lane
+        self.api_key = llm_lane.api_key if api_key is None else api_key
+        self.http_pool = http_pool or llm_lane.pool
+        self.governor = governor or llm_lane.governor
         
-        if not self.api_key:
-             raise ValueError("GROQ_API_KEY is not configured.")
+        # An explicit empty key is allowed for local OpenAI-compatible servers
+        if api_key is None and not self.api_key:
+             raise ValueError(f"No Groq API key configured for the '{lane}' lane.")
+
+    async def warm(self):
+        await self.http_pool.warm(self.base_url, settings.LLM_WARM_CONNECTIONS)
 
     @retry(
         stop=stop_after_attempt(3),
@@ -24,35 +47,118 @@ class LLMClient(BaseLLMProvider):
         reraise=True
     )
     async def chat(self, messages: List[Dict], **kwargs) -> str:
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
+        return await self.chat_once(messages, **kwargs)
+
+    async def chat_once(self, messages: List[Dict], **kwargs) -> str:
+        headers = self._headers()
+        payload = self._payload(messages, **kwargs)
+
+        permit = await self.governor.acquire(
+            self._reserved_tokens(payload), timeout=kwargs.get("queue_timeout"), lane=self.lane
+        )
+        status_code, response_headers, usage, ok = None, None, None, False
+        started = time.perf_counter()
+        try:
+            response = await self.http_pool.post(self.base_url, json=payload, headers=headers)
+            status_code, response_headers = response.status_code, response.headers
+            self._check_status(response)
+            data = response.json()
+            usage = data.get("usage")
+            content = data["choices"][0]["message"]["content"]
+            ok = True
+            return content
+
+        except Exception as e:
+            logger.error(f"LLM Call failed: {e}")
+            raise
+        finally:
+            self._finish(permit, started, status_code, response_headers, usage, ok)
+
+    async def stream_chat(self, messages: List[Dict], **kwargs) -> AsyncIterator[str]:
+        # No tenacity retry here: tokens may already have been forwarded
+        headers = self._headers()
+        payload = self._payload(messages, **kwargs)
+        payload["stream"] = True
+
+        permit = await self.governor.acquire(
+            self._reserved_tokens(payload), timeout=kwargs.get("queue_timeout"), lane=self.lane
+        )
+        status_code, response_headers, usage, ok, cancelled = None, None, None, False, False
+        started = time.perf_counter()
+        try:
+            async with self.http_pool.stream("POST", self.base_url, json=payload, headers=headers) as response:
+                status_code, response_headers = response.status_code, response.headers
+                if response.status_code >= 400:
+                    await response.aread()
+                self._check_status(response)
+
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    # Groq reports usage on the final chunk
+                    usage = (chunk.get("x_groq") or {}).get("usage") or chunk.get("usage") or usage
+                    choices = chunk.get("choices") or [{}]
+                    delta = (choices[0].get("delta") or {}).get("content")
+                    if delta:
+                        yield delta
+                ok = True
+
+        except GeneratorExit:
+            # Consumer closed the stream on purpose (validator abort, client gone)
+            cancelled = True
+            raise
+        except Exception as e:
+            logger.error(f"LLM Stream failed: {e}")
+            raise
+        finally:
+            self._finish(permit, started, status_code, response_headers, usage, ok, cancelled)
+
+    def _finish(
+        self, permit, started: float, status_code: Optional[int], headers, usage: Optional[Dict], ok: bool,
+        cancelled: bool = False,
+    ):
+        usage = usage or {}
+        if cancelled and status_code is not None and status_code < 400:
+            # The provider served the request fine; keep it out of error stats and AIMD backoff
+            outcome = "cancelled"
+        else:
+            outcome = "ok" if ok else (str(status_code) if status_code and status_code >= 400 else "error")
+        self.governor.release(permit, status_code=status_code, headers=headers, used_tokens=usage.get("total_tokens"))
+        observe_llm_call(self.lane, self.model, outcome, time.perf_counter() - started, usage)
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def _payload(self, messages: List[Dict], **kwargs) -> Dict:
+        return {
             "model": self.model,
             "messages": messages,
             "temperature": kwargs.get("temperature", 0.7),
             "max_tokens": kwargs.get("max_tokens", 1024)
         }
 
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(self.base_url, json=payload, headers=headers)
-                
-                if response.status_code == 429:
-                    raise LLMQuotaError("Rate limit exceeded (429).")
-                
-                if response.status_code >= 500:
-                    raise LLMProviderError(f"Server error: {response.status_code}")
-
-                response.raise_for_status()
-                data = response.json()
-                return data["choices"][0]["message"]["content"]
+    def _reserved_tokens(self, payload: Dict) -> int:
+        # Prompt estimate plus the full completion allowance; refunded on release
+        prompt_tokens = sum(
+            estimate_tokens(str(m.get("content", ""))) + MESSAGE_OVERHEAD_TOKENS for m in payload["messages"]
+        )
+        return prompt_tokens + payload["max_tokens"]
 
-        except Exception as e:
-            logger.error(f"LLM Call failed: {e}")
-            raise
+    def _check_status(self, response: httpx.Response):
+        if response.status_code == 429:
+            raise LLMQuotaError("Rate limit exceeded (429).")
+
+        if response.status_code >= 500:
+            raise LLMProviderError(f"Server error: {response.status_code}")
+
+        response.raise_for_status()
 
     # For compatibility if needed, but we'll use chat
     async def generate(self, system_prompt: str, user_message: str, **kwargs) -> str:
@@ -0,0 +1,145 @@
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import get_metrics_registry
+from app.core.http_client import PooledHTTPClient, get_llm_http_pool
+from app.services.rate_governor import RateGovernor, get_rate_governor
+
+logger = logging.getLogger(__name__)
+
+CHAT_LANE = "chat"
+EDITOR_LANE = "editor"
+EVAL_LANE = "eval"
+
+
+def _lane_pool(max_connections: int) -> PooledHTTPClient:
+    return PooledHTTPClient(
+        max_connections=max_connections,
+        max_keepalive_connections=min(max_connections, settings.LLM_MAX_KEEPALIVE_CONNECTIONS),
+    )
+
+
+@dataclass
+class LLMLane:
+    name: str
+    api_key: str
+    priority: int
+    pool: PooledHTTPClient
+    governor: RateGovernor
+
+
+class LLMLanes:
+    """Named traffic lanes for LLM calls.
+
+    Each lane has its own credential, connection pool and concurrency cap.
+    Lanes on the same credential share one RateGovernor (the provider's quota
+    is per key) which serves user chat first and keeps part of the budget out
+    of reach of background lanes.
+    """
+
+    def __init__(self):
+        self.lanes: Dict[str, LLMLane] = {}
+        self.governors: Dict[str, RateGovernor] = {}
+        self.backend_pools: Dict[str, PooledHTTPClient] = {}
+
+        self._add(CHAT_LANE, settings.GROQ_API_KEY, priority=0,
+                  pool=get_llm_http_pool(), max_concurrency=None, share=1.0)
+        self._add(EDITOR_LANE, settings.EDITOR_GROQ_API_KEY or settings.GROQ_API_KEY, priority=1,
+                  pool=_lane_pool(settings.EDITOR_LLM_MAX_CONNECTIONS),
+                  max_concurrency=settings.EDITOR_LLM_MAX_CONCURRENCY, share=settings.LLM_BACKGROUND_SHARE)
+        self._add(EVAL_LANE, settings.EVAL_GROQ_API_KEY or settings.GROQ_API_KEY, priority=2,
+                  pool=_lane_pool(settings.EVAL_LLM_MAX_CONNECTIONS),
+                  max_concurrency=settings.EVAL_LLM_MAX_CONCURRENCY, share=settings.LLM_BACKGROUND_SHARE)
+
+    def _governor_for(self, key: str, name: str) -> RateGovernor:
+        if key not in self.governors:
+            # The chat key keeps the process-wide governor
+            if key == settings.GROQ_API_KEY:
+                self.governors[key] = get_rate_governor()
+            else:
+                self.governors[key] = RateGovernor(name=name)
+        return self.governors[key]
+
+    def _add(self, name: str, api_key: str, priority: int, pool: PooledHTTPClient,
+             max_concurrency: Optional[int], share: float):
+        governor = self._governor_for(api_key, name)
+        # Only hold budget back when a higher-priority lane shares the key
+        outranked = any(lane.governor is governor and lane.priority < priority for lane in self.lanes.values())
+        governor.add_lane(name, priority=priority, max_concurrency=max_concurrency,
+                          share=share if outranked else 1.0)
+        self.lanes[name] = LLMLane(name=name, api_key=api_key, priority=priority, pool=pool, governor=governor)
+
+    def get(self, name: str) -> LLMLane:
+        if name not in self.lanes:
+            raise ValueError(f"Unknown LLM lane '{name}'.")
+        return self.lanes[name]
+
+    def backend(self, lane: str, backend: str, api_key: str) -> Tuple[PooledHTTPClient, RateGovernor]:
+        """Pool and governor for an additional backend serving `lane` with the lane's policy."""
+        llm_lane = self.get(lane)
+        key = f"{lane}:{backend}"
+        if key not in self.backend_pools:
+            self.backend_pools[key] = _lane_pool(llm_lane.pool.limits.max_connections)
+
+        governor = self._governor_for(f"{backend}:{api_key}", backend)
+        if lane not in governor.lanes:
+            policy = llm_lane.governor.lanes[lane]
+            governor.add_lane(lane, priority=policy.priority, max_concurrency=policy.max_concurrency,
+                              share=policy.share)
+        return self.backend_pools[key], governor
+
+    def _pools(self) -> Dict[str, PooledHTTPClient]:
+        pools = {name: lane.pool for name, lane in self.lanes.items()}
+        pools.update(self.backend_pools)
+        return pools
+
+    async def start(self):
+        for pool in self._pools().values():
+            await pool.start()
+
+    async def close(self):
+        for pool in self._pools().values():
+            await pool.close()
+
+    def pool_stats(self) -> Dict[str, Dict]:
+        return {name: pool.stats() for name, pool in self._pools().items()}
+
+    def governor_stats(self) -> Dict[str, Dict]:
+        stats = {}
+        for governor in self.governors.values():
+            lanes = [name for name, lane in self.lanes.items() if lane.governor is governor]
+            stats["+".join(lanes) or governor.name] = governor.stats()
+        return stats
+
+
+_llm_lanes: Optional[LLMLanes] = None
+
+
+def _governor_gauge(field_name: str):
+    def collect():
+        if _llm_lanes is None:
+            return {}
+        return {(name,): stats[field_name] for name, stats in _llm_lanes.governor_stats().items()}
+    return collect
+
+
+get_metrics_registry().gauge(
+    "llm_governor_in_flight", "LLM calls holding a rate-governor permit.", ["governor"], _governor_gauge("in_flight")
+)
+get_metrics_registry().gauge(
+    "llm_governor_queue_depth", "LLM calls waiting for a rate-governor permit.", ["governor"],
+    _governor_gauge("queue_depth"),
+)
+get_metrics_registry().gauge(
+    "llm_governor_concurrency_limit", "Current AIMD concurrency limit.", ["governor"],
+    _governor_gauge("concurrency_limit"),
+)
+
+
+def get_llm_lanes() -> LLMLanes:
+    global _llm_lanes
+    if _llm_lanes is None:
+        _llm_lanes = LLMLanes()
+    return _llm_lanes
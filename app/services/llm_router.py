@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.llm import BaseLLMProvider, LLMError, LLMProviderError
+from app.services.groq_provider import LLMClient
+from app.services.fake_provider import FakeLLMProvider
+from app.services.llm_lanes import CHAT_LANE, get_llm_lanes
+
+logger = logging.getLogger(__name__)
+
+# Failures that say "this backend, right now" rather than "this request"
+FAILOVER_ERRORS = (LLMError, httpx.TransportError)
+
+
+class BackendHealth:
+    """Rolling latency and error window for one backend, with a simple circuit breaker."""
+
+    def __init__(self, window: int = None, failure_threshold: int = None, cooldown: float = None):
+        window = window or settings.LLM_ROUTER_WINDOW
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.failure_threshold = failure_threshold or settings.LLM_ROUTER_FAILURE_THRESHOLD
+        self.cooldown = settings.LLM_ROUTER_COOLDOWN if cooldown is None else cooldown
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.last_used = 0.0
+        self.in_flight = 0
+
+    def record_success(self, latency: Optional[float] = None):
+        if latency is not None:
+            self.latencies.append(latency)
+        self.outcomes.append(True)
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.failure_threshold:
+            self.open_until = time.monotonic() + self.cooldown
+
+    def healthy(self, now: float) -> bool:
+        return self.open_until <= now
+
+    def stale(self, now: float) -> bool:
+        # Outranked backends get re-measured once per cooldown so they can win traffic back
+        return self.last_used > 0 and now - self.last_used > self.cooldown
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+        return ordered[index]
+
+    def score(self) -> float:
+        # Median latency inflated by recent errors; unmeasured backends rank last
+        p50 = self.percentile(50)
+        if p50 is None:
+            return math.inf
+        return p50 * (1.0 + 4.0 * self.error_rate)
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "healthy": self.healthy(now),
+            "open_for": round(max(self.open_until - now, 0.0), 3),
+            "samples": len(self.latencies),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "error_rate": round(self.error_rate, 4),
+            "consecutive_failures": self.consecutive_failures,
+            "in_flight": self.in_flight,
+        }
+
+
+@dataclass
+class RouterBackend:
+    name: str
+    provider: BaseLLMProvider
+    health: BackendHealth
+
+
+class LLMRouter(BaseLLMProvider):
+    """Routes each call to the fastest healthy backend.
+
+    Failover on provider errors (5xx, 429, rate-limit timeouts, transport
+    errors) is immediate: backends are called through `chat_once`, so no
+    tenacity backoff sits between a failing backend and the next one. With
+    hedging on, a call still running after the primary's p95 latency is
+    duplicated on the next backend and the first reply wins.
+    """
+
+    def __init__(self, backends: List[RouterBackend], hedge: bool = None):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend.")
+        self.backends = backends
+        self.hedge = settings.LLM_HEDGE_ENABLED if hedge is None else hedge
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    def _ranked(self) -> List[RouterBackend]:
+        now = time.monotonic()
+        order = {id(b): i for i, b in enumerate(self.backends)}
+        healthy = [b for b in self.backends if b.health.healthy(now)]
+        # Every circuit open: still try them, soonest-to-recover first
+        if not healthy:
+            return sorted(self.backends, key=lambda b: b.health.open_until)
+        return sorted(healthy, key=lambda b: (not b.health.stale(now), b.health.score(), order[id(b)]))
+
+    def _hedge_delay(self, backend: RouterBackend) -> float:
+        p = backend.health.percentile(settings.LLM_HEDGE_PERCENTILE)
+        return max(p or 0.0, settings.LLM_HEDGE_MIN_DELAY)
+
+    async def _call(self, backend: RouterBackend, messages: List[Dict], **kwargs) -> str:
+        backend.health.in_flight += 1
+        backend.health.last_used = time.monotonic()
+        started = time.perf_counter()
+        try:
+            reply = await backend.provider.chat_once(messages, **kwargs)
+        except FAILOVER_ERRORS:
+            backend.health.record_failure()
+            raise
+        finally:
+            backend.health.in_flight -= 1
+        backend.health.record_success(time.perf_counter() - started)
+        return reply
+
+    async def chat(self, messages: List[Dict], **kwargs) -> str:
+        candidates = self._ranked()
+        primary = candidates[0]
+        tasks: Dict[asyncio.Task, RouterBackend] = {}
+        last_error: Optional[BaseException] = None
+
+        def launch():
+            backend = candidates.pop(0)
+            tasks[asyncio.create_task(self._call(backend, messages, **kwargs))] = backend
+
+        launch()
+        can_hedge = self.hedge and bool(candidates)
+        hedged = False
+        try:
+            while tasks:
+                timeout = self._hedge_delay(primary) if can_hedge else None
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Primary is slower than its usual tail: race the next backend
+                    can_hedge, hedged = False, True
+                    self.hedged += 1
+                    launch()
+                    continue
+
+                outcomes = [(tasks.pop(task), task.exception(), task) for task in done]
+                for backend, error, task in outcomes:
+                    if error is None:
+                        if hedged and backend is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                for backend, error, _ in outcomes:
+                    if not isinstance(error, FAILOVER_ERRORS):
+                        raise error
+                    last_error = error
+                    logger.warning(f"LLM backend '{backend.name}' failed: {error}")
+
+                if not tasks and candidates:
+                    self.failovers += 1
+                    launch()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        raise last_error or LLMProviderError("All LLM backends failed.")
+
+    async def chat_once(self, messages: List[Dict], **kwargs) -> str:
+        return await self.chat(messages, **kwargs)
+
+    async def stream_chat(self, messages: List[Dict], **kwargs) -> AsyncIterator[str]:
+        # Fail over only until the first token has been forwarded; no hedging
+        last_error: Optional[BaseException] = None
+        for backend in self._ranked():
+            started = False
+            backend.health.in_flight += 1
+            backend.health.last_used = time.monotonic()
+            try:
+                async for delta in backend.provider.stream_chat(messages, **kwargs):
+                    started = True
+                    yield delta
+                backend.health.record_success()
+                return
+            except FAILOVER_ERRORS as e:
+                backend.health.record_failure()
+                if started:
+                    raise
+                last_error = e
+                self.failovers += 1
+                logger.warning(f"LLM backend '{backend.name}' failed before streaming: {e}")
+            finally:
+                backend.health.in_flight -= 1
+        raise last_error or LLMProviderError("All LLM backends failed.")
+
+    async def generate(self, system_prompt: str, user_message: str, **kwargs) -> str:
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
+        ]
+        return await self.chat(messages, **kwargs)
+
+    async def warm(self):
+        await asyncio.gather(*(b.provider.warm() for b in self.backends))
+
+    def stats(self) -> Dict:
+        return {
+            "hedge": self.hedge,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "backends": {b.name: b.health.stats() for b in self.backends},
+        }
+
+
+def build_llm_provider(lane: str = CHAT_LANE) -> BaseLLMProvider:
+    """Groq client for `lane`, wrapped in a router when a fallback backend is configured."""
+    if settings.LLM_PROVIDER == "fake":
+        return FakeLLMProvider()
+
+    primary = LLMClient(lane=lane)
+    if not settings.LLM_FALLBACK_BASE_URL:
+        return primary
+
+    http_pool, governor = get_llm_lanes().backend(lane, "fallback", settings.LLM_FALLBACK_API_KEY)
+    fallback = LLMClient(
+        lane=lane,
+        http_pool=http_pool,
+        governor=governor,
+        base_url=settings.LLM_FALLBACK_BASE_URL,
+        model=settings.LLM_FALLBACK_MODEL or None,
+        api_key=settings.LLM_FALLBACK_API_KEY,
+    )
+    return LLMRouter([
+        RouterBackend(name="groq", provider=primary, health=BackendHealth()),
+        RouterBackend(name="fallback", provider=fallback, health=BackendHealth()),
+    ])
@@ -0,0 +1,171 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.partitions import add_months, drop_month_partition, list_month_partitions, month_start
+from app.models.message import Message
+from app.repositories.message_repo import MessageRepository
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def session_archive_name(session_id: str) -> str:
+    # Readable prefix plus a hash so distinct ids never collide after sanitizing
+    digest = hashlib.sha1(session_id.encode("utf-8")).hexdigest()[:10]
+    return f"{_UNSAFE_CHARS.sub('_', session_id)[:64]}-{digest}.ndjson.gz"
+
+
+def archived_ids(month_dir: str) -> Set[str]:
+    """Message ids already present in a month's archive files."""
+    ids: Set[str] = set()
+    if not os.path.isdir(month_dir):
+        return ids
+    for name in os.listdir(month_dir):
+        if name.endswith(".ndjson.gz"):
+            with gzip.open(os.path.join(month_dir, name), "rt", encoding="utf-8") as f:
+                ids.update(json.loads(line)["id"] for line in f if line.strip())
+    return ids
+
+
+def message_record(message: Message) -> Dict:
+    return {
+        "id": str(message.id),
+        "session_id": message.session_id,
+        "role": message.role,
+        "content": message.content,
+        "prompt_version_id": str(message.prompt_version_id) if message.prompt_version_id else None,
+        "created_at": message.created_at.isoformat() if message.created_at else None,
+    }
+
+
+class MessageArchiver:
+    """Moves expired messages out of the hot table into gzipped NDJSON, one file per session per month.
+
+    Each run writes into a fresh staging directory and only then moves the
+    files into the month directory (a later run for the same session adds a
+    .partN file). Rows whose ids are already archived are skipped, so a rerun
+    after an interrupted write or delete never duplicates a line.
+    """
+
+    def __init__(self, engine: Engine, archive_dir: str = None, batch_size: int = None):
+        self.engine = engine
+        self.archive_dir = archive_dir or settings.MESSAGE_ARCHIVE_DIR
+        self.batch_size = batch_size or settings.MESSAGE_DELETE_BATCH_SIZE
+
+    def _expired_months(self, db: Session, cutoff: datetime) -> List[Tuple[datetime, datetime, Optional[str]]]:
+        """(lower, upper, partition) ranges to archive, oldest first."""
+        partitions = list_month_partitions(db.connection())
+        # Whole partitions only: a partition can be dropped once all of it has expired
+        ranges = [(lower, upper, name) for name, lower, upper in partitions if upper <= cutoff]
+
+        # Rows no month partition holds (unpartitioned table, default partition) go by chunked delete
+        partition_months = {lower for _, lower, _ in partitions}
+        outside = [~and_(Message.created_at >= lower, Message.created_at < upper) for _, lower, upper in partitions]
+        oldest = db.execute(
+            select(func.min(Message.created_at)).where(Message.created_at < cutoff, *outside)
+        ).scalar()
+        if oldest is not None:
+            lower = month_start(oldest)
+            while lower < cutoff:
+                upper = add_months(lower, 1)
+                if lower not in partition_months:
+                    ranges.append((lower, min(upper, cutoff), None))
+                lower = upper
+        return sorted(ranges, key=lambda r: r[0])
+
+    def _write_range(self, db: Session, lower: datetime, upper: datetime) -> Tuple[int, int]:
+        month_dir = os.path.join(self.archive_dir, f"{lower:%Y-%m}")
+        staging_dir = os.path.join(self.archive_dir, f".staging-{lower:%Y-%m}")
+        # Leftovers of an interrupted run are discarded; their rows are still in the table
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+        done = archived_ids(month_dir)
+
+        stmt = (
+            select(Message)
+            .where(Message.created_at >= lower, Message.created_at < upper)
+            .order_by(Message.session_id, Message.created_at, Message.id)
+            .execution_options(yield_per=self.batch_size)
+        )
+        rows = sessions = 0
+        current_session, handle = None, None
+        try:
+            # Sorted by session, so only one archive file is open at a time
+            for message in db.execute(stmt).scalars():
+                if str(message.id) in done:
+                    continue
+                if message.session_id != current_session:
+                    if handle is not None:
+                        handle.close()
+                    current_session = message.session_id
+                    path = os.path.join(staging_dir, session_archive_name(current_session))
+                    handle = gzip.open(path, "wt", encoding="utf-8")
+                    sessions += 1
+                handle.write(json.dumps(message_record(message), ensure_ascii=False) + "\n")
+                rows += 1
+        finally:
+            if handle is not None:
+                handle.close()
+
+        staged = os.listdir(staging_dir)
+        if staged:
+            os.makedirs(month_dir, exist_ok=True)
+        for name in staged:
+            self._publish(os.path.join(staging_dir, name), month_dir, name)
+        os.rmdir(staging_dir)
+        return rows, sessions
+
+    @staticmethod
+    def _publish(staged: str, month_dir: str, name: str):
+        # Never append to a published file: a later run for the session gets the next part
+        stem = name[:-len(".ndjson.gz")]
+        part, target = 1, os.path.join(month_dir, name)
+        while os.path.exists(target):
+            part += 1
+            target = os.path.join(month_dir, f"{stem}.part{part}.ndjson.gz")
+        os.replace(staged, target)
+
+    def archive(self, older_than_days: int = None, dry_run: bool = False) -> Dict:
+        older_than_days = older_than_days or settings.MESSAGE_RETENTION_DAYS
+        cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+        summary = {"cutoff": cutoff.isoformat(), "months": [], "rows": 0, "dry_run": dry_run}
+
+        with Session(self.engine) as db:
+            for lower, upper, partition in self._expired_months(db, cutoff):
+                month = {"month": f"{lower:%Y-%m}", "partition": partition}
+                if dry_run:
+                    month["rows"] = db.execute(
+                        select(func.count()).where(Message.created_at >= lower, Message.created_at < upper)
+                    ).scalar()
+                    summary["months"].append(month)
+                    summary["rows"] += month["rows"]
+                    continue
+
+                rows, sessions = self._write_range(db, lower, upper)
+                db.commit()
+                if partition:
+                    # Detach + drop is metadata-only: no row-by-row delete, no WAL bloat
+                    drop_month_partition(db.connection(), partition)
+                    db.commit()
+                else:
+                    MessageRepository(db).delete_in_batches(
+                        Message.created_at >= lower, Message.created_at < upper, batch_size=self.batch_size
+                    )
+                month.update(rows=rows, sessions=sessions)
+                summary["months"].append(month)
+                summary["rows"] += rows
+                logger.info(f"Archived {rows} messages from {month['month']} ({sessions} sessions).")
+        return summary
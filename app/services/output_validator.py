@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Lookback kept between chunks for regex rules without an explicit max_length
+DEFAULT_REGEX_MAX_LENGTH = 64
+
+
+class OutputValidationError(ValueError):
+    """Raised when generated text breaks a validation rule."""
+
+    def __init__(self, rule: str, message: str, position: int):
+        super().__init__(f"Validation failed: {message}")
+        self.rule = rule
+        self.position = position
+
+
+@dataclass
+class ValidationRule:
+    name: str
+    pattern: str
+    message: str
+    is_regex: bool = False
+    max_length: int = 0
+
+
+class OutputValidator:
+    """All rules compiled into one case-insensitive alternation, scanned in a single pass."""
+
+    def __init__(self, rules: List[ValidationRule]):
+        self.rules = rules
+        alternatives = [
+            f"(?P<r{i}>{rule.pattern if rule.is_regex else re.escape(rule.pattern)})"
+            for i, rule in enumerate(rules)
+        ]
+        self.matcher = re.compile("|".join(alternatives) or r"(?!)", re.IGNORECASE)
+        # A match can straddle a chunk boundary by at most this many characters
+        self.overlap = max((rule.max_length for rule in rules), default=1)
+
+    @classmethod
+    def from_file(cls, path: str) -> "OutputValidator":
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+        rules = []
+        for entry in config.get("rules", []):
+            is_regex = entry.get("type", "phrase") == "regex"
+            for pattern in entry.get("patterns", []):
+                max_length = entry.get("max_length") or (DEFAULT_REGEX_MAX_LENGTH if is_regex else len(pattern))
+                rules.append(ValidationRule(
+                    name=entry["name"],
+                    pattern=pattern,
+                    message=entry.get("message", "Rule '{name}' violated.").format(name=entry["name"], pattern=pattern),
+                    is_regex=is_regex,
+                    max_length=max_length,
+                ))
+        return cls(rules)
+
+    def _raise_for(self, match: re.Match, offset: int = 0):
+        rule = self.rules[int(match.lastgroup[1:])]
+        raise OutputValidationError(rule.name, rule.message, offset + match.start())
+
+    def validate(self, text: str):
+        match = self.matcher.search(text)
+        if match:
+            self._raise_for(match)
+
+    def stream(self) -> "StreamingValidation":
+        return StreamingValidation(self)
+
+
+class StreamingValidation:
+    """Incremental check over a streamed completion; only the new tail is rescanned."""
+
+    def __init__(self, validator: OutputValidator):
+        self.validator = validator
+        self.chunks: List[str] = []
+        self.length = 0
+        self.elapsed = 0.0
+        self._tail = ""
+
+    def feed(self, delta: str):
+        started = time.perf_counter()
+        try:
+            self._scan(delta)
+        finally:
+            self.elapsed += time.perf_counter() - started
+
+    def _scan(self, delta: str):
+        self.chunks.append(delta)
+        window = self._tail + delta
+        offset = self.length - len(self._tail)
+        self.length += len(delta)
+
+        match = self.validator.matcher.search(window)
+        if match:
+            self.validator._raise_for(match, offset)
+        self._tail = window[-(self.validator.overlap - 1):] if self.validator.overlap > 1 else ""
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+
+_validator_cache: Dict[str, Tuple[float, OutputValidator]] = {}
+
+
+def get_output_validator(path: Optional[str] = None) -> OutputValidator:
+    """Rules from `path` (EDITOR_VALIDATION_RULES_PATH), recompiled when the file changes."""
+    path = path or settings.EDITOR_VALIDATION_RULES_PATH
+    mtime = os.stat(path).st_mtime
+    cached = _validator_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        validator = OutputValidator.from_file(path)
+        logger.info(f"Loaded {len(validator.rules)} output validation rules from {path}.")
+        _validator_cache[path] = (mtime, validator)
+        return validator
+    return cached[1]
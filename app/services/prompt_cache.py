@@ -0,0 +1,114 @@
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.routing import use_primary
+from app.repositories.prompt_repo import AsyncPromptRepository
+
+
+def generate_prompt_preview(content: str, max_length: int = 160) -> str:
+    try:
+        if not content:
+            return ""
+        cleaned = " ".join(str(content).split())
+        if len(cleaned) <= max_length:
+            return cleaned
+        return cleaned[:max_length].rstrip() + "..."
+    except Exception:
+        return ""
+
+
+@dataclass(frozen=True)
+class ActivePromptSnapshot:
+    id: uuid.UUID
+    version: int
+    content: str
+    preview: str
+
+
+class ActivePromptCache:
+    """Process-local cache of the active prompt and its precomputed preview.
+
+    Within `check_interval` seconds the snapshot is served without touching the
+    DB. After that a cheap id-only query confirms the snapshot is still current,
+    which keeps separate uvicorn workers consistent. `invalidate()` forces the
+    next read to reload (activation, editor version bump).
+    """
+
+    def __init__(self, check_interval: float = None):
+        self.check_interval = settings.PROMPT_CACHE_CHECK_INTERVAL if check_interval is None else check_interval
+        self._snapshot: Optional[ActivePromptSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+        self.hits = 0
+        self.version_checks = 0
+        self.reloads = 0
+
+    def invalidate(self):
+        self._snapshot = None
+        self._checked_at = 0.0
+
+    async def get(self, db: AsyncSession) -> Optional[ActivePromptSnapshot]:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.check_interval:
+            self.hits += 1
+            return snapshot
+
+        # Read from the primary: a lagging replica could re-cache a just-replaced prompt
+        async with self._lock:
+            with use_primary(db):
+                repo = AsyncPromptRepository(db)
+
+                # Another waiter may have refreshed while we queued on the lock
+                snapshot = self._snapshot
+                if snapshot is not None and time.monotonic() - self._checked_at < self.check_interval:
+                    self.hits += 1
+                    return snapshot
+
+                if snapshot is not None:
+                    self.version_checks += 1
+                    current_id = await repo.get_current_prompt_id()
+                    if current_id == snapshot.id:
+                        self._checked_at = time.monotonic()
+                        return snapshot
+
+                # Active prompt with fallback to the latest version
+                self.reloads += 1
+                prompt = await repo.get_active_prompt() or await repo.get_latest_prompt()
+                if not prompt:
+                    self.invalidate()
+                    return None
+
+                self._snapshot = ActivePromptSnapshot(
+                    id=prompt.id,
+                    version=prompt.version or 1,
+                    content=prompt.content or "",
+                    preview=generate_prompt_preview(prompt.content or ""),
+                )
+                self._checked_at = time.monotonic()
+                return self._snapshot
+
+    def stats(self) -> Dict:
+        return {
+            "cached_version": self._snapshot.version if self._snapshot else None,
+            "check_interval": self.check_interval,
+            "hits": self.hits,
+            "version_checks": self.version_checks,
+            "reloads": self.reloads,
+        }
+
+
+_active_prompt_cache: Optional[ActivePromptCache] = None
+
+
+def get_active_prompt_cache() -> ActivePromptCache:
+    global _active_prompt_cache
+    if _active_prompt_cache is None:
+        _active_prompt_cache = ActivePromptCache()
+    return _active_prompt_cache
@@ -1,61 +1,27 @@
+import asyncio
+import hashlib
 import json
-import os
 import logging
-from typing import List, Dict, Tuple
-from sqlalchemy.orm import Session
-from app.repositories.prompt_repo import PromptRepository
-from app.repositories.message_repo import MessageRepository
-from app.services.groq_provider import LLMClient
+from typing import List, Dict, Tuple, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.llm import BaseLLMProvider
+from app.repositories.prompt_repo import AsyncPromptRepository
+from app.repositories.message_repo import AsyncMessageRepository
+from app.repositories.behavior_report_repo import AsyncBehaviorReportRepository
+from app.services.llm_router import FAILOVER_ERRORS, build_llm_provider
+from app.services.llm_lanes import EDITOR_LANE
+from app.services.prompt_cache import get_active_prompt_cache
+from app.services.corpus import get_conversation_corpus
+from app.services.context_builder import ContextBuilder, estimate_tokens, truncate_to_tokens
+from app.services.output_validator import OutputValidationError, get_output_validator
+from app.core.config import settings
+from app.core.timing import stage
+from app.core.metrics import STAGE_DURATION
 from app.models.prompt import Prompt
 
 logger = logging.getLogger(__name__)
 
-class PromptEditorService:
-    def __init__(self, db: Session):
-        self.db = db
-        self.prompt_repo = PromptRepository(db)
-        self.message_repo = MessageRepository(db)
-        self.llm_client = LLMClient()
-        self.max_chars = 8000
-
-    def _apply_payload_guard(self, text: str) -> str:
-        if len(text) > self.max_chars:
-            logger.warning(f"Payload Guard: Truncating input from {len(text)} to {self.max_chars} characters.")
-            return text[-self.max_chars:]
-        return text
-
-    def _validate_output(self, content: str):
-        forbidden = [
-            "Hello", "Welcome", "Please upload", "Our team", 
-            "We will review", "Service fee", "I am your", "I'm your",
-            "Please feel free", "I look forward", "Let me know"
-        ]
-        # Check for visa details / checklists (generalized indicators)
-        indicators = ["financial", "threshold", "document", "checklist", "procedure"]
-        
-        lower_content = content.lower()
-        for phrase in forbidden:
-            if phrase.lower() in lower_content:
-                raise ValueError(f"Validation failed: Forbidden phrase '{phrase}' detected.")
-        
-        # Check for conversational tone indicators
-        if any(greet in lower_content for greet in ["hi ", "hey ", "good morning", "good afternoon"]):
-            raise ValueError("Validation failed: Conversational tone detected.")
-
-    async def _extract_behavior_report(self, conversations: List[Dict]) -> str:
-        """STAGE 1: BEHAVIOR EXTRACTOR"""
-        assistant_msgs = []
-        for conv in conversations:
-            for msg in conv.get("conversation", []):
-                if msg.get("direction") == "out":
-                    assistant_msgs.append(msg.get("text", ""))
-        
-        # Limit to last 5 assistant responses
-        recent_msgs = assistant_msgs[-5:]
-        raw_text = "\n---\n".join(recent_msgs)
-        guarded_text = self._apply_payload_guard(raw_text)
-
-        instruction = """# ROLE: BEHAVIOR EXTRACTOR
+BEHAVIOR_EXTRACTOR_INSTRUCTION = """# ROLE: BEHAVIOR EXTRACTOR
 Extract behavioral patterns from assistant messages.
 Ignore user messages.
 Summarize patterns only.
@@ -71,36 +37,7 @@ Behavior Report:
 
 Output must be concise (under 1000 tokens)."""
 
-        report = await self.llm_client.generate(
-            system_prompt=instruction,
-            user_message=f"Assistant Messages:\n{guarded_text}"
-        )
-        
-        # Save report
-        report_path = "app/data/behavior_report.json"
-        with open(report_path, "w", encoding="utf-8") as f:
-            json.dump({"report": report}, f, indent=2)
-            
-        return report
-
-    async def run_editor(self, session_id: str = None, triggered_by: str = "manual", history_limit: int = 15):
-        # 1. Fetch active prompt
-        active_prompt = self.prompt_repo.get_active_prompt()
-        if not active_prompt:
-            raise ValueError("No active prompt found.")
-
-        # 2. Stage 1: Load and Extract Behavior
-        examples_path = "app/data/conversations.json"
-        if not os.path.exists(examples_path):
-            raise FileNotFoundError(f"Behavioral reference missing: {examples_path}")
-        
-        with open(examples_path, 'r', encoding='utf-8') as f:
-            raw_conversations = json.load(f)
-            
-        behavior_report = await self._extract_behavior_report(raw_conversations)
-
-        # 3. Stage 2: Rule Improver
-        editor_system_prompt = """# ROLE: Senior AI Systems Architect
+RULE_IMPROVER_INSTRUCTION = """# ROLE: Senior AI Systems Architect
 You are improving a SYSTEM PROMPT by identifying behavioral gaps.
 Do NOT generate answers. Edit the RULES only.
 
@@ -113,6 +50,129 @@ Do NOT generate answers. Edit the RULES only.
 
 Return ONLY the improved SYSTEM PROMPT text. No markdown, no commentary."""
 
+BEHAVIOR_REPORT_PATH = "app/data/behavior_report.json"
+
+
+def behavior_report_digest(instruction: str, guarded_text: str) -> str:
+    return hashlib.sha256(f"{instruction}\x00{guarded_text}".encode("utf-8")).hexdigest()
+
+
+def write_behavior_report(report: str, path: str = BEHAVIOR_REPORT_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"report": report}, f, indent=2)
+
+
+class PromptEditorService:
+    def __init__(self, db: AsyncSession, llm_client: Optional[BaseLLMProvider] = None):
+        self.db = db
+        self.prompt_repo = AsyncPromptRepository(db)
+        self.message_repo = AsyncMessageRepository(db)
+        self.report_repo = AsyncBehaviorReportRepository(db)
+        self.llm_client = llm_client or build_llm_provider(EDITOR_LANE)
+        self.corpus = get_conversation_corpus()
+        self.context_builder = ContextBuilder()
+        self.max_tokens = min(settings.EDITOR_MAX_INPUT_TOKENS, self.context_builder.budget)
+
+    def _apply_payload_guard(self, text: str) -> str:
+        tokens = estimate_tokens(text)
+        if tokens > self.max_tokens:
+            logger.warning(f"Payload Guard: Truncating input from ~{tokens} to {self.max_tokens} tokens.")
+            return truncate_to_tokens(text, self.max_tokens, keep="tail")
+        return text
+
+    def _validate_output(self, content: str):
+        # Rules live in EDITOR_VALIDATION_RULES_PATH, compiled into one matcher
+        get_output_validator().validate(content)
+
+    async def _generate_buffered(self, system_prompt: str, user_message: str) -> str:
+        # generate() goes through the provider's retry/backoff policy
+        content = await self.llm_client.generate(system_prompt=system_prompt, user_message=user_message)
+        with stage("validation"):
+            self._validate_output(content.strip())
+        return content
+
+    async def _generate_validated(self, system_prompt: str, user_message: str) -> str:
+        """Stage 2 generation, cancelled at the first rule violation when streaming."""
+        if not settings.EDITOR_STREAM_VALIDATION:
+            return await self._generate_buffered(system_prompt, user_message)
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
+        ]
+        validation = get_output_validator().stream()
+        stream = self.llm_client.stream_chat(messages)
+        try:
+            async for delta in stream:
+                validation.feed(delta)
+        except OutputValidationError as e:
+            logger.info(f"Editor Stage 2 aborted after {validation.length} chars ({e.rule}).")
+            raise
+        except FAILOVER_ERRORS as e:
+            # Streams are not retried; before the first token the buffered path can still retry
+            if validation.length:
+                raise
+            logger.warning(f"Editor Stage 2 stream failed before the first token ({e}); retrying buffered.")
+        else:
+            return validation.text
+        finally:
+            # Closing the stream releases the provider connection mid-generation
+            await stream.aclose()
+            STAGE_DURATION.observe(validation.elapsed, stage="validation")
+        return await self._generate_buffered(system_prompt, user_message)
+
+    async def _collect_assistant_messages(self) -> List[str]:
+        sample = settings.EDITOR_BEHAVIOR_SAMPLE
+        source = settings.EDITOR_BEHAVIOR_SOURCE
+        messages = []
+
+        if source in ("corpus", "both"):
+            await self.corpus.ensure_fresh()
+            messages.extend(self.corpus.recent("out", sample))
+
+        if source in ("live", "both"):
+            messages.extend(await self.corpus.recent_live_assistant_turns(self.db, sample))
+
+        return messages[-sample:]
+
+    async def _extract_behavior_report(self, recent_msgs: List[str]) -> str:
+        """STAGE 1: BEHAVIOR EXTRACTOR"""
+        # Drop whole older messages rather than cutting one mid-way
+        guarded_text = self.context_builder.fit_texts(recent_msgs, self.max_tokens, separator="\n---\n")
+
+        # Identical input + instruction -> reuse the stored report
+        digest = behavior_report_digest(BEHAVIOR_EXTRACTOR_INSTRUCTION, guarded_text)
+        report = None
+        if settings.BEHAVIOR_REPORT_CACHE_ENABLED:
+            report = await self.report_repo.get_report(digest)
+
+        if report is None:
+            report = await self.llm_client.generate(
+                system_prompt=BEHAVIOR_EXTRACTOR_INSTRUCTION,
+                user_message=f"Assistant Messages:\n{guarded_text}"
+            )
+            if settings.BEHAVIOR_REPORT_CACHE_ENABLED:
+                await self.report_repo.save_report(digest, report, settings.BEHAVIOR_REPORT_CACHE_MAX_ENTRIES)
+        else:
+            logger.info("Behavior report cache hit; skipping Stage 1 LLM call.")
+
+        # Save report without blocking the event loop
+        await asyncio.to_thread(write_behavior_report, report)
+
+        return report
+
+    async def run_editor(self, session_id: str = None, triggered_by: str = "manual", history_limit: int = 15):
+        # 1. Fetch active prompt
+        active_prompt = await self.prompt_repo.get_active_prompt()
+        if not active_prompt:
+            raise ValueError("No active prompt found.")
+
+        # 2. Stage 1: Sample recent assistant turns and extract behavior
+        with stage("editor_stage1"):
+            recent_msgs = await self._collect_assistant_messages()
+            behavior_report = await self._extract_behavior_report(recent_msgs)
+
+        # 3. Stage 2: Rule Improver
         editor_user_message = f"""# INPUT 1: CURRENT SYSTEM PROMPT
 {active_prompt.content}
 
@@ -127,29 +187,22 @@ Analyze inputs and reinforce the SYSTEM PROMPT rules."""
         # Retry logic for Stage 2
         for attempt in range(2):
             try:
-                new_content = await self.llm_client.generate(
-                    system_prompt=editor_system_prompt,
-                    user_message=guarded_user_message
-                )
+                with stage("editor_stage2"):
+                    new_content = await self._generate_validated(RULE_IMPROVER_INSTRUCTION, guarded_user_message)
                 
                 cleaned_content = new_content.strip()
-                self._validate_output(cleaned_content)
                 
-                # Atomic Evolution
+                # Atomic Evolution: allocate the next version and activate it in one transaction
                 try:
-                    self.db.query(Prompt).update({Prompt.is_active: False})
-                    latest_v = self.prompt_repo.get_latest_version() or 0
-                    new_prompt = self.prompt_repo.create_prompt(
-                        version=latest_v + 1,
+                    new_prompt = await self.prompt_repo.create_next_version(
                         content=cleaned_content,
-                        is_active=True,
-                        triggered_by=triggered_by
+                        triggered_by=triggered_by,
+                        activate=True
                     )
-                    self.db.commit()
-                    self.db.refresh(new_prompt)
+                    get_active_prompt_cache().invalidate()
                     return new_prompt
                 except Exception:
-                    self.db.rollback()
+                    await self.db.rollback()
                     raise
                     
             except ValueError as e:
@@ -163,6 +216,24 @@ Analyze inputs and reinforce the SYSTEM PROMPT rules."""
 
         return active_prompt
 
+    async def rewrite_from_examples(self, current_prompt: str, examples: List[Dict]) -> str:
+        """Stage 2 driven by offline-eval misses instead of a behavior report; nothing is saved."""
+        formatted = "\n---\n".join(
+            f"User: {e['user_message']}\nExpected: {e['real_reply']}\nGot: {e['predicted_reply']}"
+            for e in examples
+        )
+        user_message = f"""# INPUT 1: CURRENT SYSTEM PROMPT
+{current_prompt}
+
+# INPUT 2: WEAK REPLIES (expected vs. generated)
+{formatted}
+
+Analyze inputs and reinforce the SYSTEM PROMPT rules."""
+
+        with stage("editor_stage2"):
+            content = await self._generate_validated(RULE_IMPROVER_INSTRUCTION, self._apply_payload_guard(user_message))
+        return content.strip()
+
     async def suggest_improvement(self, history_limit: int = 15):
         """Maintains backward compatibility for /edit endpoint"""
         return await self.run_editor(triggered_by="manual", history_limit=history_limit)
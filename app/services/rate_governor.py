@@ -0,0 +1,312 @@
+import asyncio
+import bisect
+import itertools
+import logging
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional
+
+from app.core.config import settings
+from app.core.llm import LLMRateLimitTimeout
+
+logger = logging.getLogger(__name__)
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse provider reset/retry values: '7.66s', '2m59.56s', '120ms' or plain seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _UNIT_SECONDS[unit] for amount, unit in parts)
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    try:
+        return int(float(headers[name]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def refill(self, now: float):
+        if self.enabled:
+            self.level = min(self.capacity, self.level + (now - self._updated) * self.capacity / 60.0)
+        self._updated = now
+
+    def wait_time(self, amount: float, share: float = 1.0) -> float:
+        """Seconds until `amount` can be taken without dipping into the (1 - share) reserve."""
+        if not self.enabled:
+            return 0.0
+        needed = min(amount + self.capacity * (1.0 - share), self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) * 60.0 / self.capacity
+
+    def take(self, amount: float):
+        if self.enabled:
+            self.level -= min(amount, self.capacity)
+
+
+@dataclass
+class Permit:
+    tokens: int
+    granted_at: float
+    lane: str = "default"
+
+
+@dataclass
+class LanePolicy:
+    priority: int = 0  # lower dispatches first
+    max_concurrency: Optional[int] = None
+    share: float = 1.0  # fraction of the credential's budgets this lane may drain
+    in_flight: int = 0
+    granted: int = 0
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    lane: str = field(compare=False)
+    tokens: int = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class RateGovernor:
+    """Shared client-side governor for one provider credential.
+
+    Callers queue for a permit by lane priority, FIFO within a lane. A permit
+    needs a free concurrency slot (AIMD: halved on 429, +1 per window of
+    successes), a free slot under the lane's own cap, a request-bucket slot and
+    enough token budget outside the reserve kept for higher-priority lanes.
+    Provider headers (x-ratelimit-*, retry-after) resync the buckets and pause
+    dispatch until the advertised reset.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        max_concurrency: int = None,
+        requests_per_minute: int = None,
+        tokens_per_minute: int = None,
+        queue_timeout: float = None,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        self.limit = float(self.max_concurrency)
+        self.requests = TokenBucket(settings.LLM_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute)
+        self.tokens = TokenBucket(settings.LLM_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute)
+        self.queue_timeout = settings.LLM_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+
+        self.in_flight = 0
+        self.reserved_tokens = 0
+        self.blocked_until = 0.0
+        self.lanes: Dict[str, LanePolicy] = {}
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+        self.granted = 0
+        self.throttled = 0
+        self.timeouts = 0
+
+    def add_lane(self, lane: str, priority: int = 0, max_concurrency: Optional[int] = None, share: float = 1.0):
+        self.lanes[lane] = LanePolicy(priority=priority, max_concurrency=max_concurrency, share=share)
+
+    def _lane(self, lane: str) -> LanePolicy:
+        if lane not in self.lanes:
+            self.add_lane(lane)
+        return self.lanes[lane]
+
+    # Acquire / release
+
+    async def acquire(self, tokens: int = 0, timeout: Optional[float] = None, lane: str = "default") -> Permit:
+        loop = asyncio.get_running_loop()
+        policy = self._lane(lane)
+        waiter = _Waiter(
+            priority=policy.priority, seq=next(self._seq), lane=lane, tokens=tokens, future=loop.create_future()
+        )
+        bisect.insort(self._waiters, waiter)
+        self._dispatch()
+
+        timeout = self.queue_timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter.future), timeout=timeout or None)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted while we were giving up: hand the slot back
+                self.release(waiter.future.result())
+            else:
+                waiter.future.cancel()
+            self._dispatch()
+            if isinstance(e, asyncio.TimeoutError):
+                self.timeouts += 1
+                raise LLMRateLimitTimeout(
+                    f"No LLM rate-limit slot on '{self.name}' (lane '{lane}') within {timeout}s."
+                ) from e
+            raise
+
+    def release(
+        self,
+        permit: Permit,
+        status_code: Optional[int] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        used_tokens: Optional[int] = None,
+    ):
+        self.in_flight = max(self.in_flight - 1, 0)
+        policy = self._lane(permit.lane)
+        policy.in_flight = max(policy.in_flight - 1, 0)
+        self.reserved_tokens = max(self.reserved_tokens - permit.tokens, 0)
+        now = time.monotonic()
+
+        if status_code == 429:
+            self.throttled += 1
+            self.limit = max(1.0, self.limit / 2)
+            retry_after = parse_duration((headers or {}).get("retry-after")) or 1.0
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+            logger.warning(f"Governor '{self.name}': 429, concurrency -> {int(self.limit)}, paused {retry_after:.1f}s.")
+        elif status_code is not None and status_code < 400:
+            self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+
+        # Rejected calls consume nothing; otherwise refund the over-reservation
+        if used_tokens is None and status_code is not None and status_code >= 400:
+            used_tokens = 0
+        if used_tokens is not None and permit.tokens > used_tokens:
+            self.tokens.refill(now)
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + permit.tokens - used_tokens)
+
+        if headers:
+            self._sync_headers(headers, now)
+        self._dispatch()
+
+    def _sync_headers(self, headers: Mapping[str, str], now: float):
+        # Groq: *-tokens are per minute, *-requests are per day
+        limit_tokens = _header_int(headers, "x-ratelimit-limit-tokens")
+        if limit_tokens and limit_tokens != self.tokens.capacity:
+            self.tokens.refill(now)
+            self.tokens.capacity = float(limit_tokens)
+        remaining_tokens = _header_int(headers, "x-ratelimit-remaining-tokens")
+        if remaining_tokens is not None and self.tokens.enabled:
+            # The provider's count excludes calls still in flight on our side
+            self.tokens.refill(now)
+            self.tokens.level = min(self.tokens.capacity, float(remaining_tokens - self.reserved_tokens))
+
+        remaining_requests = _header_int(headers, "x-ratelimit-remaining-requests")
+        if remaining_requests == 0:
+            reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+            if reset:
+                self.blocked_until = max(self.blocked_until, now + reset)
+
+    # Scheduling
+
+    def _wait_time(self, waiter: _Waiter, policy: LanePolicy, now: float) -> float:
+        if self.in_flight >= int(self.limit):
+            return math.inf  # woken by release()
+        return max(
+            self.blocked_until - now,
+            self.requests.wait_time(1, policy.share),
+            self.tokens.wait_time(waiter.tokens, policy.share),
+            0.0,
+        )
+
+    def _dispatch(self):
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        self._waiters = [w for w in self._waiters if not w.future.done()]
+
+        index = 0
+        while index < len(self._waiters):
+            waiter = self._waiters[index]
+            policy = self._lane(waiter.lane)
+            if policy.max_concurrency is not None and policy.in_flight >= policy.max_concurrency:
+                # Lane is at its own cap; it must not hold up other lanes
+                index += 1
+                continue
+
+            wait = self._wait_time(waiter, policy, now)
+            if wait > 0:
+                # Nobody overtakes a blocked waiter of equal or higher priority
+                if wait != math.inf:
+                    self._schedule_wakeup(wait)
+                return
+
+            self._waiters.pop(index)
+            self.requests.take(1)
+            self.tokens.take(waiter.tokens)
+            self.in_flight += 1
+            self.reserved_tokens += waiter.tokens
+            self.granted += 1
+            policy.in_flight += 1
+            policy.granted += 1
+            waiter.future.set_result(Permit(tokens=waiter.tokens, granted_at=now, lane=waiter.lane))
+
+    def _schedule_wakeup(self, delay: float):
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+        self._wakeup = asyncio.get_running_loop().call_later(delay, self._on_wakeup)
+
+    def _on_wakeup(self):
+        self._wakeup = None
+        self._dispatch()
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        return {
+            "name": self.name,
+            "concurrency_limit": int(self.limit),
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queue_depth": sum(1 for w in self._waiters if not w.future.done()),
+            "lanes": {
+                name: {
+                    "priority": policy.priority,
+                    "max_concurrency": policy.max_concurrency,
+                    "share": policy.share,
+                    "in_flight": policy.in_flight,
+                    "queued": sum(1 for w in self._waiters if w.lane == name and not w.future.done()),
+                    "granted": policy.granted,
+                }
+                for name, policy in self.lanes.items()
+            },
+            "requests_per_minute": self.requests.capacity,
+            "request_budget": round(self.requests.level, 2) if self.requests.enabled else None,
+            "tokens_per_minute": self.tokens.capacity,
+            "token_budget": round(self.tokens.level, 2) if self.tokens.enabled else None,
+            "reserved_tokens": self.reserved_tokens,
+            "paused_for": round(max(self.blocked_until - now, 0.0), 3),
+            "granted": self.granted,
+            "throttled": self.throttled,
+            "timeouts": self.timeouts,
+        }
+
+
+_rate_governor: Optional[RateGovernor] = None
+
+
+def get_rate_governor() -> RateGovernor:
+    global _rate_governor
+    if _rate_governor is None:
+        _rate_governor = RateGovernor()
+    return _rate_governor
@@ -0,0 +1,91 @@
+import re
+from collections import defaultdict
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def tokenize(text: str, ngram_max: int = 2) -> List[str]:
+    words = _WORD.findall((text or "").lower())
+    terms = list(words)
+    for n in range(2, ngram_max + 1):
+        terms.extend(map(" ".join, zip(*(words[i:] for i in range(n)))))
+    return terms
+
+
+class ReplyScorer:
+    """TF-IDF cosine similarity between predicted and real replies, computed in one batch.
+
+    Documents are kept as sparse (doc, term, weight) arrays, so memory grows
+    with the number of distinct terms per reply, not corpus size x vocabulary.
+    """
+
+    def __init__(self, ngram_max: int = None):
+        self.ngram_max = ngram_max or settings.EVAL_SCORER_NGRAM_MAX
+
+    def _weights(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(doc, term, tf-idf) per distinct term of each document, rows L2-normalised."""
+        # Unseen terms get the next id; map() keeps the per-term lookup in C
+        vocabulary = defaultdict()
+        vocabulary.default_factory = vocabulary.__len__
+        lengths, term_ids = [], []
+        for text in texts:
+            terms = tokenize(text, self.ngram_max)
+            lengths.append(len(terms))
+            term_ids.extend(map(vocabulary.__getitem__, terms))
+        if not term_ids:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0)
+
+        # Collapse repeated terms into counts
+        doc_ids = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+        keys = doc_ids * len(vocabulary) + np.asarray(term_ids, dtype=np.int64)
+        keys, counts = np.unique(keys, return_counts=True)
+        docs, terms = np.divmod(keys, len(vocabulary))
+
+        # Sublinear tf, smoothed idf over every reply in the batch
+        document_frequency = np.bincount(terms, minlength=len(vocabulary))
+        idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1.0
+        weights = (1.0 + np.log(counts)) * idf[terms]
+
+        norms = np.sqrt(np.bincount(docs, weights=weights ** 2, minlength=len(texts)))
+        weights = weights / norms[docs]
+        return docs, terms, weights
+
+    def score_pairs(self, predicted: Sequence[str], real: Sequence[str]) -> np.ndarray:
+        """Cosine similarity of predicted[i] vs real[i], in [0, 1]."""
+        if len(predicted) != len(real):
+            raise ValueError("predicted and real must have the same length.")
+        n = len(predicted)
+        if n == 0:
+            return np.zeros(0)
+
+        docs, terms, weights = self._weights(list(predicted) + list(real))
+        vocabulary_size = int(terms.max()) + 1 if terms.size else 1
+
+        # Pair i is doc i (predicted) and doc n + i (real); match them on (pair, term)
+        is_real = docs >= n
+        pair = np.where(is_real, docs - n, docs)
+        keys = pair * vocabulary_size + terms
+        _, left, right = np.intersect1d(keys[~is_real], keys[is_real], assume_unique=True, return_indices=True)
+        products = weights[~is_real][left] * weights[is_real][right]
+        scores = np.bincount(pair[~is_real][left], weights=products, minlength=n)
+        return np.clip(scores, 0.0, 1.0)
+
+    def similarity_matrix(self, left: Sequence[str], right: Sequence[str]) -> np.ndarray:
+        """Dense len(left) x len(right) cosine matrix; for small sets such as nearest-reply lookups."""
+        docs, terms, weights = self._weights(list(left) + list(right))
+        vocabulary_size = int(terms.max()) + 1 if terms.size else 1
+        vectors = np.zeros((len(left) + len(right), vocabulary_size))
+        vectors[docs, terms] = weights
+        return vectors[:len(left)] @ vectors[len(left):].T
+
+
+def borderline_mask(scores: np.ndarray, low: Optional[float] = None, high: Optional[float] = None) -> np.ndarray:
+    low = settings.EVAL_JUDGE_BAND_LOW if low is None else low
+    high = settings.EVAL_JUDGE_BAND_HIGH if high is None else high
+    return (scores >= low) & (scores <= high)
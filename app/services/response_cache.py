@@ -0,0 +1,96 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(str(text or "").lower().split())
+
+
+class ResponseCache:
+    """TTL + LRU cache of replies keyed by prompt id and normalized context.
+
+    Only turns with little or no prior history are cacheable; anything longer is
+    a real conversation and always goes to the LLM.
+    """
+
+    def __init__(self, max_entries: int = None, ttl: float = None, max_history: int = None):
+        self.max_entries = max_entries or settings.RESPONSE_CACHE_MAX_ENTRIES
+        self.ttl = settings.RESPONSE_CACHE_TTL if ttl is None else ttl
+        self.max_history = settings.RESPONSE_CACHE_MAX_HISTORY if max_history is None else max_history
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    def make_key(self, prompt_id, llm_messages: List[Dict]) -> Optional[str]:
+        # System prompt is covered by prompt_id; the last message is the current turn
+        turns = [m for m in llm_messages if m.get("role") != "system"]
+        if not turns or len(turns) - 1 > self.max_history:
+            self.bypassed += 1
+            return None
+
+        digest = hashlib.sha256(str(prompt_id).encode("utf-8"))
+        for m in turns:
+            digest.update(b"\x1f")
+            digest.update(f"{m.get('role')}:{normalize_text(m.get('content'))}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, reply = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return reply
+
+    def put(self, key: Optional[str], reply: str):
+        if key is None or not reply:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, reply)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Shared cache when RESPONSE_CACHE_ENABLED is set, otherwise None."""
+    global _response_cache
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
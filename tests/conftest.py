@@ -0,0 +1,88 @@
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+# Settings are read at import time (engines on first use): point them at a throwaway
+# SQLite file and offline keys before anything under app.* is imported.
+_TEST_DB = Path(tempfile.mkdtemp(prefix="app_tests_")) / "test.db"
+os.environ["DATABASE_URL"] = f"sqlite:///{_TEST_DB}"
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("EDITOR_GROQ_API_KEY", "test")
+os.environ.pop("DATABASE_READ_URL", None)
+
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+
+class FakeClock:
+    """Stands in for the `time` module inside the module under test."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    perf_counter = monotonic
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def fake_clock():
+    """Unpatched clock; tests swap it in for their module's `time`."""
+    return FakeClock()
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    """Fresh SQLite file with every model table created."""
+    from app import models  # noqa: F401  # Ensure models are registered
+    from app.core.database import Base
+
+    path = tmp_path / "app.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    return path
+
+
+@pytest.fixture
+def session_factory(database_path):
+    # NullPool: each test's asyncio.run() has its own loop, so connections must not outlive it
+    engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+    return async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+def prompt_cache(monkeypatch):
+    """Fresh process-wide active prompt cache, so no snapshot leaks between test databases."""
+    from app.services import prompt_cache as prompt_cache_module
+
+    cache = prompt_cache_module.ActivePromptCache()
+    monkeypatch.setattr(prompt_cache_module, "_active_prompt_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def active_prompt(session_factory):
+    """Version 1, stored and active."""
+    from app.models.prompt import Prompt
+
+    async def create():
+        async with session_factory() as db:
+            prompt = Prompt(version=1, content="You are a concise visa assistant.", is_active=True)
+            db.add(prompt)
+            await db.commit()
+            return prompt
+
+    return asyncio.run(create())
@@ -0,0 +1,101 @@
+import asyncio
+import json
+from typing import AsyncIterator, Dict, List
+
+import pytest
+from sqlalchemy import select
+
+from app.api.routes import ChatRequest, chat_stream
+from app.core import database
+from app.core.llm import BaseLLMProvider
+from app.models.message import Message
+
+
+class StreamingProvider(BaseLLMProvider):
+    def __init__(self, deltas: List[str], hold_after: int = None):
+        self.deltas = deltas
+        self.hold_after = hold_after
+        self.closed = False
+
+    async def generate(self, system_prompt: str, user_message: str, **kwargs) -> str:
+        return "".join(self.deltas)
+
+    async def chat(self, messages: List[Dict], **kwargs) -> str:
+        return "".join(self.deltas)
+
+    async def stream_chat(self, messages: List[Dict], **kwargs) -> AsyncIterator[str]:
+        try:
+            for i, delta in enumerate(self.deltas):
+                if i == self.hold_after:
+                    # Slow model: the client goes away while we wait here
+                    await asyncio.sleep(60)
+                yield delta
+        finally:
+            self.closed = True
+
+
+class RecordingWorker:
+    def __init__(self):
+        self.jobs = []
+
+    def enqueue(self, **kwargs):
+        self.jobs.append(kwargs)
+        return None
+
+
+def parse_event(raw: str):
+    event, data = raw.strip().split("\n")
+    return event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+@pytest.fixture
+def stream_db(session_factory, prompt_cache, active_prompt, monkeypatch):
+    # The stream opens its own session rather than the request-scoped one
+    monkeypatch.setattr(database, "AsyncSessionLocal", session_factory)
+    return session_factory
+
+
+def stored_messages(session_factory) -> List[Message]:
+    async def load():
+        async with session_factory() as db:
+            return list((await db.execute(select(Message).order_by(Message.created_at))).scalars())
+
+    return asyncio.run(load())
+
+
+def test_tokens_then_meta_then_done(stream_db, active_prompt):
+    provider = StreamingProvider(["Hello", " there", "."])
+
+    async def collect():
+        response = await chat_stream(ChatRequest(session_id="s1", message="Hi"), provider, RecordingWorker())
+        assert response.media_type == "text/event-stream"
+        return [parse_event(raw) async for raw in response.body_iterator]
+
+    events = asyncio.run(collect())
+
+    assert [name for name, _ in events] == ["token", "token", "token", "meta", "done"]
+    assert "".join(data["delta"] for name, data in events if name == "token") == "Hello there."
+    assert events[3][1] == {"prompt_version": 1, "prompt_preview": active_prompt.content}
+
+    # Persisted once the stream completed
+    messages = stored_messages(stream_db)
+    assert [(m.role, m.content) for m in messages] == [("user", "Hi"), ("assistant", "Hello there.")]
+    assert messages[1].prompt_version_id == active_prompt.id
+
+
+def test_client_disconnect_closes_the_provider_stream(stream_db):
+    provider = StreamingProvider(["Hello", " there", "."], hold_after=1)
+
+    async def disconnect_after_first_token():
+        response = await chat_stream(ChatRequest(session_id="s1", message="Hi"), provider, RecordingWorker())
+        events = response.body_iterator
+        first = parse_event(await events.__anext__())
+        # Starlette closes the body iterator when the client goes away
+        await events.aclose()
+        # Closed right away, not left for loop shutdown to finalize
+        assert provider.closed
+        return first
+
+    assert asyncio.run(disconnect_after_first_token()) == ("token", {"delta": "Hello"})
+    # An abandoned turn writes nothing
+    assert stored_messages(stream_db) == []
@@ -0,0 +1,125 @@
+import asyncio
+from typing import Dict, List
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.llm import BaseLLMProvider, LLMProviderError
+from app.models.message import Message
+from app.repositories import message_buffer
+from app.repositories.message_buffer import MessageWriteBuffer
+from app.repositories.session_stats_repo import AsyncSessionStatsRepository
+from app.services.generator_service import GeneratorService
+
+
+class EchoProvider(BaseLLMProvider):
+    def __init__(self, error: Exception = None):
+        self.error = error
+
+    async def generate(self, system_prompt: str, user_message: str, **kwargs) -> str:
+        return await self.chat([{"role": "system", "content": system_prompt}, {"role": "user", "content": user_message}])
+
+    async def chat(self, messages: List[Dict], **kwargs) -> str:
+        if self.error:
+            raise self.error
+        return f"re: {messages[-1]['content']}"
+
+
+@pytest.fixture
+def write_buffer(monkeypatch):
+    """Install a shared write buffer; tests choose the session factory it commits through."""
+
+    def install(session_factory) -> MessageWriteBuffer:
+        buffer = MessageWriteBuffer(session_factory=session_factory, max_delay_ms=200)
+        monkeypatch.setattr(settings, "MESSAGE_WRITE_BUFFER", True)
+        monkeypatch.setattr(message_buffer, "_message_write_buffer", buffer)
+        return buffer
+
+    return install
+
+
+async def turn(session_factory, provider, session_id: str, content: str) -> str:
+    async with session_factory() as db:
+        return await GeneratorService(db, provider, unit_of_work=True).generate(session_id, content)
+
+
+async def stored(session_factory, session_id: str):
+    async with session_factory() as db:
+        messages = (await db.execute(
+            select(Message).where(Message.session_id == session_id).order_by(Message.created_at)
+        )).scalars().all()
+        stats = await AsyncSessionStatsRepository(db).get(session_id)
+        return list(messages), stats
+
+
+def test_unit_of_work_writes_user_and_assistant_together(session_factory, prompt_cache, active_prompt):
+    async def scenario():
+        reply = await turn(session_factory, EchoProvider(), "s1", "Hi")
+        return reply, await stored(session_factory, "s1")
+
+    reply, (messages, stats) = asyncio.run(scenario())
+
+    assert reply == "re: Hi"
+    assert [(m.role, m.content) for m in messages] == [("user", "Hi"), ("assistant", "re: Hi")]
+    assert messages[0].prompt_version_id is None
+    assert messages[1].prompt_version_id == active_prompt.id
+    # Server defaults came back without a refresh
+    assert all(m.id is not None and m.created_at is not None for m in messages)
+    assert (stats.user_message_count, stats.assistant_message_count) == (1, 1)
+
+
+def test_failed_llm_call_leaves_no_half_turn(session_factory, prompt_cache, active_prompt):
+    async def scenario():
+        with pytest.raises(LLMProviderError):
+            await turn(session_factory, EchoProvider(LLMProviderError("Server error: 503")), "s1", "Hi")
+        return await stored(session_factory, "s1")
+
+    messages, stats = asyncio.run(scenario())
+
+    # The user message is not left behind without its reply
+    assert messages == []
+    assert stats is None
+
+
+def test_write_buffer_commits_concurrent_turns_in_one_batch(session_factory, prompt_cache, active_prompt, write_buffer):
+    buffer = write_buffer(session_factory)
+    session_ids = ["s1", "s2", "s3"]
+
+    async def scenario():
+        replies = await asyncio.gather(*(turn(session_factory, EchoProvider(), sid, f"Hi from {sid}") for sid in session_ids))
+        return replies, [await stored(session_factory, sid) for sid in session_ids]
+
+    replies, results = asyncio.run(scenario())
+
+    assert replies == [f"re: Hi from {sid}" for sid in session_ids]
+    assert (buffer.batches, buffer.rows_written) == (1, 6)
+    for sid, (messages, stats) in zip(session_ids, results):
+        assert [m.role for m in messages] == ["user", "assistant"]
+        assert (stats.user_message_count, stats.assistant_message_count) == (1, 1)
+
+
+def test_failed_buffer_flush_fails_every_waiting_turn(session_factory, prompt_cache, active_prompt, write_buffer, tmp_path):
+    # No tables behind this factory, so the batch INSERT fails
+    broken = async_sessionmaker(
+        bind=create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'empty.db'}", poolclass=NullPool),
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
+    buffer = write_buffer(broken)
+
+    async def scenario():
+        outcomes = await asyncio.gather(
+            turn(session_factory, EchoProvider(), "s1", "Hi"),
+            turn(session_factory, EchoProvider(), "s2", "Hello"),
+            return_exceptions=True,
+        )
+        return outcomes, [await stored(session_factory, sid) for sid in ("s1", "s2")]
+
+    outcomes, results = asyncio.run(scenario())
+
+    assert all(isinstance(outcome, Exception) for outcome in outcomes)
+    assert buffer.batches == 0
+    assert results == [([], None), ([], None)]
@@ -0,0 +1,71 @@
+from app.services.context_builder import MESSAGE_OVERHEAD_TOKENS, ContextBuilder, estimate_tokens
+
+
+def builder(budget: int, min_current_turn_tokens: int = 16) -> ContextBuilder:
+    return ContextBuilder(max_output_tokens=0, max_input_tokens=budget, min_current_turn_tokens=min_current_turn_tokens)
+
+
+def test_everything_fits():
+    built = builder(1000).build("You are helpful.", [
+        {"role": "user", "content": "Hi"},
+        {"role": "assistant", "content": "Hello!"},
+        {"role": "user", "content": "How are you?"},
+    ])
+    assert len(built.messages) == 4
+    assert built.dropped_messages == 0
+    assert not built.truncated
+    assert built.tokens_used == sum(built.token_counts) <= built.budget
+
+
+def test_oversized_system_prompt_is_capped_and_current_turn_kept():
+    system_prompt = " ".join(f"rule{i}" for i in range(100))
+    current = "Can I apply for the visa from Bali while working remotely?"
+    built = builder(50).build(system_prompt, [
+        {"role": "assistant", "content": "Earlier reply"},
+        {"role": "user", "content": current},
+    ])
+
+    system, *rest = built.messages
+    assert built.tokens_used <= 50
+    assert built.truncated
+    # Head of the system prompt survives, tail is cut
+    assert system["content"] and system_prompt.startswith(system["content"])
+    assert rest[-1]["role"] == "user"
+    assert rest[-1]["content"] == current
+    assert built.dropped_messages == 1
+
+
+def test_current_turn_keeps_minimum_slice_when_longer_than_reserve():
+    system_prompt = " ".join(f"rule{i}" for i in range(200))
+    current = " ".join(f"word{i}" for i in range(200))
+    built = builder(60, min_current_turn_tokens=20).build(system_prompt, [{"role": "user", "content": current}])
+
+    user = built.messages[-1]
+    assert built.tokens_used <= 60
+    assert estimate_tokens(user["content"]) >= 20 - MESSAGE_OVERHEAD_TOKENS
+    # Newest text of the turn is kept
+    assert current.endswith(user["content"])
+
+
+def test_old_turns_dropped_whole_and_newest_truncated():
+    history = [{"role": "user", "content": " ".join(["old"] * 30)} for _ in range(3)]
+    current = {"role": "user", "content": " ".join(f"w{i}" for i in range(80))}
+    built = builder(60).build("Sys.", history + [current])
+
+    assert built.dropped_messages == 3
+    assert built.truncated
+    assert len(built.messages) == 2
+    assert current["content"].endswith(built.messages[-1]["content"])
+    assert built.tokens_used <= 60
+
+
+def test_older_turn_dropped_when_it_does_not_fit():
+    history = [
+        {"role": "user", "content": " ".join(["old"] * 40)},
+        {"role": "assistant", "content": "short"},
+    ]
+    built = builder(40).build("Sys.", history + [{"role": "user", "content": "latest"}])
+
+    assert [m["content"] for m in built.messages[1:]] == ["short", "latest"]
+    assert built.dropped_messages == 1
+    assert not built.truncated
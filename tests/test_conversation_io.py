@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from app.core.config import settings
+from app.models.message import Message
+from app.models.session_stats import SessionStats
+from app.services.conversation_io import ConversationImporter
+
+
+@pytest.fixture
+def engine(database_path, monkeypatch):
+    monkeypatch.setattr(settings, "EDITOR_TRIGGER_EVERY", 5)
+    engine = create_engine(f"sqlite:///{database_path}")
+    yield engine
+    engine.dispose()
+
+
+def conversation(contact_id: str, user_turns: int, start: int = 0):
+    turns = []
+    for i in range(user_turns):
+        turns.append({"message_id": 2 * i + 1, "direction": "in", "text": f"q{start + i}", "timestamp": 1000 * (start + i)})
+        turns.append({"message_id": 2 * i + 2, "direction": "out", "text": f"a{start + i}", "timestamp": 1000 * (start + i) + 1})
+    return {"contact_id": contact_id, "conversation": turns}
+
+
+def message_count(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(Message)).scalar()
+
+
+def stats(engine, session_id: str):
+    with engine.connect() as conn:
+        row = conn.execute(select(
+            SessionStats.user_message_count, SessionStats.last_editor_trigger_count
+        ).where(SessionStats.session_id == session_id)).one()
+    return tuple(row)
+
+
+def test_reimporting_the_same_file_is_a_no_op(engine):
+    corpus = [conversation("a", 2), conversation("b", 1)]
+
+    first = ConversationImporter(engine, batch_size=2).run(corpus)
+    second = ConversationImporter(engine, batch_size=2).run(corpus)
+
+    assert first == {"sessions": 2, "messages": 6, "skipped_sessions": 0}
+    assert second == {"sessions": 0, "messages": 0, "skipped_sessions": 2}
+    assert message_count(engine) == 6
+    assert stats(engine, "a") == (2, 0)
+
+
+def test_include_existing_appends_to_known_sessions(engine):
+    ConversationImporter(engine).run([conversation("a", 2)])
+    summary = ConversationImporter(engine, include_existing=True).run([conversation("a", 1, start=10)])
+
+    assert summary["messages"] == 2
+    assert message_count(engine) == 6
+    assert stats(engine, "a") == (3, 0)
+
+
+def test_imported_history_settles_the_editor_trigger(engine):
+    ConversationImporter(engine).run([conversation("long", 7), conversation("short", 4)])
+    # 7 user turns: the trigger at 5 counts as done, the next one fires at 10
+    assert stats(engine, "long") == (7, 5)
+    assert stats(engine, "short") == (4, 0)
+
+    ConversationImporter(engine, include_existing=True).run([conversation("long", 3, start=20)])
+    assert stats(engine, "long") == (10, 10)
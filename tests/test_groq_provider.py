@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.core.http_client import PooledHTTPClient
+from app.services import groq_provider
+from app.services.groq_provider import LLMClient
+from app.services.rate_governor import RateGovernor
+
+
+def sse_body(deltas):
+    lines = [f"data: {json.dumps({'choices': [{'delta': {'content': d}}]})}\n\n" for d in deltas]
+    return "".join(lines) + "data: [DONE]\n\n"
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(groq_provider, "observe_llm_call", lambda lane, model, outcome, *a: recorded.append(outcome))
+    return recorded
+
+
+def client_for(handler) -> LLMClient:
+    pool = PooledHTTPClient(http2=False)
+    pool._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    governor = RateGovernor(name="test", max_concurrency=4, requests_per_minute=0, tokens_per_minute=0)
+    return LLMClient(http_pool=pool, governor=governor, base_url="http://llm.test/v1/chat", api_key="")
+
+
+def test_stream_closed_by_consumer_is_cancelled_not_error(calls):
+    client = client_for(lambda request: httpx.Response(200, text=sse_body(["one ", "two ", "three"])))
+
+    async def scenario():
+        stream = client.stream_chat([{"role": "user", "content": "hi"}])
+        first = await stream.__anext__()
+        await stream.aclose()
+        return first
+
+    assert asyncio.run(scenario()) == "one "
+    assert calls == ["cancelled"]
+    assert client.governor.in_flight == 0
+    assert client.governor.throttled == 0
+    assert client.governor.limit == client.governor.max_concurrency
+
+
+def test_stream_outcomes_for_completed_and_failed_calls(calls):
+    ok = client_for(lambda request: httpx.Response(200, text=sse_body(["a", "b"])))
+    failing = client_for(lambda request: httpx.Response(503, text="unavailable"))
+
+    async def collect(client):
+        return [delta async for delta in client.stream_chat([{"role": "user", "content": "hi"}])]
+
+    assert asyncio.run(collect(ok)) == ["a", "b"]
+    with pytest.raises(groq_provider.LLMProviderError):
+        asyncio.run(collect(failing))
+    assert calls == ["ok", "503"]
@@ -0,0 +1,185 @@
+import asyncio
+from typing import Dict, List
+
+import pytest
+
+from app.core.config import settings
+from app.core.llm import BaseLLMProvider, LLMProviderError
+from app.services import llm_router
+from app.services.llm_router import BackendHealth, LLMRouter, RouterBackend
+
+
+class ScriptedProvider(BaseLLMProvider):
+    """Replies with `reply` after `delay`, or raises `error`; records calls and cancellations."""
+
+    def __init__(self, reply: str = "ok", delay: float = 0.0, error: Exception = None, chunks: List[str] = None):
+        self.reply = reply
+        self.delay = delay
+        self.error = error
+        self.chunks = chunks
+        self.calls = 0
+        self.cancelled = 0
+
+    async def chat_once(self, messages: List[Dict], **kwargs) -> str:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.reply
+
+    async def chat(self, messages: List[Dict], **kwargs) -> str:
+        return await self.chat_once(messages, **kwargs)
+
+    async def generate(self, system_prompt: str, user_message: str, **kwargs) -> str:
+        return await self.chat_once([{"role": "user", "content": user_message}], **kwargs)
+
+    async def stream_chat(self, messages: List[Dict], **kwargs):
+        self.calls += 1
+        for chunk in self.chunks if self.chunks is not None else [self.reply]:
+            yield chunk
+        if self.error is not None:
+            raise self.error
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def router(*providers: ScriptedProvider, hedge: bool = False, **health) -> LLMRouter:
+    return LLMRouter(
+        [RouterBackend(name=f"b{i}", provider=p, health=BackendHealth(**health)) for i, p in enumerate(providers)],
+        hedge=hedge,
+    )
+
+
+@pytest.fixture
+def clock(monkeypatch, fake_clock):
+    monkeypatch.setattr(llm_router, "time", fake_clock)
+    return fake_clock
+
+
+@pytest.fixture
+def short_hedge(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY", 0.02)
+
+
+def test_fast_primary_is_not_hedged(short_hedge):
+    primary, secondary = ScriptedProvider("primary"), ScriptedProvider("secondary")
+    r = router(primary, secondary, hedge=True)
+
+    assert asyncio.run(r.chat(MESSAGES)) == "primary"
+    assert r.hedged == 0
+    assert secondary.calls == 0
+
+
+def test_hedge_fires_after_delay_and_loser_is_cancelled(short_hedge):
+    primary, secondary = ScriptedProvider("slow", delay=5.0), ScriptedProvider("fast")
+    r = router(primary, secondary, hedge=True)
+
+    async def scenario():
+        reply = await r.chat(MESSAGES)
+        await asyncio.sleep(0)  # let the cancelled primary unwind
+        return reply
+
+    assert asyncio.run(scenario()) == "fast"
+    assert (r.hedged, r.hedge_wins) == (1, 1)
+    assert secondary.calls == 1
+    assert primary.cancelled == 1
+    assert r.backends[0].health.in_flight == 0
+
+
+def test_hedge_waits_for_primary_tail_latency(short_hedge):
+    primary, secondary = ScriptedProvider("primary", delay=0.05), ScriptedProvider("secondary")
+    r = router(primary, secondary, hedge=True)
+    # Primary's p95 is well above this call's latency, so no hedge
+    r.backends[0].health.latencies.extend([0.5] * 20)
+
+    assert asyncio.run(r.chat(MESSAGES)) == "primary"
+    assert r.hedged == 0
+    assert secondary.calls == 0
+
+
+def test_failover_when_primary_raises():
+    primary = ScriptedProvider(error=LLMProviderError("503"))
+    secondary = ScriptedProvider("secondary")
+    r = router(primary, secondary)
+
+    assert asyncio.run(r.chat(MESSAGES)) == "secondary"
+    assert r.failovers == 1
+    assert r.backends[0].health.consecutive_failures == 1
+    assert r.backends[0].health.error_rate == 1.0
+
+
+def test_request_errors_are_not_failed_over():
+    primary, secondary = ScriptedProvider(error=ValueError("bad request")), ScriptedProvider("secondary")
+    r = router(primary, secondary)
+
+    with pytest.raises(ValueError):
+        asyncio.run(r.chat(MESSAGES))
+    assert secondary.calls == 0
+
+
+def test_all_backends_failing_raises_last_error():
+    r = router(ScriptedProvider(error=LLMProviderError("one")), ScriptedProvider(error=LLMProviderError("two")))
+
+    with pytest.raises(LLMProviderError, match="two"):
+        asyncio.run(r.chat(MESSAGES))
+
+
+def test_breaker_opens_at_threshold_and_closes_after_cooldown(clock):
+    health = BackendHealth(window=10, failure_threshold=2, cooldown=30.0)
+
+    health.record_failure()
+    assert health.healthy(clock.monotonic())
+    health.record_failure()
+    assert not health.healthy(clock.monotonic())
+
+    clock.advance(29.9)
+    assert not health.healthy(clock.monotonic())
+    clock.advance(0.1)
+    assert health.healthy(clock.monotonic())
+
+    health.record_success(0.1)
+    assert health.consecutive_failures == 0
+
+
+def test_router_skips_open_backend_until_cooldown(clock):
+    primary = ScriptedProvider(error=LLMProviderError("down"))
+    secondary = ScriptedProvider("secondary")
+    r = router(primary, secondary, window=20, failure_threshold=2, cooldown=30.0)
+    # Primary is the faster backend, so it ranks first while its circuit is closed
+    r.backends[0].health.latencies.extend([0.001] * 10)
+    r.backends[1].health.latencies.extend([0.01] * 10)
+
+    async def scenario():
+        for _ in range(2):
+            assert await r.chat(MESSAGES) == "secondary"
+        assert primary.calls == 2
+
+        # Breaker open: primary is not tried at all
+        assert await r.chat(MESSAGES) == "secondary"
+        assert primary.calls == 2
+
+        # Cooldown over and recovered: primary is probed again and wins
+        clock.advance(30.0)
+        primary.error = None
+        primary.reply = "primary"
+        assert await r.chat(MESSAGES) == "primary"
+        assert primary.calls == 3
+
+    asyncio.run(scenario())
+
+
+def test_stream_fails_over_before_first_token():
+    primary = ScriptedProvider(error=LLMProviderError("down"), chunks=[])
+    secondary = ScriptedProvider(chunks=["hel", "lo"])
+    r = router(primary, secondary)
+
+    async def collect():
+        return [delta async for delta in r.stream_chat(MESSAGES)]
+
+    assert asyncio.run(collect()) == ["hel", "lo"]
+    assert r.failovers == 1
@@ -0,0 +1,120 @@
+import gzip
+import json
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.message import Message
+from app.repositories.message_repo import MessageRepository
+from app.services import message_archive
+from app.services.message_archive import MessageArchiver
+
+NOW = datetime.now(timezone.utc)
+OLD = datetime(2024, 3, 10, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def engine(database_path):
+    engine = create_engine(f"sqlite:///{database_path}")
+    yield engine
+    engine.dispose()
+
+
+def add_messages(engine, session_id: str, at: datetime, count: int):
+    with engine.begin() as conn:
+        conn.execute(insert(Message), [
+            {"id": uuid.uuid4(), "session_id": session_id, "role": "user", "content": f"m{i}",
+             "created_at": at + timedelta(minutes=i)}
+            for i in range(count)
+        ])
+
+
+def archived_lines(archive_dir) -> list:
+    lines = []
+    for root, _, files in os.walk(archive_dir):
+        for name in files:
+            with gzip.open(os.path.join(root, name), "rt", encoding="utf-8") as f:
+                lines.extend(json.loads(line) for line in f)
+    return lines
+
+
+def message_count(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(Message)).scalar()
+
+
+def test_archive_moves_expired_rows_and_keeps_recent(engine, tmp_path):
+    add_messages(engine, "old", OLD, 3)
+    add_messages(engine, "new", NOW, 2)
+
+    summary = MessageArchiver(engine, archive_dir=str(tmp_path / "archive"), batch_size=2).archive(older_than_days=30)
+
+    assert summary["rows"] == 3
+    assert [m["month"] for m in summary["months"] if m["rows"]] == ["2024-03"]
+    assert os.listdir(tmp_path / "archive") == ["2024-03"]
+    assert message_count(engine) == 2
+    assert sorted(line["content"] for line in archived_lines(tmp_path / "archive")) == ["m0", "m1", "m2"]
+
+
+def test_rerun_after_failed_delete_writes_no_duplicates(engine, tmp_path, monkeypatch):
+    add_messages(engine, "old", OLD, 4)
+    archive_dir = str(tmp_path / "archive")
+
+    def fail(self, *criteria, batch_size=None):
+        raise RuntimeError("connection lost")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(MessageRepository, "delete_in_batches", fail)
+        with pytest.raises(RuntimeError):
+            MessageArchiver(engine, archive_dir=archive_dir).archive(older_than_days=30)
+    assert message_count(engine) == 4
+
+    # A late row for the same session lands in a new part, not appended to the first file
+    add_messages(engine, "old", OLD + timedelta(days=1), 1)
+    summary = MessageArchiver(engine, archive_dir=archive_dir).archive(older_than_days=30)
+
+    assert summary["rows"] == 1
+    assert message_count(engine) == 0
+    lines = archived_lines(archive_dir)
+    assert len(lines) == len({line["id"] for line in lines}) == 5
+    assert sorted(os.listdir(os.path.join(archive_dir, "2024-03"))) == [
+        message_archive.session_archive_name("old"),
+        message_archive.session_archive_name("old").replace(".ndjson.gz", ".part2.ndjson.gz"),
+    ]
+
+
+def test_interrupted_write_is_discarded(engine, tmp_path):
+    add_messages(engine, "old", OLD, 2)
+    archive_dir = tmp_path / "archive"
+    staging = archive_dir / ".staging-2024-03"
+    staging.mkdir(parents=True)
+    (staging / message_archive.session_archive_name("old")).write_bytes(b"truncated")
+
+    MessageArchiver(engine, archive_dir=str(archive_dir)).archive(older_than_days=30)
+
+    assert not staging.exists()
+    assert len(archived_lines(archive_dir)) == 2
+
+
+def test_partitioned_table_also_archives_default_partition_rows(engine, monkeypatch):
+    # Month partitions exist for Jan and Mar 2024; Feb rows live in the default partition
+    partitions = [
+        ("messages_p202401", datetime(2024, 1, 1, tzinfo=timezone.utc), datetime(2024, 2, 1, tzinfo=timezone.utc)),
+        ("messages_p202403", datetime(2024, 3, 1, tzinfo=timezone.utc), datetime(2024, 4, 1, tzinfo=timezone.utc)),
+    ]
+    monkeypatch.setattr(message_archive, "list_month_partitions", lambda conn: partitions)
+    add_messages(engine, "jan", datetime(2024, 1, 5, tzinfo=timezone.utc), 1)
+    add_messages(engine, "feb", datetime(2024, 2, 5, tzinfo=timezone.utc), 1)
+    add_messages(engine, "mar", datetime(2024, 3, 5, tzinfo=timezone.utc), 1)
+
+    with Session(engine) as db:
+        ranges = MessageArchiver(engine)._expired_months(db, datetime(2024, 3, 20, tzinfo=timezone.utc))
+
+    assert [(f"{lower:%Y-%m}", partition) for lower, _, partition in ranges] == [
+        ("2024-01", "messages_p202401"),
+        ("2024-02", None),
+    ]
@@ -0,0 +1,82 @@
+import json
+import os
+
+import pytest
+
+from app.services.output_validator import (
+    OutputValidationError, OutputValidator, ValidationRule, get_output_validator,
+)
+
+
+@pytest.fixture
+def validator():
+    return OutputValidator([
+        ValidationRule("forbidden_phrase", "Please upload", "Forbidden phrase.", max_length=len("Please upload")),
+        ValidationRule("conversational_tone", "good morning", "Conversational tone.", max_length=len("good morning")),
+        ValidationRule("visa_detail", r"\b\d+ ?(?:IDR|USD)\b", "Currency detail.", is_regex=True, max_length=16),
+    ])
+
+
+def feed_all(validation, deltas):
+    for delta in deltas:
+        validation.feed(delta)
+    return validation
+
+
+def test_clean_stream_passes_through_unchanged(validator):
+    deltas = ["Define scope ", "and refuse ", "out-of-scope requests.", ""]
+    validation = feed_all(validator.stream(), deltas)
+    assert validation.text == "".join(deltas)
+    assert validation.length == len(validation.text)
+
+
+def test_violation_split_across_deltas_is_caught(validator):
+    validation = validator.stream()
+    validation.feed("Rules: never say Please up")
+    with pytest.raises(OutputValidationError) as error:
+        validation.feed("load your passport.")
+    assert error.value.rule == "forbidden_phrase"
+    # Position is absolute in the streamed text, not relative to the chunk
+    assert error.value.position == len("Rules: never say ")
+
+
+def test_violation_split_over_many_small_deltas(validator):
+    validation = validator.stream()
+    with pytest.raises(OutputValidationError) as error:
+        feed_all(validation, list("Intro. GOOD MOR") + list("NING all"))
+    assert error.value.rule == "conversational_tone"
+    assert error.value.position == len("Intro. ")
+
+
+def test_stream_aborts_at_first_violation(validator):
+    validation = validator.stream()
+    deltas = ["The fee is 500", " IDR per entry.", " Never reached."]
+    with pytest.raises(OutputValidationError) as error:
+        feed_all(validation, deltas)
+    assert error.value.rule == "visa_detail"
+    # The third delta was never consumed
+    assert validation.text == "".join(deltas[:2])
+
+
+def test_buffered_validate_matches_streaming(validator):
+    validator.validate("Answer only within scope.")
+    with pytest.raises(OutputValidationError, match="Forbidden phrase"):
+        validator.validate("please UPLOAD the form")
+
+
+def test_rules_file_is_compiled_and_reloaded_on_change(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": [
+        {"name": "greeting", "type": "phrase", "message": "No '{pattern}'.", "patterns": ["Hello", "Welcome"]},
+    ]}))
+    validator = get_output_validator(str(path))
+    assert [rule.message for rule in validator.rules] == ["No 'Hello'.", "No 'Welcome'."]
+    assert get_output_validator(str(path)) is validator
+
+    path.write_text(json.dumps({"rules": [{"name": "sign_off", "patterns": ["Let me know"]}]}))
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    reloaded = get_output_validator(str(path))
+    assert reloaded is not validator
+    with pytest.raises(OutputValidationError):
+        feed_all(reloaded.stream(), ["let me ", "know"])
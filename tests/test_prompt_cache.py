@@ -0,0 +1,101 @@
+import asyncio
+from typing import Dict, List
+
+from app.api.routes import activate
+from app.core.llm import BaseLLMProvider
+from app.repositories.prompt_repo import AsyncPromptRepository
+from app.services import prompt_editor
+from app.services.prompt_cache import ActivePromptCache, generate_prompt_preview
+from app.services.prompt_editor import PromptEditorService
+
+NEW_PROMPT = "You are a precise assistant. Answer only within scope and ask when details are missing."
+
+
+class EditorProvider(BaseLLMProvider):
+    async def generate(self, system_prompt: str, user_message: str, **kwargs) -> str:
+        if system_prompt == prompt_editor.BEHAVIOR_EXTRACTOR_INSTRUCTION:
+            return "Behavior Report:\n- Tone drift issues"
+        return NEW_PROMPT
+
+    async def chat(self, messages: List[Dict], **kwargs) -> str:
+        return await self.generate(messages[0]["content"], messages[-1]["content"])
+
+
+async def add_inactive_version(session_factory, version: int, content: str):
+    async with session_factory() as db:
+        return await AsyncPromptRepository(db).create_prompt(version=version, content=content, is_active=False)
+
+
+def test_snapshot_served_from_memory_within_interval(session_factory, active_prompt, prompt_cache):
+    async def scenario():
+        async with session_factory() as db:
+            first = await prompt_cache.get(db)
+            second = await prompt_cache.get(db)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first is second
+    assert (first.id, first.version) == (active_prompt.id, 1)
+    assert first.preview == generate_prompt_preview(active_prompt.content)
+    assert (prompt_cache.reloads, prompt_cache.hits) == (1, 1)
+
+
+def test_activate_route_invalidates_cached_prompt(session_factory, active_prompt, prompt_cache):
+    async def scenario():
+        async with session_factory() as db:
+            assert (await prompt_cache.get(db)).version == 1
+        v2 = await add_inactive_version(session_factory, 2, "Version two.")
+        async with session_factory() as db:
+            await activate(str(v2.id), db)
+        async with session_factory() as db:
+            return v2, await prompt_cache.get(db)
+
+    v2, snapshot = asyncio.run(scenario())
+
+    # Within the check interval, so only the explicit invalidation can explain the reload
+    assert (snapshot.id, snapshot.version, snapshot.content) == (v2.id, 2, "Version two.")
+    assert prompt_cache.reloads == 2
+
+
+def test_editor_version_bump_invalidates_cached_prompt(session_factory, active_prompt, prompt_cache, monkeypatch):
+    monkeypatch.setattr(prompt_editor, "write_behavior_report", lambda report: None)
+    monkeypatch.setattr(PromptEditorService, "_collect_assistant_messages", lambda self: _recent())
+
+    async def scenario():
+        async with session_factory() as db:
+            assert (await prompt_cache.get(db)).version == 1
+        async with session_factory() as db:
+            new_prompt = await PromptEditorService(db, EditorProvider()).run_editor(triggered_by="test")
+        async with session_factory() as db:
+            return new_prompt, await prompt_cache.get(db)
+
+    new_prompt, snapshot = asyncio.run(scenario())
+
+    assert (snapshot.id, snapshot.version) == (new_prompt.id, 2)
+    assert snapshot.content == NEW_PROMPT
+
+
+def test_activation_in_another_worker_is_seen_after_version_check(session_factory, active_prompt):
+    # The other worker's invalidate() never reaches this process
+    cache = ActivePromptCache(check_interval=0)
+
+    async def scenario():
+        async with session_factory() as db:
+            assert (await cache.get(db)).version == 1
+            assert (await cache.get(db)).version == 1
+        v2 = await add_inactive_version(session_factory, 2, "Version two.")
+        async with session_factory() as db:
+            await AsyncPromptRepository(db).activate_prompt(v2.id)
+        async with session_factory() as db:
+            return await cache.get(db)
+
+    snapshot = asyncio.run(scenario())
+
+    assert snapshot.version == 2
+    assert cache.version_checks == 2
+    assert cache.reloads == 2
+
+
+async def _recent():
+    return ["Sure! I can definitely sort out any visa for you."]
@@ -0,0 +1,58 @@
+import asyncio
+from typing import Dict, List
+
+from sqlalchemy import select
+
+from app.core.llm import BaseLLMProvider, LLMProviderError
+from app.models.prompt import Prompt
+from app.services import prompt_editor
+from app.services.prompt_editor import PromptEditorService
+
+NEW_PROMPT = "You are a precise assistant. Answer only within scope and ask when details are missing."
+
+
+class FlakyStreamProvider(BaseLLMProvider):
+    """First stream fails before any token; buffered calls succeed."""
+
+    def __init__(self):
+        self.stream_calls = 0
+        self.generate_calls = 0
+
+    async def generate(self, system_prompt: str, user_message: str, **kwargs) -> str:
+        self.generate_calls += 1
+        if system_prompt == prompt_editor.BEHAVIOR_EXTRACTOR_INSTRUCTION:
+            return "Behavior Report:\n- Tone drift issues"
+        return NEW_PROMPT
+
+    async def chat(self, messages: List[Dict], **kwargs) -> str:
+        return await self.generate(messages[0]["content"], messages[-1]["content"])
+
+    async def stream_chat(self, messages: List[Dict], **kwargs):
+        self.stream_calls += 1
+        raise LLMProviderError("Server error: 503")
+        yield  # pragma: no cover
+
+
+def test_stage2_stream_failure_before_first_token_falls_back(session_factory, active_prompt, monkeypatch):
+    monkeypatch.setattr(prompt_editor, "write_behavior_report", lambda report: None)
+    monkeypatch.setattr(PromptEditorService, "_collect_assistant_messages", lambda self: _recent())
+    provider = FlakyStreamProvider()
+
+    async def scenario():
+        async with session_factory() as db:
+            new_prompt = await PromptEditorService(db, provider).run_editor(triggered_by="test")
+        async with session_factory() as db:
+            versions = (await db.execute(select(Prompt.version, Prompt.is_active).order_by(Prompt.version))).all()
+        return new_prompt, versions
+
+    new_prompt, versions = asyncio.run(scenario())
+
+    assert new_prompt.content == NEW_PROMPT
+    assert [tuple(v) for v in versions] == [(1, False), (2, True)]
+    assert provider.stream_calls == 1
+    # Stage 1 plus the buffered Stage 2 retry
+    assert provider.generate_calls == 2
+
+
+async def _recent():
+    return ["Sure! I can definitely sort out any visa for you."]
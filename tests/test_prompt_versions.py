@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.prompt import Prompt
+from app.repositories.prompt_repo import AsyncPromptRepository
+from app.services.editor_worker import EditorWorker
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "prompts.db"
+
+
+class RacingPromptRepository(AsyncPromptRepository):
+    """Holds every first MAX(version) read at a barrier so both allocators see the same number."""
+
+    def __init__(self, db, barrier: asyncio.Barrier):
+        super().__init__(db)
+        self.barrier = barrier
+        self.reads = 0
+
+    async def get_latest_version(self) -> int:
+        latest = await super().get_latest_version()
+        self.reads += 1
+        if self.reads == 1:
+            await self.barrier.wait()
+        return latest
+
+
+def test_concurrent_next_versions_are_distinct_on_sqlite(db_path):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda sync_conn: Base.metadata.create_all(sync_conn, tables=[Prompt.__table__]))
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+        barrier = asyncio.Barrier(2)
+        async with session_factory() as first, session_factory() as second:
+            repos = [RacingPromptRepository(first, barrier), RacingPromptRepository(second, barrier)]
+            created = await asyncio.gather(
+                *(repo.create_next_version(content=f"v-{i}", triggered_by="test") for i, repo in enumerate(repos))
+            )
+
+        async with session_factory() as db:
+            rows = (await db.execute(select(Prompt.version, Prompt.is_active).order_by(Prompt.version))).all()
+        await engine.dispose()
+        return created, repos, rows
+
+    created, repos, rows = asyncio.run(scenario())
+
+    assert sorted(p.version for p in created) == [1, 2]
+    # The loser hit uq_prompts_version and re-read MAX(version)
+    assert sorted(repo.reads for repo in repos) == [1, 2]
+    assert [version for version, _ in rows] == [1, 2]
+    assert [active for _, active in rows] == [False, True]
+
+
+class StubEditorWorker(EditorWorker):
+    def __init__(self):
+        super().__init__(llm_client=None, session_factory=None)
+        self.runs = 0
+        self.release = asyncio.Event()
+
+    async def _run_editor(self, session_id, triggered_by):
+        self.runs += 1
+        await self.release.wait()
+        return f"prompt-{self.runs}"
+
+
+def test_single_flight_callers_share_one_run():
+    async def scenario():
+        worker = StubEditorWorker()
+        callers = [asyncio.create_task(worker.run_single_flight(triggered_by=t)) for t in ("manual", "autonomous")]
+        await asyncio.sleep(0)
+        assert worker.run_in_flight
+
+        # A caller going away does not cancel the shared run
+        quitter = asyncio.create_task(worker.run_single_flight())
+        await asyncio.sleep(0)
+        quitter.cancel()
+
+        worker.release.set()
+        results = await asyncio.gather(*callers)
+        assert results == ["prompt-1", "prompt-1"]
+        assert (worker.runs, worker.joined_runs) == (1, 2)
+
+        # Once finished, the next call starts a fresh run
+        assert await worker.run_single_flight() == "prompt-2"
+        assert worker.runs == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,203 @@
+import asyncio
+
+import pytest
+
+from app.core.llm import LLMRateLimitTimeout
+from app.services import rate_governor
+from app.services.rate_governor import RateGovernor, TokenBucket, parse_duration
+
+
+@pytest.fixture
+def clock(monkeypatch, fake_clock):
+    monkeypatch.setattr(rate_governor, "time", fake_clock)
+    return fake_clock
+
+
+def governor(**kwargs) -> RateGovernor:
+    options = {"max_concurrency": 4, "requests_per_minute": 0, "tokens_per_minute": 0, "queue_timeout": 0}
+    options.update(kwargs)
+    return RateGovernor(name="test", **options)
+
+
+def cancel_wakeup(gov: RateGovernor):
+    # Wakeups run on the real loop clock; the tests dispatch by hand instead
+    if gov._wakeup is not None:
+        gov._wakeup.cancel()
+
+
+async def settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_parse_duration():
+    assert parse_duration("7.66s") == pytest.approx(7.66)
+    assert parse_duration("2m59.56s") == pytest.approx(179.56)
+    assert parse_duration("120ms") == pytest.approx(0.12)
+    assert parse_duration("3") == 3.0
+    assert parse_duration("") is None
+
+
+def test_bucket_refills_linearly_and_caps_at_capacity(clock):
+    bucket = TokenBucket(per_minute=60)
+    bucket.take(60)
+    assert bucket.level == 0
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+
+    clock.advance(30)
+    bucket.refill(clock.monotonic())
+    assert bucket.level == pytest.approx(30)
+    assert bucket.wait_time(1) == 0.0
+
+    clock.advance(600)
+    bucket.refill(clock.monotonic())
+    assert bucket.level == 60
+
+
+def test_bucket_share_keeps_reserve(clock):
+    bucket = TokenBucket(per_minute=100)
+    bucket.take(60)
+    # A 50% lane may only drain down to the 50-token reserve
+    assert bucket.wait_time(10, share=0.5) == pytest.approx(12.0)
+    assert bucket.wait_time(10, share=1.0) == 0.0
+
+
+def test_waiting_request_granted_after_bucket_refills(clock):
+    async def scenario():
+        gov = governor(requests_per_minute=60)
+        gov.requests.take(60)
+        task = asyncio.create_task(gov.acquire())
+        await settle()
+        assert not task.done()
+
+        clock.advance(1.0)
+        gov._dispatch()
+        permit = await task
+        assert permit.granted_at == clock.monotonic()
+        cancel_wakeup(gov)
+
+    asyncio.run(scenario())
+
+
+def test_priority_lanes_dispatch_first_fifo_within_lane(clock):
+    async def scenario():
+        gov = governor(max_concurrency=1)
+        gov.add_lane("interactive", priority=0)
+        gov.add_lane("background", priority=1)
+        first = await gov.acquire(lane="background")
+
+        order = []
+
+        async def call(lane, tag):
+            permit = await gov.acquire(lane=lane)
+            order.append(tag)
+            gov.release(permit, status_code=200)
+
+        tasks = [
+            asyncio.create_task(call("background", "bg-1")),
+            asyncio.create_task(call("interactive", "chat-1")),
+            asyncio.create_task(call("background", "bg-2")),
+            asyncio.create_task(call("interactive", "chat-2")),
+        ]
+        await settle()
+        assert order == []
+
+        gov.release(first, status_code=200)
+        await asyncio.gather(*tasks)
+        assert order == ["chat-1", "chat-2", "bg-1", "bg-2"]
+
+    asyncio.run(scenario())
+
+
+def test_lane_cap_does_not_block_other_lanes(clock):
+    async def scenario():
+        gov = governor(max_concurrency=4)
+        gov.add_lane("background", priority=0, max_concurrency=1)
+        gov.add_lane("interactive", priority=1)
+        await gov.acquire(lane="background")
+        blocked = asyncio.create_task(gov.acquire(lane="background"))
+        await settle()
+
+        permit = await gov.acquire(lane="interactive")
+        assert permit.lane == "interactive"
+        assert not blocked.done()
+        blocked.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_429_halves_concurrency_pauses_and_recovers(clock):
+    async def scenario():
+        gov = governor(max_concurrency=4)
+        permits = [await gov.acquire() for _ in range(2)]
+
+        gov.release(permits[0], status_code=429, headers={"retry-after": "2"})
+        assert gov.limit == 2.0
+        assert gov.throttled == 1
+        assert gov.blocked_until == clock.monotonic() + 2
+
+        # Paused until retry-after elapses, even with a free slot
+        waiting = asyncio.create_task(gov.acquire())
+        await settle()
+        assert not waiting.done()
+
+        clock.advance(2.0)
+        gov._dispatch()
+        permits.append(await waiting)
+        cancel_wakeup(gov)
+
+        # Additive increase: +1/limit per success until max_concurrency
+        for permit in permits[1:]:
+            gov.release(permit, status_code=200)
+        assert gov.limit == pytest.approx(2.5 + 1 / 2.5)
+        for _ in range(20):
+            gov.release(await gov.acquire(), status_code=200)
+        assert gov.limit == 4.0
+
+    asyncio.run(scenario())
+
+
+def test_headers_resync_token_budget_and_pause_on_exhausted_requests(clock):
+    async def scenario():
+        gov = governor(tokens_per_minute=10_000)
+        held = await gov.acquire(tokens=500)
+        done = await gov.acquire(tokens=800)
+
+        gov.release(done, status_code=200, used_tokens=600, headers={
+            "x-ratelimit-limit-tokens": "6000",
+            "x-ratelimit-remaining-tokens": "4000",
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "1m30s",
+        })
+        assert gov.tokens.capacity == 6000
+        # Provider count minus what is still reserved by the held permit
+        assert gov.tokens.level == 4000 - held.tokens
+        assert gov.reserved_tokens == held.tokens
+        assert gov.blocked_until == clock.monotonic() + 90
+        assert gov.stats()["paused_for"] == 90
+
+    asyncio.run(scenario())
+
+
+def test_failed_call_refunds_reserved_tokens(clock):
+    async def scenario():
+        gov = governor(tokens_per_minute=1000)
+        permit = await gov.acquire(tokens=400)
+        assert gov.tokens.level == 600
+        gov.release(permit, status_code=500)
+        assert gov.tokens.level == 1000
+        assert gov.reserved_tokens == 0
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_raises(clock):
+    async def scenario():
+        gov = governor(max_concurrency=1)
+        await gov.acquire()
+        with pytest.raises(LLMRateLimitTimeout):
+            await gov.acquire(timeout=0.01)
+        assert gov.timeouts == 1
+        assert gov.stats()["queue_depth"] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,66 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.services.reply_scorer import ReplyScorer, borderline_mask, tokenize
+
+
+def test_tokenize_words_and_bigrams():
+    assert tokenize("Don't PANIC, it's fine", ngram_max=1) == ["don't", "panic", "it's", "fine"]
+    assert tokenize("visa on arrival") == ["visa", "on", "arrival", "visa on", "on arrival"]
+    assert tokenize(None) == []
+
+
+def test_identical_replies_score_one():
+    scores = ReplyScorer(ngram_max=2).score_pairs(["The visa costs 500k IDR"], ["the visa costs 500k idr"])
+    assert scores[0] == pytest.approx(1.0)
+
+
+def test_disjoint_replies_score_zero():
+    scores = ReplyScorer(ngram_max=2).score_pairs(["apply online today"], ["bring your passport"])
+    assert scores[0] == 0.0
+
+
+def test_partial_overlap_matches_hand_computed_tfidf():
+    # Unigrams over two documents: idf(a) = ln(3/3) + 1 = 1, idf(b) = idf(c) = ln(3/2) + 1.
+    # Both vectors have norm sqrt(1 + idf_b^2) and share only "a", so cos = 1 / (1 + idf_b^2).
+    idf_b = math.log(3 / 2) + 1
+    scores = ReplyScorer(ngram_max=1).score_pairs(["a b"], ["a c"])
+    assert scores[0] == pytest.approx(1 / (1 + idf_b ** 2))
+
+
+def test_repeated_terms_use_sublinear_tf():
+    # "a a b" vs "a b": tf(a) = 1 + ln 2 on the left; both terms have idf 1
+    tf_a = 1 + math.log(2)
+    expected = (tf_a + 1) / (math.sqrt(tf_a ** 2 + 1) * math.sqrt(2))
+    scores = ReplyScorer(ngram_max=1).score_pairs(["a a b"], ["a b"])
+    assert scores[0] == pytest.approx(expected)
+
+
+def test_pairs_are_scored_independently():
+    scorer = ReplyScorer(ngram_max=1)
+    scores = scorer.score_pairs(["same words here", "nothing shared", ""], ["same words here", "other text", "x"])
+    assert scores.tolist() == pytest.approx([1.0, 0.0, 0.0])
+
+
+def test_empty_and_mismatched_inputs():
+    scorer = ReplyScorer()
+    assert scorer.score_pairs([], []).size == 0
+    assert scorer.score_pairs([""], [""]).tolist() == [0.0]
+    with pytest.raises(ValueError):
+        scorer.score_pairs(["a"], [])
+
+
+def test_similarity_matrix_agrees_with_pairs():
+    left = ["visa on arrival", "extend your stay", "passport photo"]
+    right = ["visa on arrival is 30 days", "stay extension at immigration", "photo of passport page"]
+    scorer = ReplyScorer()
+    matrix = scorer.similarity_matrix(left, right)
+    assert matrix.shape == (3, 3)
+    assert np.diag(matrix) == pytest.approx(scorer.score_pairs(left, right))
+
+
+def test_borderline_mask_is_inclusive():
+    mask = borderline_mask(np.array([0.1, 0.3, 0.45, 0.6, 0.9]), low=0.3, high=0.6)
+    assert mask.tolist() == [False, True, True, True, False]
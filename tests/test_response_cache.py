@@ -0,0 +1,111 @@
+import asyncio
+import uuid
+from typing import Dict, List
+
+import pytest
+
+from app.core.config import settings
+from app.core.llm import BaseLLMProvider
+from app.repositories.prompt_repo import AsyncPromptRepository
+from app.services import response_cache
+from app.services.generator_service import GeneratorService
+from app.services.response_cache import ResponseCache
+
+OPENING = [{"role": "system", "content": "Be brief."}, {"role": "user", "content": "Hello, I'm interested in the DTV visa"}]
+
+
+class CountingProvider(BaseLLMProvider):
+    def __init__(self):
+        self.calls = 0
+
+    async def generate(self, system_prompt: str, user_message: str, **kwargs) -> str:
+        return await self.chat([{"role": "system", "content": system_prompt}, {"role": "user", "content": user_message}])
+
+    async def chat(self, messages: List[Dict], **kwargs) -> str:
+        self.calls += 1
+        return f"reply {self.calls} under: {messages[0]['content']}"
+
+
+@pytest.fixture
+def clock(monkeypatch, fake_clock):
+    monkeypatch.setattr(response_cache, "time", fake_clock)
+    return fake_clock
+
+
+def test_key_is_isolated_per_prompt_id():
+    cache = ResponseCache(max_entries=10, ttl=60, max_history=0)
+    v1, v2 = uuid.uuid4(), uuid.uuid4()
+
+    cache.put(cache.make_key(v1, OPENING), "answer under v1")
+
+    assert cache.make_key(v1, OPENING) != cache.make_key(v2, OPENING)
+    assert cache.get(cache.make_key(v2, OPENING)) is None
+    assert cache.get(cache.make_key(v1, OPENING)) == "answer under v1"
+
+
+def test_key_normalizes_case_and_whitespace():
+    cache = ResponseCache(max_entries=10, ttl=60, max_history=0)
+    prompt_id = uuid.uuid4()
+    shouted = [OPENING[0], {"role": "user", "content": "  HELLO, i'm interested   in the DTV visa\n"}]
+
+    assert cache.make_key(prompt_id, shouted) == cache.make_key(prompt_id, OPENING)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(max_entries=10, ttl=60, max_history=0)
+    key = cache.make_key(uuid.uuid4(), OPENING)
+    cache.put(key, "cached")
+
+    clock.advance(59.9)
+    assert cache.get(key) == "cached"
+    clock.advance(0.2)
+    assert cache.get(key) is None
+    assert cache.stats()["entries"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2, ttl=60, max_history=0)
+    keys = [cache.make_key(uuid.uuid4(), OPENING) for _ in range(3)]
+    cache.put(keys[0], "a")
+    cache.put(keys[1], "b")
+    cache.get(keys[0])
+    cache.put(keys[2], "c")
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == "a"
+    assert cache.evictions == 1
+
+
+def test_turns_with_history_bypass_the_cache():
+    cache = ResponseCache(max_entries=10, ttl=60, max_history=0)
+    follow_up = OPENING + [{"role": "assistant", "content": "Sure."}, {"role": "user", "content": "And fees?"}]
+
+    assert cache.make_key(uuid.uuid4(), follow_up) is None
+    assert cache.bypassed == 1
+
+
+def test_new_active_prompt_misses_cached_reply(session_factory, prompt_cache, active_prompt, monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+    monkeypatch.setattr(response_cache, "_response_cache", ResponseCache(max_entries=10, ttl=60, max_history=0))
+    provider = CountingProvider()
+
+    async def ask(session_id: str) -> str:
+        async with session_factory() as db:
+            return await GeneratorService(db, provider).generate(session_id, "Hello, I'm interested in the DTV visa")
+
+    async def scenario():
+        first = await ask("s1")
+        repeat = await ask("s2")
+        async with session_factory() as db:
+            repo = AsyncPromptRepository(db)
+            await repo.create_next_version("Answer in one sentence.", activate=True)
+        prompt_cache.invalidate()
+        after_edit = await ask("s3")
+        return first, repeat, after_edit
+
+    first, repeat, after_edit = asyncio.run(scenario())
+
+    assert repeat == first
+    assert after_edit == "reply 2 under: Answer in one sentence."
+    assert provider.calls == 2
@@ -0,0 +1,83 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+
+from app.core.config import settings
+from app.core.database import Base
+from app.db.schema import backfill_session_stats
+from app.models.message import Message
+from app.models.prompt import Prompt
+from app.models.session_stats import SessionStats
+from app.repositories.session_stats_repo import record_messages_statements
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'stats.db'}")
+    Base.metadata.create_all(engine, tables=[Prompt.__table__, Message.__table__, SessionStats.__table__])
+    yield engine
+    engine.dispose()
+
+
+def message_rows(session_id: str, roles: str, start: int = 0):
+    return [
+        {
+            "id": uuid.uuid4(),
+            "session_id": session_id,
+            "role": "user" if role == "u" else "assistant",
+            "content": "x",
+            "prompt_version_id": None,
+            "created_at": T0 + timedelta(minutes=start + i),
+        }
+        for i, role in enumerate(roles)
+    ]
+
+
+def counters(engine):
+    with engine.connect() as conn:
+        rows = conn.execute(select(
+            SessionStats.session_id, SessionStats.user_message_count,
+            SessionStats.assistant_message_count, SessionStats.last_editor_trigger_count,
+        ).order_by(SessionStats.session_id)).all()
+    return [tuple(row) for row in rows]
+
+
+@pytest.mark.parametrize("dialect", ["sqlite", "other"])
+def test_record_messages_accumulates_per_session(engine, dialect):
+    # "other" has no ON CONFLICT upsert and takes the seed-then-bump fallback
+    batches = [message_rows("a", "ua") + message_rows("b", "u"), message_rows("a", "uua", start=10)]
+    for rows in batches:
+        with engine.begin() as conn:
+            for stmt in record_messages_statements(dialect, rows):
+                conn.execute(stmt)
+
+    assert counters(engine) == [("a", 3, 2, 0), ("b", 1, 0, 0)]
+    with engine.connect() as conn:
+        last = conn.execute(select(SessionStats.last_activity_at).where(SessionStats.session_id == "a")).scalar()
+    assert last.replace(tzinfo=timezone.utc) == T0 + timedelta(minutes=12)
+
+
+@pytest.mark.parametrize("dialect", ["sqlite", "other"])
+def test_trigger_every_settles_editor_trigger(engine, dialect):
+    for rows in (message_rows("a", "uuuuuuu"), message_rows("a", "uuu", start=10)):
+        with engine.begin() as conn:
+            for stmt in record_messages_statements(dialect, rows, trigger_every=5):
+                conn.execute(stmt)
+        if len(rows) == 7:
+            assert counters(engine) == [("a", 7, 0, 5)]
+    assert counters(engine) == [("a", 10, 0, 10)]
+
+
+def test_backfill_uses_editor_trigger_interval(engine, monkeypatch):
+    monkeypatch.setattr(settings, "EDITOR_TRIGGER_EVERY", 3)
+    with engine.begin() as conn:
+        conn.execute(insert(Message), message_rows("a", "uauauauu") + message_rows("b", "ua"))
+
+    backfill_session_stats(engine)
+
+    # 5 user turns in "a": the last trigger was at the 3rd, so the 6th fires next
+    assert counters(engine) == [("a", 5, 3, 3), ("b", 1, 1, 0)]